@@ -5,6 +5,7 @@ from ..services.deriv_service import DerivService
 from ..services.trading_service import TradingService
 from ..utils.validators import validate_symbol
 from ..utils.decorators import handle_errors
+from utils.market_catalog import loaded_catalog, to_trading_market
 import asyncio
 import threading
 import time
@@ -52,25 +53,41 @@ def get_stats():
         current_app.logger.error(f"Error getting stats: {e}")
         return jsonify({"error": "Failed to fetch balance"}), 500
 
+def _market_index():
+    """Index of the market catalog, refreshed through the Deriv service when it is up."""
+    if deriv_service and main_loop:
+        asyncio.run_coroutine_threadsafe(
+            deriv_service.get_active_symbols(), main_loop
+        ).result(timeout=10)
+        return deriv_service.market_catalog.index
+    catalog = loaded_catalog()
+    return catalog.index if catalog else None
+
 @api_bp.route('/markets')
 @handle_errors
 def get_markets():
-    """Get list of available markets/symbols."""
+    """Get available markets/symbols.
+    
+    Optional filters: market, submarket, symbol_type, open, q (display
+    name prefix search), plus offset/limit for pagination.
+    """
     if not deriv_service:
         return jsonify({"error": "Service not ready"}), 503
     
     try:
-        markets = asyncio.run_coroutine_threadsafe(
-            deriv_service.get_active_symbols(), main_loop
-        ).result(timeout=10)
-        
+        result = _market_index().query_args(request.args)
         return jsonify({
-            "markets": markets,
-            "count": len(markets),
+            "markets": result["markets"],
+            "count": len(result["markets"]),
+            "total": result["total"],
+            "offset": result["offset"],
+            "limit": result["limit"],
             "timestamp": asyncio.run_coroutine_threadsafe(
                 deriv_service.get_timestamp(), main_loop
             ).result(timeout=2)
         })
+    except ValueError as e:
+        return jsonify({"error": f"Invalid parameter: {e}"}), 400
     except Exception as e:
         current_app.logger.error(f"Error getting markets: {e}")
         return jsonify({"error": "Failed to fetch markets"}), 500
@@ -238,56 +255,19 @@ def debug_ticks():
 # Trading routes - temporary direct implementation
 @api_bp.route('/trading/markets', methods=['GET'])
 def get_trading_markets():
-    """Retorna mercados disponíveis para trading"""
+    """Retorna mercados disponíveis para trading, com os mesmos filtros de /markets"""
     try:
-        # Lista de mercados disponíveis
-        markets = [
-            {
-                "id": "frxEURUSD",
-                "name": "EUR/USD",
-                "description": "Euro vs Dólar Americano",
-                "type": "forex"
-            },
-            {
-                "id": "frxGBPUSD", 
-                "name": "GBP/USD",
-                "description": "Libra Esterlina vs Dólar Americano",
-                "type": "forex"
-            },
-            {
-                "id": "R_10",
-                "name": "Volatility 10 Index",
-                "description": "Índice de Volatilidade 10",
-                "type": "synthetic"
-            },
-            {
-                "id": "R_25",
-                "name": "Volatility 25 Index", 
-                "description": "Índice de Volatilidade 25",
-                "type": "synthetic"
-            },
-            {
-                "id": "R_50",
-                "name": "Volatility 50 Index",
-                "description": "Índice de Volatilidade 50", 
-                "type": "synthetic"
-            },
-            {
-                "id": "R_75",
-                "name": "Volatility 75 Index",
-                "description": "Índice de Volatilidade 75",
-                "type": "synthetic"
-            },
-            {
-                "id": "R_100",
-                "name": "Volatility 100 Index",
-                "description": "Índice de Volatilidade 100",
-                "type": "synthetic"
-            }
-        ]
+        index = _market_index()
+        if index is None:
+            return jsonify({"error": "Catálogo de mercados ainda não carregado"}), 503
         
-        return jsonify(markets), 200
+        result = index.query_args(request.args)
+        response = jsonify([to_trading_market(symbol) for symbol in result["markets"]])
+        response.headers['X-Total-Count'] = str(result["total"])
+        return response, 200
         
+    except ValueError as e:
+        return jsonify({"error": f"Parâmetro inválido: {e}"}), 400
     except Exception as e:
         current_app.logger.error(f"Erro ao buscar mercados: {str(e)}")
         return jsonify({"error": "Erro interno do servidor"}), 500
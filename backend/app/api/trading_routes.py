@@ -4,6 +4,7 @@ Trading API Routes
 
 from flask import Blueprint, request, jsonify, current_app
 from ..services.trading_service import TradingService
+from utils.market_catalog import loaded_catalog, to_trading_market
 import logging
 
 logger = logging.getLogger(__name__)
@@ -171,56 +172,19 @@ def get_overall_stats():
 
 @trading_bp.route('/markets', methods=['GET'])
 def get_available_markets():
-    """Retorna mercados disponíveis para trading"""
+    """Retorna mercados disponíveis para trading a partir do catálogo em cache"""
     try:
-        # Lista de mercados disponíveis
-        markets = [
-            {
-                "id": "frxEURUSD",
-                "name": "EUR/USD",
-                "description": "Euro vs Dólar Americano",
-                "type": "forex"
-            },
-            {
-                "id": "frxGBPUSD", 
-                "name": "GBP/USD",
-                "description": "Libra Esterlina vs Dólar Americano",
-                "type": "forex"
-            },
-            {
-                "id": "R_10",
-                "name": "Volatility 10 Index",
-                "description": "Índice de Volatilidade 10",
-                "type": "synthetic"
-            },
-            {
-                "id": "R_25",
-                "name": "Volatility 25 Index", 
-                "description": "Índice de Volatilidade 25",
-                "type": "synthetic"
-            },
-            {
-                "id": "R_50",
-                "name": "Volatility 50 Index",
-                "description": "Índice de Volatilidade 50", 
-                "type": "synthetic"
-            },
-            {
-                "id": "R_75",
-                "name": "Volatility 75 Index",
-                "description": "Índice de Volatilidade 75",
-                "type": "synthetic"
-            },
-            {
-                "id": "R_100",
-                "name": "Volatility 100 Index",
-                "description": "Índice de Volatilidade 100",
-                "type": "synthetic"
-            }
-        ]
-        
-        return jsonify(markets), 200
+        catalog = loaded_catalog()
+        if catalog is None:
+            return jsonify({"error": "Catálogo de mercados ainda não carregado"}), 503
         
+        result = catalog.index.query_args(request.args)
+        response = jsonify([to_trading_market(symbol) for symbol in result["markets"]])
+        response.headers['X-Total-Count'] = str(result["total"])
+        return response, 200
+        
+    except ValueError as e:
+        return jsonify({"error": f"Parâmetro inválido: {e}"}), 400
     except Exception as e:
         logger.error(f"Erro ao buscar mercados: {str(e)}")
         return jsonify({"error": "Erro interno do servidor"}), 500
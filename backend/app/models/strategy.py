@@ -1,15 +1,21 @@
-import sqlite3
 from datetime import datetime
 from typing import List, Optional, Dict, Any
+from db_connection import get_pool
 
 class StrategyModel:
+    # Database files whose strategies table already exists in this process
+    _initialized = set()
+
     def __init__(self, db_path: str = 'deriv_bot.db'):
         self.db_path = db_path
-        self.init_table()
+        self.pool = get_pool(db_path)
+        if db_path not in self._initialized:
+            self.init_table()
+            self._initialized.add(db_path)
 
     def init_table(self):
         """Initialize the strategies table"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS strategies (
@@ -26,11 +32,10 @@ class StrategyModel:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
-            conn.commit()
 
     def create_strategy(self, strategy_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new strategy"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             
             # Sempre gerar ID automático
@@ -51,9 +56,8 @@ class StrategyModel:
                 strategy_data['martingale_multiplier'],
                 strategy_data.get('is_active', True)
             ))
-            conn.commit()
-            
-            return self.get_strategy(strategy_id)
+        
+        return self.get_strategy(strategy_id)
 
     def _generate_strategy_id(self) -> str:
         """Generate a unique strategy ID"""
@@ -67,7 +71,7 @@ class StrategyModel:
 
     def get_strategy(self, strategy_id: str) -> Optional[Dict[str, Any]]:
         """Get a strategy by ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, strategy_id, name, description, trigger_count, max_entries,
@@ -94,7 +98,7 @@ class StrategyModel:
 
     def get_all_strategies(self) -> List[Dict[str, Any]]:
         """Get all strategies"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, strategy_id, name, description, trigger_count, max_entries,
@@ -121,7 +125,7 @@ class StrategyModel:
 
     def update_strategy(self, strategy_id: str, strategy_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a strategy"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE strategies SET
@@ -139,23 +143,20 @@ class StrategyModel:
                 strategy_data.get('is_active', True),
                 strategy_id
             ))
-            conn.commit()
-            
-            if cursor.rowcount > 0:
-                return self.get_strategy(strategy_id)
-            return None
+            updated = cursor.rowcount > 0
+        
+        return self.get_strategy(strategy_id) if updated else None
 
     def delete_strategy(self, strategy_id: str) -> bool:
         """Delete a strategy"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM strategies WHERE strategy_id = ?', (strategy_id,))
-            conn.commit()
             return cursor.rowcount > 0
 
     def get_active_strategies(self) -> List[Dict[str, Any]]:
         """Get all active strategies"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT strategy_id, name, description, trigger_count, max_entries,
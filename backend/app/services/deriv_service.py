@@ -4,6 +4,7 @@ import asyncio
 import time
 import logging
 from typing import List, Dict, Optional
+from utils.market_catalog import get_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,7 @@ class DerivService:
     def __init__(self):
         self.api = None
         self.active_symbols = []
+        self.market_catalog = get_catalog("full")
         self.tick_subscription = None
         self.subscription_callback = None
         self.latest_ticks = []
@@ -62,55 +64,26 @@ class DerivService:
         return int(time.time())
     
     async def get_active_symbols(self) -> List[Dict]:
-        """Get list of active symbols/markets."""
+        """Get list of active symbols/markets from the market catalog cache."""
         if not self.is_initialized:
             raise Exception("Service not initialized")
         
-        try:
-            # Fetch detailed market information
-            request = {
-                "active_symbols": "full",
-                "product_type": "basic"
-            }
-            response = await self.api.send(request)
-            
-            if "active_symbols" in response:
-                self.active_symbols = response["active_symbols"]
-                # Sort by market and symbol name
-                self.active_symbols.sort(key=lambda x: (x.get("market", ""), x.get("display_name", "")))
-                
-                # Add tick stream availability and process additional info
-                for symbol in self.active_symbols:
-                    market_type = symbol.get("market", "").lower()
-                    symbol_code = symbol.get("symbol", "").lower()
-                    
-                    # Determine if symbol has tick stream
-                    if (market_type in ["forex", "indices", "commodities"] or 
-                        any(prefix in symbol_code for prefix in ["frx", "r_", "wld", "1hZ"])):
-                        symbol["has_tick_stream"] = True
-                    else:
-                        symbol["has_tick_stream"] = False
-                    
-                    # Process additional market information
-                    # Ensure numeric values are properly typed
-                    if "pip" in symbol:
-                        symbol["pip"] = float(symbol["pip"]) if symbol["pip"] else None
-                    if "min_stake" in symbol:
-                        symbol["min_stake"] = float(symbol["min_stake"]) if symbol["min_stake"] else None
-                    if "max_stake" in symbol:
-                        symbol["max_stake"] = float(symbol["max_stake"]) if symbol["max_stake"] else None
-                    if "spot" in symbol:
-                        symbol["spot"] = float(symbol["spot"]) if symbol["spot"] else None
-                
-                logger.info(f"Retrieved {len(self.active_symbols)} active symbols")
-                return self.active_symbols
-            else:
-                logger.warning("No active symbols in response")
-                return self.active_symbols or []
-                
-        except Exception as e:
-            logger.error(f"Error fetching active symbols: {e}")
-            return self.active_symbols or []
+        self.active_symbols = await self.market_catalog.get_markets(self._fetch_active_symbols)
+        logger.info(f"Retrieved {len(self.active_symbols)} active symbols")
+        return self.active_symbols
+    
+    async def _fetch_active_symbols(self, detail: str) -> Optional[List[Dict]]:
+        """Fetch detailed market information from Deriv."""
+        request = {
+            "active_symbols": detail,
+            "product_type": "basic"
+        }
+        response = await self.api.send(request)
+        
+        if "active_symbols" not in response:
+            logger.warning("No active symbols in response")
+            return None
+        return response["active_symbols"]
     
     async def subscribe_to_ticks(self, symbol: str) -> Dict:
         """Subscribe to tick updates for a specific symbol."""
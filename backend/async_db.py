@@ -0,0 +1,73 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List
+from database import Database, db
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """Awaitable access to the database for code on the event loop.
+
+    Blocking calls go through `run`, on a dedicated executor, so disk I/O
+    never stalls tick processing and never competes with the loop's
+    default executor. At most `max_pending` calls are queued or running
+    at once; further callers wait on the loop, without blocking it, until
+    a slot frees.
+
+    Only `run` and the settings reload are covered. Setting reads need no
+    facade: `db.get_setting` is served from the in-memory settings cache
+    and does no I/O. Strategies are only read and written from the Flask
+    request threads, which may block.
+    """
+
+    def __init__(self, database: Database, workers: int = 2, max_pending: int = 64):
+        self.db = database
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._slots = asyncio.Semaphore(max_pending)
+        self.pending = 0
+        self.metrics = {
+            "calls": 0,
+            "failed": 0,
+            "waited": 0,
+            "max_pending": 0
+        }
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """Run a blocking database call on the executor and await its result."""
+        metrics = self.metrics
+        if self._slots.locked():
+            metrics["waited"] += 1
+        async with self._slots:
+            self.pending += 1
+            if self.pending > metrics["max_pending"]:
+                metrics["max_pending"] = self.pending
+            metrics["calls"] += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, functools.partial(function, *args, **kwargs))
+            except Exception:
+                metrics["failed"] += 1
+                raise
+            finally:
+                self.pending -= 1
+
+    async def reload_settings(self) -> List[str]:
+        return await self.run(self.db.reload_settings)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["pending"] = self.pending
+        stats["limit"] = self.max_pending
+        return stats
+
+    def close(self):
+        """Stop accepting work; calls already queued still finish."""
+        self._executor.shutdown(wait=False)
+
+
+# Global async facade over the global database instance
+adb = AsyncDatabase(db)
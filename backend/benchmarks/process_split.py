@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API throughput and tick latency, single process vs. ingest + N API workers
+
+"single" reproduces the current layout: ticks are handled on the event
+loop while request threads in the same process build /api/ticks
+responses, all under one GIL. "split" runs a stand-in ingest process
+(a BusServer publishing synthetic ticks) and N API worker processes
+(RemoteDerivClient mirroring them), each with its own request threads.
+
+Reported per layout: /api/ticks-style responses per second across all
+processes, and the delay from publishing a tick to a worker having it.
+
+Usage: python benchmarks/process_split.py [--workers 1 2 4 8] [--rate 200] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOLS = [f"R_{n}" for n in (10, 25, 50, 75, 100)]
+
+
+def make_tick(n, due):
+    quote = 1000.0 + (n % 997) * 0.01
+    return {"symbol": SYMBOLS[n % len(SYMBOLS)], "epoch": 1700000000 + n, "quote": quote,
+            "bid": quote - 0.1, "ask": quote + 0.1, "pip_size": 2, "sent_at": due}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def request_threads(get_latest_ticks, threads, duration):
+    """Run `threads` threads serializing latest ticks for `duration` seconds; returns requests served."""
+    counts = [0] * threads
+    deadline = time.monotonic() + duration
+
+    def serve(index):
+        n = 0
+        while time.monotonic() < deadline:
+            json.dumps(get_latest_ticks(SYMBOLS[n % len(SYMBOLS)]))
+            n += 1
+        counts[index] = n
+
+    workers = [threading.Thread(target=serve, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts)
+
+
+async def publish_ticks(handle, rate, duration):
+    """Call `handle(tick)` `rate` times per second for `duration` seconds.
+
+    Each tick carries the wall-clock time it was due, so a loop that is
+    starved of the GIL shows up as delay even within one process.
+    """
+    interval = 1.0 / rate
+    started = time.time()
+    n = 0
+    while time.time() - started < duration:
+        handle(make_tick(n, started + n * interval))
+        n += 1
+        await asyncio.sleep(max(0.0, started + n * interval - time.time()))
+
+
+def run_single(args):
+    from utils.deriv_decoder import TickRecord
+    from utils.tick_subscriptions import TickSubscriptionManager
+
+    subscriptions = TickSubscriptionManager()
+    for symbol in SYMBOLS:
+        subscriptions.add(symbol)
+    delays = []
+
+    def handle(tick):
+        delays.append(time.time() - tick["sent_at"])
+        subscriptions.get(tick["symbol"]).add_tick(TickRecord.from_tick(tick))
+
+    def get_latest_ticks(symbol):
+        return {"symbol": symbol, "ticks": subscriptions.get(symbol).latest(100).to_dicts()}
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        requests = loop.run_in_executor(None, request_threads, get_latest_ticks, args.threads, args.duration)
+        await publish_ticks(handle, args.rate, args.duration)
+        return await requests
+
+    served = asyncio.run(run())
+    return served, delays
+
+
+def worker_process(bus_path, threads, duration, results, ready):
+    from utils.remote_deriv_client import RemoteDerivClient
+
+    class MeasuredClient(RemoteDerivClient):
+        delays = []
+
+        def _on_tick(self, data):
+            self.delays.append(time.time() - data["sent_at"])
+            super()._on_tick(data)
+
+    async def run():
+        client = MeasuredClient(bus_path)
+        client.set_main_loop(asyncio.get_running_loop())
+        await client.connect()
+        while len(client.subscriptions) < len(SYMBOLS):
+            await asyncio.sleep(0.01)
+        ready.set()
+        served = await asyncio.get_running_loop().run_in_executor(
+            None, request_threads, client.get_latest_ticks, threads, duration)
+        await client.close()
+        results.put((served, client.delays))
+
+    asyncio.run(run())
+
+
+def run_split(args, workers):
+    from utils.tick_bus import BusServer
+
+    bus_path = os.path.join(tempfile.mkdtemp(prefix="bus_bench_"), "bus.sock")
+    status = {"subscriptions": [{"symbol": symbol} for symbol in SYMBOLS], "is_connected": True,
+              "current_symbol": SYMBOLS[0], "max_ticks_display": 100}
+    bus = BusServer(bus_path, handlers={
+        "status": lambda: status,
+        "buffered_ticks": lambda symbol: {"symbol": symbol, "pip_size": 2, "ticks": []}
+    })
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    readies = [context.Event() for _ in range(workers)]
+
+    async def run():
+        await bus.start()
+        processes = [context.Process(target=worker_process,
+                                     args=(bus_path, args.threads, args.duration, results, ready))
+                     for ready in readies]
+        for process in processes:
+            process.start()
+        loop = asyncio.get_running_loop()
+        for ready in readies:
+            await loop.run_in_executor(None, ready.wait)
+        await publish_ticks(lambda tick: bus.publish("tick", tick), args.rate, args.duration)
+        collected = [await loop.run_in_executor(None, results.get) for _ in processes]
+        for process in processes:
+            process.join()
+        await bus.close()
+        return collected
+
+    collected = asyncio.run(run())
+    served = sum(count for count, _ in collected)
+    delays = [delay for _, worker_delays in collected for delay in worker_delays]
+    return served, delays
+
+
+def report(name, served, delays, duration):
+    print(f"{name:<20} {served / duration:>12,.0f} req/s   tick delay p50 {percentile(delays, 50) * 1000:>7.2f} ms"
+          f"  p99 {percentile(delays, 99) * 1000:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=4, help="request threads per process")
+    parser.add_argument("--rate", type=int, default=200, help="ticks per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # The settings database is created in the working directory on import
+    os.chdir(tempfile.mkdtemp(prefix="process_split_bench_"))
+    print(f"📊 {args.rate} ticks/s over {len(SYMBOLS)} symbols, {args.threads} request threads per process, "
+          f"{os.cpu_count()} CPU(s)")
+
+    report("single process", *run_single(args), args.duration)
+    for workers in args.workers:
+        report(f"ingest + {workers} worker(s)", *run_split(args, workers), args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark: settings and strategy CRUD throughput, before and after pooling
+
+"before" reproduces the original access pattern: a fresh sqlite3.connect()
+per call, rollback journal, default pragmas and uncached setting reads.
+"after" runs the real Database and StrategyModel on the shared
+ConnectionPool (persistent connections, WAL, cached statements).
+
+Everything runs against throwaway database files in a temporary directory.
+
+Usage: python benchmarks/sqlite_pool.py [--operations 2000] [--threads 4]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STRATEGY = {
+    'name': 'bench',
+    'description': 'benchmark strategy',
+    'trigger_count': 3,
+    'max_entries': 5,
+    'base_amount': 1.0,
+    'martingale_multiplier': 2.0,
+    'is_active': True
+}
+
+
+class LegacyStore:
+    """The original connect-per-call implementation of the operations benchmarked."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS user_settings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT UNIQUE NOT NULL,
+                    value TEXT NOT NULL,
+                    description TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS strategies (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    strategy_id TEXT UNIQUE NOT NULL,
+                    name TEXT,
+                    description TEXT,
+                    trigger_count INTEGER NOT NULL,
+                    max_entries INTEGER NOT NULL,
+                    base_amount REAL NOT NULL,
+                    martingale_multiplier REAL NOT NULL,
+                    is_active BOOLEAN NOT NULL DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute("INSERT OR IGNORE INTO user_settings (key, value) VALUES ('max_ticks_display', '100')")
+
+    def get_setting(self, key):
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute('SELECT value FROM user_settings WHERE key = ?', (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_setting(self, key, value):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('UPDATE user_settings SET value = ?, updated_at = CURRENT_TIMESTAMP WHERE key = ?',
+                         (value, key))
+            conn.commit()
+
+    def create_strategy(self, strategy_id):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO strategies (strategy_id, name, description, trigger_count, max_entries,
+                                        base_amount, martingale_multiplier, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (strategy_id, STRATEGY['name'], STRATEGY['description'], STRATEGY['trigger_count'],
+                  STRATEGY['max_entries'], STRATEGY['base_amount'], STRATEGY['martingale_multiplier'], True))
+            conn.commit()
+        return self.get_strategy(strategy_id)
+
+    def get_strategy(self, strategy_id):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute('SELECT * FROM strategies WHERE strategy_id = ?', (strategy_id,)).fetchone()
+
+    def update_strategy(self, strategy_id):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('UPDATE strategies SET max_entries = ?, updated_at = CURRENT_TIMESTAMP '
+                         'WHERE strategy_id = ?', (6, strategy_id))
+            conn.commit()
+        return self.get_strategy(strategy_id)
+
+    def delete_strategy(self, strategy_id):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('DELETE FROM strategies WHERE strategy_id = ?', (strategy_id,))
+            conn.commit()
+
+
+def legacy_strategy_cycle(store):
+    strategy_id = f"legacy_{time.perf_counter_ns()}"
+    store.create_strategy(strategy_id)
+    store.get_strategy(strategy_id)
+    store.update_strategy(strategy_id)
+    store.delete_strategy(strategy_id)
+
+
+def pooled_strategy_cycle(model):
+    strategy_id = model.create_strategy(STRATEGY)['strategy_id']
+    model.get_strategy(strategy_id)
+    model.update_strategy(strategy_id, dict(STRATEGY, max_entries=6))
+    model.delete_strategy(strategy_id)
+
+
+def measure(name, function, operations, threads=1):
+    """Run `function` `operations` times spread over `threads` threads; returns ops/s."""
+    per_thread = operations // threads
+
+    def worker():
+        for _ in range(per_thread):
+            function()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    rate = per_thread * threads / elapsed
+    print(f"{name:<40} {rate:>12,.0f} ops/s  ({elapsed * 1000:.1f} ms)")
+    return rate
+
+
+def compare(label, before, after, operations, threads=1):
+    baseline = measure(f"{label} (before)", before, operations, threads)
+    rate = measure(f"{label} (after)", after, operations, threads)
+    print(f"{'':<40} {rate / baseline:>12.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sqlite_bench_")
+    # The models create their default database in the working directory on import
+    os.chdir(workdir)
+    from database import Database
+    from app.models.strategy import StrategyModel
+
+    legacy = LegacyStore(os.path.join(workdir, "legacy.db"))
+    pooled_path = os.path.join(workdir, "pooled.db")
+    db = Database(pooled_path)
+    model = StrategyModel(pooled_path)
+    ops = args.operations
+    print(f"📊 {ops:,} operations per case, databases in {workdir}")
+
+    compare("settings get", lambda: legacy.get_setting('max_ticks_display'),
+            lambda: db.get_setting('max_ticks_display'), ops)
+    compare("settings set", lambda: legacy.set_setting('max_ticks_display', '100'),
+            lambda: db.set_setting('max_ticks_display', '100'), ops)
+    # Each cycle is create + get + update + delete
+    compare("strategy CRUD cycle", lambda: legacy_strategy_cycle(legacy),
+            lambda: pooled_strategy_cycle(model), ops // 4)
+    compare(f"strategy CRUD cycle, {args.threads} threads", lambda: legacy_strategy_cycle(legacy),
+            lambda: pooled_strategy_cycle(model), ops // 4, args.threads)
+    compare(f"strategy read, {args.threads} threads", lambda: legacy.get_strategy('missing'),
+            lambda: model.get_strategy('missing'), ops, args.threads)
+
+
+if __name__ == "__main__":
+    main()
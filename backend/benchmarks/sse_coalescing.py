@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SSE frames and bytes per client with per-symbol coalescing
+
+Publishes tick deltas for many symbols through SSEBroadcaster, built by
+TickSubscription as the Deriv client does, and reads one stream the way
+a browser would (JSON.parse per frame). Compares no frame limit with
+several max_fps values, then a client on a slow connection (each frame
+takes `--slow-ms` to write) to show its rate backing off. Every run
+checks that the client ends on the latest seq of every symbol with no gaps.
+
+Usage: python benchmarks/sse_coalescing.py [--symbols 20] [--rate 10] [--duration 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.deriv_decoder import TickRecord
+from utils.sse_broadcaster import SSEBroadcaster
+from utils.tick_subscriptions import TickSubscription
+
+
+def run(symbols, rate, duration, max_fps, slow=0.0):
+    broadcaster = SSEBroadcaster(max_fps=max_fps)
+    subscriptions = [TickSubscription(f"R_{n}") for n in range(symbols)]
+    result = {"frames": 0, "bytes": 0, "parse": 0.0, "gaps": 0}
+    seqs = {}
+
+    def initial_messages():
+        return [{"type": "tick_update", "data": dict(s.snapshot(100), max_ticks=100), "timestamp": time.time()}
+                for s in subscriptions]
+
+    def reader():
+        for event in broadcaster.stream(initial_messages):
+            if b"data: " not in event:
+                continue
+            result["frames"] += 1
+            result["bytes"] += len(event)
+            started = time.perf_counter()
+            message = json.loads(event.split(b"data: ", 1)[1])
+            result["parse"] += time.perf_counter() - started
+            data = message["data"]
+            if message["type"] == "tick_delta":
+                added = len(data["ticks"]) if "ticks" in data else 1
+                if data["seq"] - added != seqs[data["symbol"]]:
+                    result["gaps"] += 1
+            seqs[data["symbol"]] = data["seq"]
+            if slow:
+                time.sleep(slow)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    while not len(broadcaster):
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+    interval = 1.0 / (rate * symbols)
+    started = time.monotonic()
+    n = 0
+    while time.monotonic() - started < duration:
+        subscription = subscriptions[n % symbols]
+        quote = 1000.0 + (n % 997) * 0.01
+        subscription.add_tick(TickRecord.from_tick({"symbol": subscription.symbol, "epoch": 1700000000 + n,
+                                                    "quote": quote, "bid": quote, "ask": quote, "pip_size": 2}))
+        broadcaster.publish({"type": "tick_delta", "data": subscription.delta(), "timestamp": time.time()})
+        n += 1
+        time.sleep(max(0.0, started + n * interval - time.monotonic()))
+
+    # Let the last frame go out before checking the client caught up
+    time.sleep(2.5 / broadcaster.min_fps if max_fps else 0.2)
+    client_stats = broadcaster.stats()["clients"][0]
+    broadcaster.close()
+    thread.join(timeout=5)
+    result["latest"] = all(seqs.get(s.symbol) == s.seq for s in subscriptions)
+    result["fps"] = client_stats["fps"]
+    result["flushes"] = client_stats["flushes"]
+    result["published"] = n
+    return result
+
+
+def report(name, result, duration):
+    print(f"{name:<22} {result['flushes'] / duration:>6,.0f} flushes/s {result['frames'] / duration:>6,.0f} frames/s "
+          f"{result['bytes'] / duration / 1024:>7,.1f} KiB/s {result['parse'] / duration * 1000:>6.2f} ms/s parsing  "
+          f"fps {result['fps']:>5}  "
+          f"gaps {result['gaps']}  latest {'yes' if result['latest'] else 'NO'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=10, help="ticks per second per symbol")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, nargs="+", default=[10, 4, 1])
+    parser.add_argument("--slow-ms", type=float, default=30, help="write time per frame of the slow client")
+    args = parser.parse_args()
+
+    print(f"📊 {args.symbols} symbols x {args.rate:g} ticks/s = {args.symbols * args.rate:g} deltas/s, "
+          f"{args.duration:g}s per run")
+    report("no limit", run(args.symbols, args.rate, args.duration, 0), args.duration)
+    for fps in args.fps:
+        report(f"max_fps {fps:g}", run(args.symbols, args.rate, args.duration, fps), args.duration)
+    fps = max(args.fps)
+    report(f"max_fps {fps:g}, slow client", run(args.symbols, args.rate, args.duration, fps, args.slow_ms / 1000),
+           args.duration)
+
+
+if __name__ == "__main__":
+    main()
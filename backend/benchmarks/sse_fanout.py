@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SSE fan-out to many concurrent clients
+
+Each client is a thread consuming a stream the way the Flask response
+does. The old layout (one global list popped by every generator in a
+100 ms sleep loop) is compared with SSEBroadcaster (a queue per client
+woken by an event). Reported: the share of published updates each
+client received, delivery latency, and how often idle client threads
+wake up.
+
+Usage: python benchmarks/sse_fanout.py [--clients 100 250] [--rate 20] [--duration 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sse_broadcaster import SSEBroadcaster
+
+
+class LegacyBroadcaster:
+    """The global message_queue that main.py used to share between generators."""
+
+    def __init__(self):
+        self.connected_clients = set()
+        self.message_queue = []
+        self.running = True
+        self.wakeups = 0
+
+    def __len__(self):
+        return len(self.connected_clients)
+
+    def publish(self, message, trace=None):
+        if self.connected_clients:
+            self.message_queue.append(message)
+
+    def stream(self, initial_messages=None):
+        client_id = object()
+        self.connected_clients.add(client_id)
+        try:
+            for message in initial_messages() if initial_messages else ():
+                yield f"data: {json.dumps(message)}\n\n".encode()
+            while self.running:
+                self.wakeups += 1
+                if self.message_queue:
+                    try:
+                        message = self.message_queue.pop(0)
+                    except IndexError:
+                        continue
+                    yield f"data: {json.dumps(message)}\n\n".encode()
+                time.sleep(0.1)
+        finally:
+            self.connected_clients.discard(client_id)
+
+    def close(self):
+        self.running = False
+
+
+def make_update(n):
+    # Not a tick type, so the per-client broadcaster delivers every one instead of merging them
+    ticks = [{"symbol": "R_100", "quote": 1000.0 + i * 0.01, "epoch": 1700000000 + n - i} for i in range(100)]
+    return {"type": "test", "data": {"symbol": "R_100", "ticks": ticks}, "timestamp": time.time()}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run(broadcaster, clients, rate, duration, idle):
+    """Connect `clients` readers, publish for `duration` seconds, then idle; returns per-client counts and latencies."""
+    received = [0] * clients
+    latencies = []
+
+    def reader(index):
+        for event in broadcaster.stream(lambda: [{"type": "connected"}]):
+            if b"data: " not in event:
+                continue
+            message = json.loads(event.split(b"data: ", 1)[1])
+            if message["type"] == "test":
+                received[index] += 1
+                latencies.append(time.time() - message["timestamp"])
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    while len(broadcaster) < clients:
+        time.sleep(0.01)
+
+    published = 0
+    started = time.monotonic()
+    while time.monotonic() - started < duration:
+        broadcaster.publish(make_update(published))
+        published += 1
+        time.sleep(max(0.0, started + published / rate - time.monotonic()))
+
+    # Let queues drain, then count idle wakeups
+    time.sleep(0.5)
+    wakeups_before = getattr(broadcaster, "wakeups", 0)
+    time.sleep(idle)
+    idle_wakeups = (getattr(broadcaster, "wakeups", 0) - wakeups_before) / idle
+
+    broadcaster.close()
+    for thread in threads:
+        thread.join(timeout=2)
+    return published, received, latencies, idle_wakeups
+
+
+def report(name, published, received, latencies, idle_wakeups):
+    complete = sum(1 for count in received if count == published)
+    share = sum(received) / (published * len(received)) * 100
+    print(f"{name:<16} {share:>6.1f}% delivered  {complete:>4}/{len(received)} clients complete  "
+          f"p50 {percentile(latencies, 50) * 1000:>7.2f} ms  p99 {percentile(latencies, 99) * 1000:>7.2f} ms  "
+          f"idle wakeups {idle_wakeups:>6.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 250])
+    parser.add_argument("--rate", type=float, default=20, help="updates published per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--idle", type=float, default=2.0, help="idle seconds sampled for wakeups")
+    args = parser.parse_args()
+
+    for clients in args.clients:
+        print(f"📊 {clients} clients, {args.rate:g} updates/s for {args.duration:g}s")
+        report("global queue", *run(LegacyBroadcaster(), clients, args.rate, args.duration, args.idle))
+        report("per-client", *run(SSEBroadcaster(max_fps=0), clients, args.rate, args.duration, args.idle))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU spent serializing SSE frames and /api/ticks responses
+
+Publishes tick deltas for several symbols through SSEBroadcaster to many
+client threads, which read their streams like the Flask response does,
+while other requests poll /api/ticks-style snapshots of the dashboard
+symbol. "per client" encodes every frame for every client and every poll
+from scratch, as the server used to; "serialize once" shares each
+message's and each tick's bytes between clients and serves polls from
+SnapshotCache. Reported for the same load: CPU time spent producing
+frames and poll responses, and the whole process's CPU time, which also
+counts publishing and waking the client threads.
+
+Usage: python benchmarks/sse_serialize.py [--clients 50] [--symbols 10] [--rate 10] [--polls 50] [--duration 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.deriv_decoder import TickRecord, get_decoder
+from utils.snapshot_cache import SnapshotCache
+from utils.sse_broadcaster import SSEBroadcaster
+from utils.tick_subscriptions import TickSubscription
+
+MAX_TICKS = 100
+
+
+class TimedBroadcaster(SSEBroadcaster):
+    """Records the CPU time of each frame's encoding; with `dumps`, encodes each frame for each client."""
+
+    def __init__(self, dumps=None, **kwargs):
+        super().__init__(**kwargs)
+        self.dumps = dumps
+        self.times = []
+
+    def _encode(self, update):
+        started = time.thread_time()
+        body = self.dumps(update.as_message()).encode() if self.dumps else super()._encode(update)
+        self.times.append(time.thread_time() - started)
+        return body
+
+
+def run(clients, symbols, rate, polls, duration, max_fps, dumps=None):
+    subscriptions = {f"R_{n}": TickSubscription(f"R_{n}") for n in range(symbols)}
+    names = list(subscriptions)
+
+    def get_latest_ticks(symbol):
+        return dict(subscriptions[symbol].snapshot(MAX_TICKS), connection_status="connected", max_ticks=MAX_TICKS)
+
+    def snapshot_version(symbol):
+        subscription = subscriptions[symbol]
+        return (symbol, subscription.ticks, subscription.seq, subscription.last_tick_time, subscription.is_available())
+
+    broadcaster = TimedBroadcaster(dumps, max_fps=max_fps)
+    if dumps:
+        poll = lambda symbol: dumps(get_latest_ticks(symbol)).encode()
+    else:
+        cache = SnapshotCache(get_latest_ticks, snapshot_version)
+        poll = lambda symbol: cache.get(symbol).body
+    received = [0] * clients
+
+    def reader(index):
+        for event in broadcaster.stream(lambda: [{"type": "connected"}]):
+            received[index] += len(event)
+
+    def poller(stop):
+        n = 0
+        started = time.monotonic()
+        while not stop.is_set():
+            poll_started = time.thread_time()
+            received.append(len(poll(names[0])))
+            broadcaster.times.append(time.thread_time() - poll_started)
+            n += 1
+            time.sleep(max(0.0, started + n / polls - time.monotonic()))
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    while len(broadcaster) < clients:
+        time.sleep(0.01)
+
+    stop = threading.Event()
+    polling = threading.Thread(target=poller, args=(stop,), daemon=True)
+    cpu_started = time.process_time()
+    started = time.monotonic()
+    if polls:
+        polling.start()
+    interval = 1.0 / (rate * symbols)
+    n = 0
+    while time.monotonic() - started < duration:
+        subscription = subscriptions[names[n % symbols]]
+        quote = 1000.0 + (n % 997) * 0.01
+        subscription.add_tick(TickRecord.from_tick({"symbol": subscription.symbol, "epoch": 1700000000 + n,
+                                                    "quote": quote, "bid": quote, "ask": quote, "pip_size": 2}))
+        broadcaster.publish({"type": "tick_delta", "data": dict(subscription.delta(), connection_status="connected"),
+                             "timestamp": time.time()})
+        n += 1
+        time.sleep(max(0.0, started + n * interval - time.monotonic()))
+    stop.set()
+    if polls:
+        polling.join()
+    # Let the last frames go out
+    time.sleep(2.5 / max_fps if max_fps else 0.2)
+    elapsed = time.monotonic() - started
+    cpu = time.process_time() - cpu_started
+
+    broadcaster.close()
+    for thread in threads:
+        thread.join(timeout=2)
+    return {"cpu": cpu / elapsed, "encode": sum(broadcaster.times) / elapsed, "bytes": sum(received) / elapsed}
+
+
+def report(name, result, baselines=()):
+    line = (f"{name:<24} {result['encode'] * 1000:>6.1f} ms/s encoding  {result['cpu'] * 100:>5.1f}% process CPU  "
+            f"{result['bytes'] / 1024 / 1024:>5.2f} MiB/s out")
+    for baseline_name, baseline in baselines:
+        line += (f"  vs {baseline_name}: encoding {(result['encode'] / baseline['encode'] - 1) * 100:+.0f}%, "
+                 f"process {(result['cpu'] / baseline['cpu'] - 1) * 100:+.0f}%")
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=10, help="ticks per second per symbol")
+    parser.add_argument("--polls", type=float, default=50, help="/api/ticks requests per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, nargs="+", default=[0, 4], help="max_fps per run (0 = no limit)")
+    args = parser.parse_args()
+
+    decoder = get_decoder()
+    for fps in args.fps:
+        print(f"📊 {args.clients} clients, {args.symbols} symbols x {args.rate:g} ticks/s, {args.polls:g} polls/s, "
+              f"max_fps {fps:g}, {args.duration:g}s")
+        run_args = (args.clients, args.symbols, args.rate, args.polls, args.duration, fps)
+        baselines = []
+        for name, dumps in {"json": json.dumps, decoder.name: decoder.dumps}.items():
+            baselines.append((name, run(*run_args, dumps=dumps)))
+            report(f"per client ({name})", baselines[-1][1])
+        report(f"serialize once ({decoder.name})", run(*run_args), baselines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scanning a time range from SQLite rows vs. the columnar archive
+
+Fills a tick store with one symbol over several days, archives it, then
+reads the same range back as dicts from SQLite (TickStore.get_ticks) and
+as columns from the memory-mapped day files (TickArchive.export).
+
+Usage: python benchmarks/tick_archive.py [--days 7] [--ticks-per-day 86400]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure(name, function, repeat=3):
+    """Best of `repeat` runs; returns (seconds, result)."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<32} {best * 1000:>10.1f} ms")
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--ticks-per-day", type=int, default=86400)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tick_archive_bench_")
+    # The settings database is created in the working directory on import
+    os.chdir(workdir)
+    from utils.tick_archive import TickArchive, np
+    from utils.tick_store import TickStore
+
+    store = TickStore(os.path.join(workdir, "ticks.db"), max_buffer=args.ticks_per_day)
+    start = 1700006400
+    step = 86400 // args.ticks_per_day or 1
+    for day in range(args.days):
+        for i in range(args.ticks_per_day):
+            epoch = start + day * 86400 + i * step
+            store.add("R_100", epoch, 1000.0 + (i % 997) * 0.01)
+        asyncio.run(store.flush())
+    total = args.days * args.ticks_per_day
+    print(f"📊 {total:,} ticks over {args.days} day(s), numpy {'installed' if np else 'not installed'}")
+
+    archive = TickArchive(os.path.join(workdir, "tick_archive"))
+    measure("archive from SQLite", lambda: archive.archive_from_store(store), repeat=1)
+
+    end = start + args.days * 86400 - 1
+    sqlite_time, rows = measure("SQLite range -> dicts", lambda: store.get_ticks("R_100", start, end))
+    archive_time, (epochs, quotes) = measure("archive range -> columns", lambda: archive.export("R_100", start, end))
+    assert len(rows) == len(epochs) == total
+    print(f"{'':<32} {sqlite_time / archive_time:>10.1f}x faster")
+
+    middle = start + args.days * 86400 // 2
+    measure("archive 1h window", lambda: archive.export("R_100", middle, middle + 3600), repeat=20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: messages/sec of the tick decode path
+
+Compares the original path (json.loads, msg_type if/elif chain, dict
+mutations in _handle_tick, list append + re-slice) with the decoder
+layer (msg_type peek, orjson when installed, TickRecord, ring buffer).
+
+Usage: python benchmarks/tick_decoder.py [--messages 200000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.deriv_decoder import get_decoder, peek_msg_type, orjson
+from utils.tick_buffer import TickRingBuffer
+
+
+def make_frames(count):
+    """Realistic Deriv tick frames for one subscription, compact like the server sends them."""
+    frames = []
+    for i in range(count):
+        epoch = 1700000000 + i
+        frames.append(json.dumps({
+            "echo_req": {"req_id": 7, "subscribe": 1, "ticks": "R_100"},
+            "msg_type": "tick",
+            "req_id": 7,
+            "subscription": {"id": "b2a1b6a2-59e1-3f4c-7f06-1c2c43f1f6ae"},
+            "tick": {
+                "ask": 1234.56 + i % 100,
+                "bid": 1234.36 + i % 100,
+                "epoch": epoch,
+                "id": "b2a1b6a2-59e1-3f4c-7f06-1c2c43f1f6ae",
+                "pip_size": 2,
+                "quote": 1234.46 + i % 100,
+                "symbol": "R_100"
+            }
+        }, separators=(",", ":")))
+    return frames
+
+
+def legacy_path(frames, max_ticks=1000):
+    latest_ticks = []
+    current_symbol = "R_100"
+    for message in frames:
+        data = json.loads(message)
+        msg_type = data.get("msg_type")
+        if msg_type == "tick":
+            tick_data = data.get("tick", {})
+            if "epoch" in tick_data:
+                tick_data["timestamp"] = int(tick_data["epoch"])
+            if "bid" not in tick_data:
+                tick_data["bid"] = tick_data["quote"]
+            if "ask" not in tick_data:
+                tick_data["ask"] = tick_data["quote"]
+            if "symbol" not in tick_data:
+                tick_data["symbol"] = current_symbol
+            tick_data["is_subscribed_symbol"] = tick_data.get("symbol") == current_symbol
+            latest_ticks.append(tick_data)
+            if len(latest_ticks) > max_ticks:
+                latest_ticks = latest_ticks[-max_ticks:]
+        elif msg_type == "active_symbols":
+            pass
+    return len(latest_ticks)
+
+
+def decoder_path(frames, decoder, max_ticks=1000):
+    buffer = TickRingBuffer(max_ticks, "R_100")
+    for message in frames:
+        if peek_msg_type(message) == "tick":
+            tick = decoder.decode_tick(message)
+            buffer.append(tick.epoch, tick.quote, tick.bid, tick.ask)
+        else:
+            decoder.decode(message)
+    return len(buffer)
+
+
+def measure(name, function, *args, repeat=3):
+    frames = args[0]
+    best = min(_timed(function, *args) for _ in range(repeat))
+    rate = len(frames) / best
+    print(f"{name:<28} {rate:>12,.0f} msg/s  ({best * 1000:.1f} ms)")
+    return rate
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    frames = make_frames(args.messages)
+    print(f"📊 {args.messages:,} tick frames, orjson {'available' if orjson else 'not installed'}")
+
+    baseline = measure("legacy (json + dict)", legacy_path, frames)
+    rate = measure("decoder (json)", decoder_path, frames, get_decoder("json"))
+    print(f"{'':<28} {rate / baseline:>12.2f}x")
+    if orjson:
+        rate = measure("decoder (orjson)", decoder_path, frames, get_decoder("orjson"))
+        print(f"{'':<28} {rate / baseline:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SSE bytes per second, full snapshots vs. snapshot + deltas
+
+Replays a busy symbol through a TickSubscription and frames every update
+the way broadcast_tick_update and the SSE stream do. "snapshot per tick"
+is the old stream (the last max_ticks_display ticks on every tick);
+"deltas" sends one snapshot and then only the new tick with its seq.
+
+Usage: python benchmarks/tick_deltas.py [--rate 10] [--display 100] [--ticks 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.deriv_decoder import TickRecord
+from utils.tick_subscriptions import TickSubscription
+
+
+def frame(update_type, data):
+    message = {'type': update_type, 'data': data, 'timestamp': time.time()}
+    return len(f"data: {json.dumps(message)}\n\n".encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10, help="ticks per second on the symbol")
+    parser.add_argument("--display", type=int, default=100, help="max_ticks_display")
+    parser.add_argument("--ticks", type=int, default=2000)
+    args = parser.parse_args()
+
+    subscription = TickSubscription("1HZ100V")
+    snapshot_bytes = delta_bytes = 0
+    for n in range(args.ticks):
+        quote = 1000.0 + (n % 997) * 0.01
+        subscription.add_tick(TickRecord.from_tick({"symbol": "1HZ100V", "epoch": 1700000000 + n, "quote": quote,
+                                                    "bid": quote - 0.1, "ask": quote + 0.1, "pip_size": 2}))
+        snapshot = subscription.snapshot(args.display, is_subscribed_symbol=True)
+        snapshot.update(connection_status="connected", max_ticks=args.display)
+        snapshot_bytes += frame("tick_update", snapshot)
+        if n == 0:
+            delta_bytes += frame("tick_update", snapshot)
+        else:
+            delta = subscription.delta(is_subscribed_symbol=True)
+            delta["connection_status"] = "connected"
+            delta_bytes += frame("tick_delta", delta)
+
+    print(f"📊 {args.ticks:,} ticks, {args.display} displayed, {args.rate:g} ticks/s per client")
+    for name, total in (("snapshot per tick", snapshot_bytes), ("snapshot + deltas", delta_bytes)):
+        per_tick = total / args.ticks
+        print(f"{name:<20} {per_tick:>10,.0f} B/tick {per_tick * args.rate / 1024:>10,.1f} KiB/s")
+    print(f"{'saved':<20} {(snapshot_bytes - delta_bytes) / args.ticks * args.rate / 1024:>27,.1f} KiB/s "
+          f"({snapshot_bytes / delta_bytes:.0f}x less)")
+
+
+if __name__ == "__main__":
+    main()
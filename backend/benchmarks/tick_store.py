@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tick store write throughput and range query latency
+
+Compares one INSERT + commit per tick (what writing from _handle_tick
+directly would cost) with the TickStore path: a buffered add() on the
+tick path and executemany batches on flush. Then times range queries
+for one symbol out of many.
+
+Usage: python benchmarks/tick_store.py [--symbols 50] [--ticks 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_ticks(symbols, ticks):
+    """Interleaved ticks, one per symbol per second, like live streams."""
+    rows = []
+    for i in range(ticks):
+        for s in range(symbols):
+            quote = 1000.0 + (i % 97) * 0.01
+            rows.append((f"SYM_{s}", 1700000000 + i, quote, quote - 0.1, quote + 0.1))
+    return rows
+
+
+def per_tick_commits(store, rows):
+    for row in rows:
+        with store.pool.transaction() as conn:
+            conn.execute('INSERT OR IGNORE INTO ticks (symbol, epoch, quote, bid, ask) VALUES (?, ?, ?, ?, ?)', row)
+
+
+def batched(store, rows):
+    """add() every tick, flushing whenever a batch is full, as the flusher does."""
+    add_time = 0.0
+    for row in rows:
+        started = time.perf_counter()
+        store.add(*row)
+        add_time += time.perf_counter() - started
+        if len(store._buffer) >= store.batch_size:
+            asyncio.run(store.flush())
+    asyncio.run(store.flush())
+    return add_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=2000, help="ticks per symbol")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tick_store_bench_")
+    # The settings database is created in the working directory on import
+    os.chdir(workdir)
+    from utils.tick_store import TickStore
+
+    rows = make_ticks(args.symbols, args.ticks)
+    print(f"📊 {len(rows):,} ticks across {args.symbols} symbols, databases in {workdir}")
+
+    # Per-tick commits are slow; a slice is enough for a rate
+    sample = rows[:min(len(rows), 5000)]
+    store = TickStore(os.path.join(workdir, "per_tick.db"))
+    started = time.perf_counter()
+    per_tick_commits(store, sample)
+    baseline = len(sample) / (time.perf_counter() - started)
+    print(f"{'insert + commit per tick':<32} {baseline:>12,.0f} ticks/s")
+
+    store = TickStore(os.path.join(workdir, "batched.db"), batch_size=args.batch_size, max_buffer=len(rows))
+    started = time.perf_counter()
+    add_time = batched(store, rows)
+    rate = len(rows) / (time.perf_counter() - started)
+    print(f"{'buffered add + executemany':<32} {rate:>12,.0f} ticks/s  ({rate / baseline:.1f}x)")
+    print(f"{'add() on the tick path':<32} {add_time / len(rows) * 1e6:>12.2f} µs/tick")
+    print(f"{'flush per batch':<32} {store.flush_times.summary()['p50_ms']:>12.2f} ms (p50)")
+
+    middle = 1700000000 + args.ticks // 2
+    for span in (60, 600, 3600):
+        queries = 200
+        started = time.perf_counter()
+        for i in range(queries):
+            found = store.get_ticks(f"SYM_{i % args.symbols}", middle - span // 2, middle + span // 2)
+        elapsed = (time.perf_counter() - started) / queries
+        print(f"{f'range query, {span}s window':<32} {elapsed * 1000:>12.3f} ms  ({len(found)} ticks)")
+
+
+if __name__ == "__main__":
+    main()
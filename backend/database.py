@@ -1,15 +1,32 @@
-import sqlite3
 import os
-from typing import Dict, Any, Optional
+import logging
+import threading
+import weakref
+from typing import Dict, Any, Optional, Callable, List
+from db_connection import get_pool
+
+logger = logging.getLogger(__name__)
 
 class Database:
+    """SQLite-backed settings store.
+    
+    Settings are cached in memory: reads never touch SQLite, and
+    set_setting/delete_setting write through to the database, update the
+    cache and notify subscribers of the changed key.
+    """
+    
     def __init__(self, db_path: str = "deriv_bot.db"):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self._settings: Dict[str, str] = {}
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._lock = threading.RLock()
         self.init_database()
+        self.reload_settings()
     
     def init_database(self):
         """Initialize the database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             
             # Create settings table
@@ -43,6 +60,17 @@ class Database:
                 ('deriv_app_id', '67203', 'ID da aplicação Deriv'),
                 ('deriv_api_token', 'zROkbTwuOHdTIIw', 'Token da API Deriv'),
                 ('deriv_api_token_real', 'av7RmoC7wwtUFNT', 'Token real da API Deriv'),
+                ('deriv_stream_connections', '2', 'Número de conexões WebSocket dedicadas a streams de ticks'),
+                ('deriv_stream_policy', 'least_loaded', 'Distribuição de símbolos entre conexões (hash/least_loaded)'),
+                ('deriv_ingest_queue_size', '1000', 'Tamanho máximo da fila de mensagens recebidas por conexão'),
+                ('deriv_ingest_policy', 'block', 'Política quando a fila está cheia (block/drop_oldest/coalesce)'),
+                ('deriv_ping_interval', '10', 'Intervalo em segundos entre pings de latência'),
+                ('deriv_latency_spike_ms', '2000', 'Latência de ping (ms) que, repetida, força reconexão'),
+                ('tick_tracing_enabled', 'true', 'Medir a latência de cada etapa do processamento de ticks'),
+                ('market_catalog_ttl', '3600', 'Tempo em segundos até atualizar a lista de mercados em cache'),
+                ('tick_store_enabled', 'true', 'Gravar o histórico de ticks em disco (ticks.db)'),
+                ('shared_ticks_enabled', 'true', 'Publicar ticks em memória compartilhada para outros processos'),
+                ('sse_max_fps', '4', 'Máximo de atualizações por segundo enviadas a cada navegador (0 = sem limite)'),
                 
                 # Market settings
                 ('default_market', 'R_100', 'Ativo selecionado por padrão no dashboard')
@@ -53,20 +81,62 @@ class Database:
                     INSERT OR IGNORE INTO user_settings (key, value, description)
                     VALUES (?, ?, ?)
                 ''', (key, value, description))
-            
-            conn.commit()
     
-    def get_setting(self, key: str) -> Optional[str]:
-        """Get a setting value by key."""
-        with sqlite3.connect(self.db_path) as conn:
+    def reload_settings(self) -> List[str]:
+        """Refill the settings cache from SQLite, e.g. after another process changed it.
+        
+        Returns the keys whose value changed.
+        """
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT value FROM user_settings WHERE key = ?', (key,))
-            result = cursor.fetchone()
-            return result[0] if result else None
+            cursor.execute('SELECT key, value FROM user_settings')
+            settings = dict(cursor.fetchall())
+        
+        with self._lock:
+            previous, self._settings = self._settings, settings
+        changed = [key for key in set(previous) | set(settings) if previous.get(key) != settings.get(key)]
+        for key in changed:
+            self._notify(key, settings.get(key))
+        return changed
+    
+    def get_setting(self, key: str) -> Optional[str]:
+        """Get a setting value by key, from the in-memory cache."""
+        return self._settings.get(key)
+    
+    def subscribe(self, key: str, callback: Callable[[str, Optional[str]], None]):
+        """Call `callback(key, value)` whenever a setting changes; value is None once deleted.
+        
+        Subscribing to "*" reports changes to every key.
+        
+        Bound methods are held weakly so subscribing does not keep their
+        object alive. Callbacks run on the thread that made the change.
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, '__self__') else (lambda: callback)
+        with self._lock:
+            self._subscribers.setdefault(key, []).append(ref)
+    
+    def _notify(self, key: str, value: Optional[str]):
+        callbacks = []
+        with self._lock:
+            for name in (key, '*'):
+                refs = self._subscribers.get(name)
+                if not refs:
+                    continue
+                live = [ref() for ref in refs]
+                self._subscribers[name] = [ref for ref, callback in zip(refs, live) if callback]
+                callbacks.extend(live)
+        
+        for callback in callbacks:
+            if callback is None:
+                continue
+            try:
+                callback(key, value)
+            except Exception as e:
+                logger.error(f"Error applying setting {key}={value!r}: {e}")
     
     def set_setting(self, key: str, value: str, description: str = None):
-        """Set a setting value."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Set a setting value, updating the cache and notifying subscribers."""
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             if description:
                 cursor.execute('''
@@ -79,31 +149,42 @@ class Database:
                     SET value = ?, updated_at = CURRENT_TIMESTAMP 
                     WHERE key = ?
                 ''', (value, key))
-            conn.commit()
+            # Read back what SQLite stored: the TEXT column turns numbers into strings,
+            # and without a description only existing keys are updated
+            cursor.execute('SELECT value FROM user_settings WHERE key = ?', (key,))
+            result = cursor.fetchone()
+        
+        if result:
+            stored = result[0]
+            with self._lock:
+                changed = self._settings.get(key) != stored
+                self._settings[key] = stored
+            if changed:
+                self._notify(key, stored)
     
     def get_all_settings(self) -> Dict[str, Any]:
         """Get all settings as a dictionary."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT key, value, description FROM user_settings')
-            settings = {}
-            for row in cursor.fetchall():
-                key, value, description = row
-                # Convert string values to appropriate types
-                if value.lower() in ('true', 'false'):
-                    settings[key] = value.lower() == 'true'
-                elif value.isdigit():
-                    settings[key] = int(value)
-                else:
-                    settings[key] = value
-            return settings
+        settings = {}
+        for key, value in list(self._settings.items()):
+            # Convert string values to appropriate types
+            if value.lower() in ('true', 'false'):
+                settings[key] = value.lower() == 'true'
+            elif value.isdigit():
+                settings[key] = int(value)
+            else:
+                settings[key] = value
+        return settings
     
     def delete_setting(self, key: str):
         """Delete a setting."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM user_settings WHERE key = ?', (key,))
-            conn.commit()
+        
+        with self._lock:
+            existed = self._settings.pop(key, None) is not None
+        if existed:
+            self._notify(key, None)
 
 # Global database instance
 db = Database()
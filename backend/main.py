@@ -1,7 +1,9 @@
+import argparse
 import asyncio
+import multiprocessing
+import socket
 import threading
 import time
-import json
 from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 import os
@@ -10,6 +12,12 @@ import logging
 from utils.native_deriv_client import NativeDerivClient
 from utils.telegram_bot import TelegramBot
 from database import db
+from async_db import adb
+from utils.tick_store import get_tick_store
+from utils.tick_bus import BusServer, DEFAULT_PATH as DEFAULT_BUS_PATH
+from utils.remote_deriv_client import RemoteDerivClient
+from utils.sse_broadcaster import SSEBroadcaster
+from utils.snapshot_cache import SnapshotCache
 
 # Configure logging
 logging.basicConfig(
@@ -30,21 +38,35 @@ main_loop = None
 deriv = None
 deriv_lock = asyncio.Lock()
 ticks_cache = {"last_response": None, "last_update": 0}
-connected_clients = set()  # Set to store connected SSE clients
-message_queue = []  # Queue for pending messages
+sse = SSEBroadcaster(max_fps=float(db.get_setting('sse_max_fps') or 4))  # Per-client queues for the SSE streams
+# Latest-ticks snapshots encoded once per change, shared by /api/ticks and new SSE clients
+snapshots = SnapshotCache(lambda symbol: deriv.get_latest_ticks(symbol), lambda symbol: deriv.snapshot_version(symbol))
 
-def broadcast_tick_update(ticks_data):
-    """Broadcast tick updates to all connected SSE clients."""
-    if connected_clients:
+def apply_sse_setting(key, value):
+    """Keep the per-client SSE frame rate limit in line with the setting."""
+    sse.max_fps = float(value or 4)
+
+db.subscribe('sse_max_fps', apply_sse_setting)
+
+def broadcast_tick_update(ticks_data, trace=None, update_type='tick_update'):
+    """Broadcast tick updates to all connected SSE clients.
+    
+    `update_type` is "tick_update" for a full snapshot or "tick_delta"
+    for one new tick. `trace` is the tick's latency trace; one SSE
+    stream closes it (see SSEBroadcaster.publish), or it is finished here
+    if nobody listens.
+    """
+    if len(sse):
         message = {
-            'type': 'tick_update',
+            'type': update_type,
             'data': ticks_data,
             'timestamp': time.time()
         }
-        message_queue.append(message)
-        print(f"📡 Broadcasting to {len(connected_clients)} clients - {len(ticks_data.get('ticks', []))} ticks")
-    else:
-        print(f"⚠️ No connected clients to broadcast to")
+        if trace:
+            trace.mark("broadcast")
+        sse.publish(message, trace)
+    elif trace:
+        trace.finish("broadcast")
 
 
 
@@ -66,27 +88,48 @@ def get_stats():
 
 @app.route("/api/markets")
 def get_markets():
-    """Get list of available markets/symbols."""
+    """Get available markets/symbols.
+    
+    Optional filters: market, submarket, symbol_type, open, q (display
+    name prefix search), plus offset/limit for pagination. Without them
+    the whole catalog is returned.
+    """
     global main_loop
     if main_loop and deriv:
         try:
             future = asyncio.run_coroutine_threadsafe(deriv.get_active_symbols(), main_loop)
-            markets = future.result(timeout=10)  # Longer timeout for market data
-            return jsonify({"markets": markets})
+            future.result(timeout=10)  # Longer timeout for market data
+            result = deriv.market_catalog.index.query_args(request.args)
+            return jsonify(result)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid parameter: {e}"}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
     return jsonify({"error": "Service not ready"}), 503
 
 @app.route("/api/subscribe", methods=["POST"])
 def subscribe_to_ticks():
-    """Subscribe to tick updates for a specific symbol."""
+    """Subscribe to tick updates for one symbol ("symbol") or several ("symbols")."""
     global main_loop
     if main_loop and deriv:
         try:
             data = request.get_json()
-            if not data or "symbol" not in data:
+            if not data or not (data.get("symbol") or data.get("symbols")):
                 return jsonify({"error": "Symbol is required"}), 400
+            
+            if "symbols" in data:
+                async def subscribe_many(symbols):
+                    results = await asyncio.gather(*(deriv.subscribe_to_ticks(symbol) for symbol in symbols))
+                    # Each subscribe made its symbol the dashboard one; settle on the first requested that worked
+                    first = next((r["symbol"] for r in results if r.get("status") == "subscribed"), None)
+                    if first:
+                        await deriv.subscribe_to_ticks(first)
+                    return results
                 
+                future = asyncio.run_coroutine_threadsafe(subscribe_many(data["symbols"]), main_loop)
+                results = future.result(timeout=10)
+                return jsonify({"status": "subscribed", "results": results})
+            
             symbol = data["symbol"]
             future = asyncio.run_coroutine_threadsafe(deriv.subscribe_to_ticks(symbol), main_loop)
             result = future.result(timeout=5)
@@ -97,11 +140,16 @@ def subscribe_to_ticks():
 
 @app.route("/api/unsubscribe", methods=["POST"])
 def unsubscribe_from_ticks():
-    """Unsubscribe from current tick subscription."""
+    """Unsubscribe from a symbol (default: the current one) or from all with {"all": true}."""
     global main_loop
     if main_loop and deriv:
         try:
-            future = asyncio.run_coroutine_threadsafe(deriv.unsubscribe_from_ticks(), main_loop)
+            data = request.get_json(silent=True) or {}
+            if data.get("all"):
+                coroutine = deriv.unsubscribe_all()
+            else:
+                coroutine = deriv.unsubscribe_from_ticks(data.get("symbol"))
+            future = asyncio.run_coroutine_threadsafe(coroutine, main_loop)
             result = future.result(timeout=5)
             return jsonify(result)
         except Exception as e:
@@ -110,18 +158,42 @@ def unsubscribe_from_ticks():
 
 @app.route("/api/ticks")
 def get_ticks():
-    """Get the latest ticks (fallback for polling)."""
+    """Get the latest ticks (fallback for polling). Accepts ?symbol=."""
     global deriv
     if deriv and hasattr(deriv, 'get_latest_ticks'):
         try:
-            ticks = deriv.get_latest_ticks()
-            return jsonify(ticks)
+            snapshot = snapshots.get(request.args.get("symbol") or deriv.current_symbol)
+            return Response(snapshot.body, mimetype='application/json')
         except Exception as e:
             print(f"❌ GET /api/ticks - Error: {e}")
             return jsonify({"error": str(e)}), 500
     else:
         return jsonify({"error": "Service not ready"}), 503
 
+@app.route("/api/ticks/history")
+def get_tick_history():
+    """Stored ticks for ?symbol=, optionally within ?start= and ?end= epochs, up to ?limit=."""
+    symbol = request.args.get("symbol")
+    if not symbol:
+        return jsonify({"error": "symbol is required"}), 400
+    try:
+        start = request.args.get("start", type=int)
+        end = request.args.get("end", type=int)
+        limit = max(1, min(request.args.get("limit", 1000, type=int), 10000))
+        ticks = get_tick_store().get_ticks(symbol, start, end, limit)
+        return jsonify({"symbol": symbol, "ticks": ticks, "count": len(ticks)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/ticks/history/stats")
+def get_tick_history_stats():
+    """Tick store write statistics and the stored symbols."""
+    try:
+        store = get_tick_store()
+        return jsonify({"store": store.stats(), "symbols": store.symbols()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/subscription/status")
 def get_subscription_status():
     """Get current subscription status."""
@@ -134,7 +206,8 @@ def get_subscription_status():
                 "subscription_id": deriv.subscription_id,
                 "tick_stream_available": deriv.tick_stream_available,
                 "last_tick_time": deriv.last_tick_time,
-                "total_ticks": len(deriv.latest_ticks)
+                "total_ticks": deriv.subscriptions.total_ticks(),
+                "subscriptions": deriv.get_subscriptions()
             }
             return jsonify(status)
         except Exception as e:
@@ -160,35 +233,28 @@ def cleanup_subscription():
 
 @app.route("/api/ticks/stream")
 def stream_ticks():
-    """Server-Sent Events endpoint for real-time tick updates."""
-    def generate():
-        # Add this client to the connected clients set
-        client_id = id(generate)
-        connected_clients.add(client_id)
-        print(f"📡 Client {client_id} connected to SSE stream")
-        
-        try:
-            # Send initial connection message
-            initial_message = {'type': 'connected', 'message': 'SSE connection established'}
-            yield f"data: {json.dumps(initial_message)}\n\n"
-            
-            # Keep connection alive and send updates
-            while True:
-                # Check for new messages in queue
-                if message_queue:
-                    message = message_queue.pop(0)
-                    yield f"data: {json.dumps(message)}\n\n"
-                
-                time.sleep(0.1)  # Check every 100ms
-        except GeneratorExit:
-            # Client disconnected
-            connected_clients.discard(client_id)
-            print(f"📡 Client {client_id} disconnected from SSE stream")
+    """Server-Sent Events endpoint for real-time tick updates.
+    
+    Each subscribed symbol starts with a "tick_update" snapshot, followed
+    by one "tick_delta" per new tick. Deltas carry the symbol's `seq`; a
+    client that sees one skipped reloads the snapshot from /api/ticks.
+    
+    A client reconnecting with the Last-Event-ID header (or
+    ?last_event_id=) gets only the updates it missed, or fresh
+    snapshots if those are no longer kept.
+    """
+    def initial_messages():
+        messages = [{'type': 'connected', 'message': 'SSE connection established'}]
+        if deriv:
+            for symbol in deriv.subscriptions.symbols():
+                messages.append(snapshots.get(symbol).message)
+        return messages
     
-    response = Response(generate(), mimetype='text/event-stream')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    response = Response(sse.stream(initial_messages, last_event_id), mimetype='text/event-stream')
     response.headers['Cache-Control'] = 'no-cache'
     response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Headers'] = 'Cache-Control'
+    response.headers['Access-Control-Allow-Headers'] = 'Cache-Control, Last-Event-ID'
     return response
 
 @app.route("/api/debug/native-test")
@@ -479,13 +545,14 @@ def debug_ticks_status():
             return jsonify({
                 "ticks_status": {
                     "current_symbol": deriv.current_symbol,
-                    "total_ticks_in_memory": len(deriv.latest_ticks),
+                    "total_ticks_in_memory": deriv.subscriptions.total_ticks(),
                     "filtered_ticks": len(ticks_data.get('ticks', [])),
                     "tick_stream_available": deriv.tick_stream_available,
                     "last_tick_time": deriv.last_tick_time,
                     "time_since_last_tick": time.time() - deriv.last_tick_time if deriv.last_tick_time else None,
                     "is_connected": deriv.is_connected,
                     "subscription_id": deriv.subscription_id,
+                    "subscriptions": deriv.get_subscriptions(),
                     "latest_ticks_data": ticks_data
                 }
             })
@@ -515,6 +582,66 @@ def debug_account_status():
             return jsonify({"error": str(e)}), 500
     return jsonify({"error": "Service not ready"}), 503
 
+@app.route("/api/debug/connection")
+def debug_connection():
+    """Debug endpoint with reconnect counts and downtime of the Deriv connection."""
+    global deriv
+    if deriv:
+        try:
+            return jsonify({"connection": deriv.get_connection_metrics()})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Service not ready"}), 503
+
+@app.route("/api/debug/latency")
+def debug_latency():
+    """Debug endpoint with ping round-trip percentiles and tick offsets."""
+    global deriv
+    if deriv:
+        try:
+            return jsonify({"latency": deriv.get_latency_stats()})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Service not ready"}), 503
+
+@app.route("/api/debug/tick-latency")
+def debug_tick_latency():
+    """Debug endpoint with per-stage tick latency, from socket read to SSE delivery."""
+    global deriv
+    if deriv:
+        try:
+            return jsonify({"tick_latency": deriv.get_tick_trace_stats()})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Service not ready"}), 503
+
+@app.route("/api/debug/shared-ticks")
+def debug_shared_ticks():
+    """Debug endpoint with the shared-memory tick rings and their sequence numbers."""
+    global deriv
+    if deriv:
+        try:
+            return jsonify({"shared_ticks": deriv.shared_ticks.stats()})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Service not ready"}), 503
+
+@app.route("/api/debug/sse")
+def debug_sse():
+    """Debug endpoint with the SSE clients and their queues."""
+    try:
+        return jsonify({"sse": sse.stats(), "snapshots": snapshots.stats()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/debug/database")
+def debug_database():
+    """Debug endpoint with the async database executor's queue statistics."""
+    try:
+        return jsonify({"database": adb.stats()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/debug/test-sse")
 def debug_test_sse():
     """Debug endpoint to test SSE connection."""
@@ -536,8 +663,8 @@ def debug_test_sse():
         return jsonify({
             "sse_test": {
                 "message": "Test SSE message sent",
-                "connected_clients": len(connected_clients),
-                "message_queue_length": len(message_queue),
+                "connected_clients": len(sse),
+                "queued_messages": sum(client["queued"] for client in sse.stats()["clients"]),
                 "test_message": test_message
             }
         })
@@ -574,8 +701,8 @@ def debug_test_broadcast():
         return jsonify({
             "test_broadcast": {
                 "message": "Test broadcast sent",
-                "connected_clients": len(connected_clients),
-                "message_queue_length": len(message_queue),
+                "connected_clients": len(sse),
+                "queued_messages": sum(client["queued"] for client in sse.stats()["clients"]),
                 "test_data": test_data
             }
         })
@@ -647,14 +774,19 @@ def debug_test_telegram():
 
 
 
-async def setup_services():
+def finish_tick_trace(ticks_data, trace=None, update_type=None):
+    """Frontend callback of the ingest process, which has no SSE clients of its own."""
+    if trace:
+        trace.finish()
+
+async def setup_services(frontend_callback=broadcast_tick_update):
     """Initialize and connect the native Deriv client."""
     global deriv, main_loop
     async with deriv_lock:
         deriv = NativeDerivClient()
         
         # Set up frontend callback
-        deriv.set_frontend_callback(broadcast_tick_update)
+        deriv.set_frontend_callback(frontend_callback)
         
         # Set up main loop for async operations
         deriv.set_main_loop(main_loop)
@@ -686,7 +818,119 @@ async def send_telegram_notification(bot, deriv):
     except Exception as e:
         print(f"❌ Error sending Telegram notification: {e}")
 
-async def main():
+def run_api_server(port=5001, reuse_port=False):
+    """Serve the Flask app; with reuse_port, several processes can listen on the same port."""
+    if not reuse_port:
+        app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
+        return
+    
+    from werkzeug.serving import make_server
+    # The kernel spreads incoming connections across every process bound with SO_REUSEPORT
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(('0.0.0.0', port))
+    sock.listen(128)
+    make_server('0.0.0.0', port, app, threaded=True, fd=sock.fileno()).serve_forever()
+
+def bus_handlers(client, bus):
+    """Calls API worker processes can make into the ingest process."""
+    async def reload_settings():
+        # A worker changed a setting: apply it here and tell the other workers
+        changed = await adb.reload_settings()
+        if changed:
+            bus.publish("settings", {"keys": changed})
+        return changed
+    
+    return {
+        "status": client.get_status,
+        "buffered_ticks": client.get_buffered_ticks,
+        "get_balance": client.get_balance,
+        "get_active_symbols": client.get_active_symbols,
+        "subscribe_to_ticks": client.subscribe_to_ticks,
+        "unsubscribe_from_ticks": client.unsubscribe_from_ticks,
+        "unsubscribe_all": client.unsubscribe_all,
+        "connection_metrics": client.get_connection_metrics,
+        "latency_stats": client.get_latency_stats,
+        "tick_trace_stats": client.get_tick_trace_stats,
+        "shared_ticks_stats": client.shared_ticks.stats,
+        "reload_settings": reload_settings
+    }
+
+async def run_ingest(bus_path=DEFAULT_BUS_PATH, status_interval=2.0):
+    """Ingest process: owns the Deriv connection and publishes its events on the local bus."""
+    global main_loop
+    main_loop = asyncio.get_running_loop()
+    bot = TelegramBot()
+    bus = BusServer(bus_path)
+    
+    try:
+        await setup_services(frontend_callback=finish_tick_trace)
+        bus.handlers = bus_handlers(deriv, bus)
+        deriv.add_event_listener(bus.publish)
+        await bus.start()
+        await send_telegram_notification(bot, deriv)
+        
+        print(f"📡 Ingest process publishing on {bus_path}")
+        print("Press Ctrl+C to exit")
+        
+        # Status also carries last_tick_time and connection state, so refresh it periodically
+        while True:
+            await asyncio.sleep(status_interval)
+            bus.publish("status", deriv.get_status())
+    
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        await bus.close()
+        if deriv:
+            await deriv.close()
+        await bot.close()
+        adb.close()
+
+async def run_api_worker(port=5001, bus_path=DEFAULT_BUS_PATH):
+    """API worker process: serves the Flask app from state mirrored off the ingest process."""
+    global deriv, main_loop
+    main_loop = asyncio.get_running_loop()
+    deriv = RemoteDerivClient(bus_path)
+    deriv.set_frontend_callback(broadcast_tick_update)
+    deriv.set_main_loop(main_loop)
+    if not await deriv.connect():
+        print(f"⚠️ Ingest process not reachable on {bus_path} yet, retrying in background")
+    
+    server_thread = threading.Thread(target=run_api_server, args=(port, True))
+    server_thread.daemon = True
+    server_thread.start()
+    print(f"🚀 API worker {os.getpid()} serving http://0.0.0.0:{port}")
+    
+    try:
+        while True:
+            await asyncio.sleep(60)
+    finally:
+        await deriv.close()
+        sse.close()
+        adb.close()
+
+def api_worker_process(port, bus_path):
+    asyncio.run(run_api_worker(port, bus_path))
+
+def run_api_workers(workers, port=5001, bus_path=DEFAULT_BUS_PATH):
+    """Start `workers` API worker processes sharing one port and wait for them."""
+    # Spawn rather than fork: the parent already holds SQLite connections
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=api_worker_process, args=(port, bus_path), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+        for process in processes:
+            process.terminate()
+
+async def main(port=5001):
     # Store reference to the main event loop
     global main_loop
     main_loop = asyncio.get_running_loop()
@@ -702,11 +946,11 @@ async def main():
         await send_telegram_notification(bot, deriv)
         
         # Start Flask API server in a separate thread
-        server_thread = threading.Thread(target=lambda: app.run(host='0.0.0.0', port=5001, debug=False, use_reloader=False))
+        server_thread = threading.Thread(target=run_api_server, args=(port,))
         server_thread.daemon = True
         server_thread.start()
         
-        print("🚀 Deriv Bot API running at http://0.0.0.0:5001")
+        print(f"🚀 Deriv Bot API running at http://0.0.0.0:{port}")
         print("📊 Frontend should be running at http://localhost:5173")
         print("🤖 Telegram notifications enabled")
         print("Press Ctrl+C to exit")
@@ -722,8 +966,24 @@ async def main():
         if deriv:
             await deriv.close()
         await bot.close()
+        sse.close()
+        adb.close()
 
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Deriv Bot backend")
+    parser.add_argument("--mode", choices=("all", "ingest", "api"), default="all",
+                        help="all: one process (default); ingest: Deriv connection + local bus; "
+                             "api: API workers fed by the ingest process")
+    parser.add_argument("--workers", type=int, default=1, help="API worker processes (api mode)")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--bus", default=DEFAULT_BUS_PATH, help="Unix socket of the local bus")
+    args = parser.parse_args()
+    
+    if args.mode == "ingest":
+        asyncio.run(run_ingest(args.bus))
+    elif args.mode == "api":
+        run_api_workers(args.workers, args.port, args.bus)
+    else:
+        asyncio.run(main(args.port))
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Tests import modules the way main.py does, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py opens deriv_bot.db in the working directory on import; keep tests away from the real one
+os.chdir(tempfile.mkdtemp(prefix="deriv-bot-tests-"))
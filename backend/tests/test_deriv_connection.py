@@ -0,0 +1,213 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from utils import deriv_connection
+from utils.deriv_connection import DerivAPIError, DerivConnection, DerivConnectionPool
+from utils.native_deriv_client import NativeDerivClient
+from utils.tick_subscriptions import TickSubscriptionManager
+
+
+class FakeSocket:
+    """An open WebSocket whose replies come from `reply(request)`; drop() ends it like a server disconnect."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.sent = []
+        self.incoming = asyncio.Queue()
+
+    async def send(self, text):
+        request = json.loads(text)
+        self.sent.append(request)
+        for response in self.reply(request) or ():
+            self.incoming.put_nowait(json.dumps(response))
+
+    def drop(self):
+        self.incoming.put_nowait(None)
+
+    async def close(self):
+        self.drop()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class FakeDeriv:
+    """Replaces websockets.connect; every connect opens a new FakeSocket."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.sockets = []
+
+    async def connect(self, url):
+        socket = FakeSocket(self.reply)
+        self.sockets.append(socket)
+        return socket
+
+
+async def ignore(*args):
+    pass
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def fake_deriv(monkeypatch):
+    def install(reply):
+        fake = FakeDeriv(reply)
+        monkeypatch.setattr(deriv_connection.websockets, "connect", fake.connect)
+        return fake
+    return install
+
+
+def test_concurrent_requests_each_get_their_own_reply(fake_deriv):
+    held = []
+
+    def reply(request):
+        # Answer the two pings together, in the opposite order
+        held.append(request)
+        if len(held) == 2:
+            return [{"msg_type": "ping", "ping": "pong", "req_id": r["req_id"], "passthrough": r["passthrough"]}
+                    for r in reversed(held)]
+
+    async def main():
+        fake_deriv(reply)
+        connection = DerivConnection("wss://test", "test", on_message=ignore)
+        connection.start()
+        assert await connection.wait_ready(1)
+        first, second = await asyncio.gather(connection.request({"ping": 1, "passthrough": {"n": 1}}),
+                                             connection.request({"ping": 1, "passthrough": {"n": 2}}))
+        assert (first["passthrough"], second["passthrough"]) == ({"n": 1}, {"n": 2})
+        assert first["req_id"] != second["req_id"]
+        assert connection.get_metrics()["pending_requests"] == 0
+        await connection.close()
+
+    asyncio.run(main())
+
+
+def test_error_replies_raise_and_unknown_req_ids_are_ignored(fake_deriv):
+    def reply(request):
+        return [{"msg_type": "ping", "ping": "pong", "req_id": 999},
+                {"msg_type": "ticks_history", "req_id": request["req_id"],
+                 "error": {"code": "InvalidSymbol", "message": "Unknown symbol"}}]
+
+    async def main():
+        fake_deriv(reply)
+        connection = DerivConnection("wss://test", "test", on_message=ignore)
+        connection.start()
+        with pytest.raises(DerivAPIError) as error:
+            await connection.request({"ticks_history": "NOPE"})
+        assert error.value.code == "InvalidSymbol"
+        assert error.value.msg_type == "ticks_history"
+        await connection.close()
+
+    asyncio.run(main())
+
+
+def test_a_dropped_socket_fails_requests_in_flight(fake_deriv):
+    async def main():
+        fake = fake_deriv(lambda request: None)
+        connection = DerivConnection("wss://test", "test", on_message=ignore)
+        connection.reconnect_base_delay = 0.01
+        connection.start()
+        assert await connection.wait_ready(1)
+        request = asyncio.create_task(connection.request({"ticks_history": "R_100"}))
+        await wait_for(lambda: fake.sockets[0].sent)
+        fake.sockets[0].drop()
+        with pytest.raises(ConnectionError):
+            await request
+        await connection.close()
+
+    asyncio.run(main())
+
+
+def test_reconnect_authorizes_and_resubscribes_before_serving(fake_deriv):
+    stream_ids = iter(range(1, 100))
+
+    def reply(request):
+        if "authorize" in request:
+            return [{"msg_type": "authorize", "authorize": {"loginid": "VRTC1"}, "req_id": request["req_id"]}]
+        if "ticks" in request:
+            stream_id = f"stream-{next(stream_ids)}"
+            return [{"msg_type": "tick", "req_id": request["req_id"], "subscription": {"id": stream_id},
+                     "tick": {"symbol": request["ticks"], "quote": 1000.0, "epoch": 1700000000, "id": stream_id}}]
+
+    async def main():
+        fake = fake_deriv(reply)
+        client = NativeDerivClient.__new__(NativeDerivClient)
+        client.token = "token"
+        client.app_id = "1089"
+        client.subscriptions = TickSubscriptionManager()
+        client.pool = DerivConnectionPool("wss://test", on_message=ignore, on_ready=client._on_connection_ready,
+                                          on_tick=ignore, stream_connections=0)
+        client.pool.configure(reconnect_base_delay=0.01)
+        subscription = client.subscriptions.add("R_100")
+        client.pool.assign("R_100")
+        control = client.pool.control
+
+        client.pool.start()
+        assert await control.wait_ready(1)
+        assert client.subscriptions.route(None, "stream-1") is subscription
+
+        fake.sockets[0].drop()
+        await wait_for(lambda: len(fake.sockets) == 2 and control.is_ready)
+        # The old stream id is dead; the new one routes to the same buffer
+        assert client.subscriptions.route(None, "stream-1") is None
+        assert client.subscriptions.route(None, "stream-2") is subscription
+        assert [next(iter(request)) for request in fake.sockets[1].sent] == ["authorize", "ticks"]
+        assert control.metrics["reconnects"] == 1
+        await client.pool.close()
+
+    asyncio.run(main())
+
+
+def test_a_symbol_unsubscribed_mid_subscribe_is_not_bound(fake_deriv):
+    held = []
+
+    def reply(request):
+        if "ticks" in request:
+            held.append(request)
+        elif "forget" in request:
+            return [{"msg_type": "forget", "forget": 1, "req_id": request["req_id"]}]
+
+    async def main():
+        fake = fake_deriv(reply)
+        client = NativeDerivClient.__new__(NativeDerivClient)
+        client.current_symbol = None
+        client.subscriptions = TickSubscriptionManager()
+        client._forget_tasks = {}
+        client._emit = lambda topic, data: None
+        client.get_status = lambda: {}
+        client.pool = DerivConnectionPool("wss://test", on_message=ignore, on_tick=ignore, stream_connections=0)
+        client.pool.start()
+        assert await client.pool.control.wait_ready(1)
+
+        subscribe = asyncio.create_task(client.subscribe_to_ticks("R_100"))
+        await wait_for(lambda: held)
+        await client.unsubscribe_from_ticks("R_100")
+        # The first tick answers the subscribe only once the symbol is gone
+        request = held[0]
+        fake.sockets[0].incoming.put_nowait(json.dumps(
+            {"msg_type": "tick", "req_id": request["req_id"], "subscription": {"id": "stream-1"},
+             "tick": {"symbol": "R_100", "quote": 1000.0, "epoch": 1700000000, "id": "stream-1"}}))
+
+        assert (await subscribe)["status"] == "unsubscribed"
+        assert client.subscriptions.route(None, "stream-1") is None
+        await wait_for(lambda: any(sent.get("forget") == "stream-1" for sent in fake.sockets[0].sent))
+        await client.pool.close()
+
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from utils.deriv_decoder import TickRecord
+from utils.ingest_queue import IngestQueue
+
+
+def tick(symbol, quote):
+    return TickRecord.from_tick({"symbol": symbol, "epoch": 1700000000, "quote": quote})
+
+
+async def drain(queue):
+    items = []
+    while len(queue):
+        _, item, _ = await queue.get()
+        items.append(item)
+    return items
+
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(ValueError):
+        IngestQueue(0)
+    with pytest.raises(ValueError):
+        IngestQueue(10, "newest_wins")
+
+
+def test_block_waits_for_room_and_keeps_every_frame():
+    async def main():
+        queue = IngestQueue(2, "block")
+        await queue.put("tick", tick("R_10", 1.0))
+        await queue.put("tick", tick("R_10", 2.0))
+        blocked = asyncio.create_task(queue.put("tick", tick("R_10", 3.0)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        await queue.get()
+        await asyncio.wait_for(blocked, 1)
+        assert [t.quote for t in await drain(queue)] == [2.0, 3.0]
+        assert queue.metrics["blocked"] == 1
+        assert queue.metrics["dropped"] == 0
+
+    asyncio.run(main())
+
+
+def test_drop_oldest_discards_the_oldest_tick_but_never_a_message():
+    async def main():
+        queue = IngestQueue(2, "drop_oldest")
+        await queue.put("balance", {"balance": {"balance": 10}})
+        await queue.put("tick", tick("R_10", 1.0))
+        await queue.put("tick", tick("R_10", 2.0))
+
+        items = await drain(queue)
+        assert items[0] == {"balance": {"balance": 10}}
+        assert items[1].quote == 2.0
+        assert queue.metrics["dropped"] == 1
+
+    asyncio.run(main())
+
+
+def test_coalesce_replaces_the_queued_tick_of_the_same_symbol():
+    async def main():
+        queue = IngestQueue(2, "coalesce")
+        await queue.put("tick", tick("R_10", 1.0), received_at=1.0)
+        await queue.put("tick", tick("R_25", 5.0), received_at=2.0)
+        await queue.put("tick", tick("R_10", 1.5), received_at=3.0)
+        # No queued tick for R_50: the oldest tick goes instead
+        await queue.put("tick", tick("R_50", 7.0), received_at=4.0)
+
+        entries = [await queue.get() for _ in range(len(queue))]
+        assert [(item.symbol, item.quote, received_at) for _, item, received_at in entries] == [
+            ("R_25", 5.0, 2.0), ("R_50", 7.0, 4.0)]
+        assert queue.metrics["coalesced"] == 1
+        assert queue.metrics["dropped"] == 1
+
+        # Once a tick was taken it can no longer be coalesced into
+        await queue.put("tick", tick("R_10", 2.0))
+        await queue.put("tick", tick("R_10", 3.0))
+        assert [t.quote for t in await drain(queue)] == [2.0, 3.0]
+
+    asyncio.run(main())
+
+
+def test_messages_wait_for_room_under_every_policy():
+    async def main():
+        for policy in IngestQueue.POLICIES:
+            queue = IngestQueue(1, policy)
+            await queue.put("tick", {"tick": {"symbol": "R_10"}, "req_id": 1})
+            waiting = asyncio.create_task(queue.put("authorize", {"authorize": {}}))
+            await asyncio.sleep(0.01)
+            assert not waiting.done(), policy
+            await queue.get()
+            await asyncio.wait_for(waiting, 1)
+            assert queue.stats()["depth"] == 1
+
+    asyncio.run(main())
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from utils.market_catalog import MAX_PAGE_SIZE, MarketCatalog, MarketIndex, annotate_markets
+
+
+def market(symbol, display_name, market="synthetic_index", submarket="random_index", symbol_type="stockindex",
+           exchange_is_open=1):
+    return {"symbol": symbol, "display_name": display_name, "market": market, "submarket": submarket,
+            "symbol_type": symbol_type, "exchange_is_open": exchange_is_open}
+
+
+MARKETS = [
+    market("R_10", "Volatility 10 Index"),
+    market("R_100", "Volatility 100 Index"),
+    market("1HZ100V", "Volatility 100 (1s) Index", submarket="random_index_1s"),
+    market("frxEURUSD", "EUR/USD", market="forex", submarket="major_pairs", symbol_type="forex"),
+    market("frxEURJPY", "EUR/JPY", market="forex", submarket="minor_pairs", symbol_type="forex",
+           exchange_is_open=0),
+    market("WLDAUD", "AUD Basket", market="synthetic_index", submarket="forex_basket", symbol_type="forex_basket"),
+]
+
+
+@pytest.fixture
+def index():
+    return MarketIndex(annotate_markets([dict(m) for m in MARKETS]))
+
+
+def symbols(result):
+    return [m["symbol"] for m in result["markets"]]
+
+
+def test_search_matches_word_prefixes_of_every_search_word(index):
+    assert sorted(symbols(index.query(search="vol 100"))) == ["1HZ100V", "R_100"]
+    assert symbols(index.query(search="VOLATILITY 10 index")) == symbols(index.query(search="volatility 10"))
+    # Prefixes of a word, not substrings inside it
+    assert symbols(index.query(search="latility")) == []
+    assert symbols(index.query(search="basket")) == ["WLDAUD"]
+
+
+def test_filters_intersect(index):
+    assert symbols(index.query(market="forex")) == ["frxEURJPY", "frxEURUSD"]
+    assert symbols(index.query(market="forex", open_only=True)) == ["frxEURUSD"]
+    assert symbols(index.query(market="forex", open_only=False)) == ["frxEURJPY"]
+    result = index.query(market="synthetic_index", submarket="random_index", search="100")
+    assert symbols(result) == ["R_100"]
+    assert result["total"] == 1
+    assert symbols(index.query(market="forex", search="volatility")) == []
+    assert symbols(index.query(market="unknown")) == []
+
+
+def test_results_keep_catalog_order_and_paginate(index):
+    everything = symbols(index.query())
+    assert len(everything) == len(MARKETS)
+    page = index.query(offset=2, limit=2)
+    assert symbols(page) == everything[2:4]
+    assert page["total"] == len(MARKETS)
+
+
+def test_query_args_clamps_paging(index):
+    assert index.query_args({"limit": "0"})["limit"] == 1
+    assert index.query_args({"limit": "-5"})["limit"] == 1
+    assert index.query_args({"limit": "100000"})["limit"] == MAX_PAGE_SIZE
+    result = index.query_args({"offset": "-3"})
+    assert result["offset"] == 0
+    assert result["limit"] == 50
+    # Without paging arguments every match is returned
+    assert index.query_args({})["limit"] is None
+    assert symbols(index.query_args({"market": "forex", "open": "true"})) == ["frxEURUSD"]
+    with pytest.raises(ValueError):
+        index.query_args({"limit": "ten"})
+
+
+class FakeFetch:
+    """fetch(detail) returning each of `results` in turn; an exception in the list is raised instead."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, detail):
+        self.calls += 1
+        await self.release.wait()
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return [dict(m) for m in result]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return MarketCatalog(ttl=100, path=str(tmp_path / "markets.json"))
+
+
+def test_an_empty_catalog_waits_for_the_fetch_and_persists_it(catalog):
+    async def main():
+        fetch = FakeFetch(MARKETS)
+        fetch.release.set()
+        markets = await catalog.get_markets(fetch)
+        assert len(markets) == len(MARKETS)
+        assert catalog.index.get("R_100")["has_tick_stream"]
+
+        reloaded = MarketCatalog(ttl=100, path=catalog.path).ensure_loaded()
+        assert [m["symbol"] for m in reloaded.markets] == [m["symbol"] for m in markets]
+
+    asyncio.run(main())
+
+
+def test_stale_markets_are_served_while_one_refresh_runs(catalog):
+    async def main():
+        fetch = FakeFetch(MARKETS[:2], MARKETS)
+        fetch.release.set()
+        await catalog.get_markets(fetch)
+        fetch.release.clear()
+        catalog.fetched_at -= 90
+
+        # Past refresh_after of the TTL: the cached list comes back at once
+        first = await catalog.get_markets(fetch)
+        second = await catalog.get_markets(fetch)
+        assert len(first) == len(second) == 2
+        task = catalog._refresh_task
+        await asyncio.sleep(0)
+        assert fetch.calls == 2
+
+        fetch.release.set()
+        await task
+        assert len(await catalog.get_markets(fetch)) == len(MARKETS)
+        assert fetch.calls == 2
+        assert catalog.metrics["refreshes"] == 2
+
+    asyncio.run(main())
+
+
+def test_concurrent_misses_share_one_refresh(catalog):
+    async def main():
+        fetch = FakeFetch(MARKETS)
+        waiting = [asyncio.ensure_future(catalog.get_markets(fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        results = await asyncio.gather(*waiting)
+        assert fetch.calls == 1
+        assert all(len(result) == len(MARKETS) for result in results)
+        assert catalog.metrics["misses"] == 3
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("failure", [ConnectionError("offline"), []])
+def test_a_failed_or_empty_refresh_keeps_the_cached_list(catalog, failure):
+    async def main():
+        fetch = FakeFetch(MARKETS, failure)
+        fetch.release.set()
+        await catalog.get_markets(fetch)
+        fetched_at = catalog.fetched_at
+
+        markets = await catalog.get_markets(fetch, force=True)
+        assert len(markets) == len(MARKETS)
+        assert catalog.index.get("frxEURUSD") is not None
+        assert catalog.fetched_at == fetched_at
+        assert catalog.metrics["failed_refreshes"] == 1
+
+    asyncio.run(main())
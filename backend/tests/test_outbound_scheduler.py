@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from utils import outbound_scheduler
+from utils.outbound_scheduler import OutboundScheduler, TokenBucket, call_type
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(outbound_scheduler.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+    assert bucket.delay() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.take()
+    assert not bucket.take()
+
+    # Idle time never banks more than the burst
+    clock.now += 60
+    assert sum(bucket.take() for _ in range(10)) == 3
+
+
+def test_call_type():
+    assert call_type({"ticks": "R_100", "subscribe": 1}) == "ticks"
+    assert call_type({"proposal": 1, "amount": 10}) == "proposal"
+    assert call_type({"website_status": 1}) == "website_status"
+
+
+async def run_scheduler(limits, requests, settle=0.05):
+    """Submit `requests` in order and return what was written within `settle` seconds."""
+    written = []
+
+    async def write(request):
+        written.append(request)
+        return True
+
+    scheduler = OutboundScheduler(write, limits=limits)
+    tasks = [asyncio.create_task(scheduler.submit(request)) for request in requests]
+    await asyncio.sleep(settle)
+    await scheduler.close()
+    results = await asyncio.gather(*tasks)
+    return written, results, scheduler
+
+
+def test_ping_and_authorize_are_not_held_up_by_a_dry_general_bucket():
+    requests = [{"ticks": f"R_{n}", "subscribe": 1} for n in range(3)] + [{"ping": 1}, {"authorize": "token"}]
+    written, results, scheduler = asyncio.run(run_scheduler({"general": (0.001, 1)}, requests))
+
+    assert {"ping": 1} in written and {"authorize": "token"} in written
+    assert [request for request in written if "ticks" in request] == [{"ticks": "R_0", "subscribe": 1}]
+    # Requests still queued at close report as not sent
+    assert results == [True, False, False, True, True]
+
+
+def test_higher_priority_calls_are_written_first():
+    requests = [{"active_symbols": "brief"}, {"ticks": "R_100"}, {"buy": 1, "price": 10}]
+    written, _, _ = asyncio.run(run_scheduler({}, requests))
+    assert [call_type(request) for request in written] == ["buy", "ticks", "active_symbols"]
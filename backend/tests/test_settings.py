@@ -0,0 +1,85 @@
+import gc
+import sqlite3
+
+import pytest
+
+from database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(str(tmp_path / "settings.db"))
+
+
+class Listener:
+    def __init__(self):
+        self.changes = []
+
+    def on_change(self, key, value):
+        self.changes.append((key, value))
+
+
+def test_set_setting_updates_the_cache_and_the_database(database):
+    database.set_setting("theme", "light")
+    assert database.get_setting("theme") == "light"
+    with sqlite3.connect(database.db_path) as conn:
+        assert conn.execute("SELECT value FROM user_settings WHERE key = 'theme'").fetchone() == ("light",)
+
+    # Without a description only existing keys are written
+    database.set_setting("unknown_key", "1")
+    assert database.get_setting("unknown_key") is None
+    database.set_setting("new_key", 5, "a new setting")
+    assert database.get_setting("new_key") == "5"
+
+
+def test_subscribers_hear_about_changes_to_their_key(database):
+    theme, everything = Listener(), Listener()
+    database.subscribe("theme", theme.on_change)
+    database.subscribe("*", everything.on_change)
+    plain = []
+    database.subscribe("theme", lambda key, value: plain.append(value))
+
+    database.set_setting("theme", "light")
+    database.set_setting("theme", "light")
+    database.set_setting("max_ticks_display", "50")
+    database.delete_setting("theme")
+
+    assert theme.changes == [("theme", "light"), ("theme", None)]
+    assert plain == ["light", None]
+    assert everything.changes == [("theme", "light"), ("max_ticks_display", "50"), ("theme", None)]
+
+
+def test_reload_reports_changes_made_by_another_process(database):
+    listener = Listener()
+    database.subscribe("max_ticks_display", listener.on_change)
+    with sqlite3.connect(database.db_path) as conn:
+        conn.execute("UPDATE user_settings SET value = '25' WHERE key = 'max_ticks_display'")
+    assert database.get_setting("max_ticks_display") == "100"
+
+    assert database.reload_settings() == ["max_ticks_display"]
+    assert database.get_setting("max_ticks_display") == "25"
+    assert listener.changes == [("max_ticks_display", "25")]
+
+
+def test_collected_subscribers_are_dropped(database):
+    kept, dropped = Listener(), Listener()
+    database.subscribe("theme", kept.on_change)
+    database.subscribe("theme", dropped.on_change)
+    del dropped
+    gc.collect()
+
+    database.set_setting("theme", "light")
+    assert kept.changes == [("theme", "light")]
+    assert len(database._subscribers["theme"]) == 1
+
+
+def test_a_failing_subscriber_does_not_stop_the_others(database):
+    listener = Listener()
+
+    def broken(key, value):
+        raise RuntimeError("boom")
+
+    database.subscribe("theme", broken)
+    database.subscribe("theme", listener.on_change)
+    database.set_setting("theme", "light")
+    assert listener.changes == [("theme", "light")]
@@ -0,0 +1,108 @@
+import pytest
+
+from utils.shared_ticks import SharedTickRing
+
+
+@pytest.fixture
+def rings(tmp_path):
+    """(writer, reader) for a ring of capacity 4 in a temp directory."""
+    writer = SharedTickRing.create("R_100", capacity=4, directory=str(tmp_path))
+    reader = SharedTickRing.attach("R_100", directory=str(tmp_path))
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def write(ring, first, last):
+    for n in range(first, last):
+        ring.write(1700000000 + n, float(n), n - 0.5, n + 0.5)
+
+
+def numbers(ticks):
+    return [int(quote) for _, quote, _, _ in ticks]
+
+
+def test_slots_wrap_around_the_end_of_the_ring(rings):
+    writer, _ = rings
+    assert writer.slots(0, 3) == [(0, 3)]
+    assert writer.slots(2, 4) == [(2, 4)]
+    assert writer.slots(3, 6) == [(3, 4), (0, 2)]
+    assert writer.slots(4, 8) == [(0, 4)]
+    # Only the last `capacity` ticks are still in the ring
+    assert writer.slots(0, 10) == [(2, 4), (0, 2)]
+    assert writer.slots(5, 5) == []
+
+
+def test_a_wrapped_read_returns_the_ticks_in_order(rings):
+    writer, reader = rings
+    write(writer, 0, 3)
+    assert reader.read_since(0) == (3, [(1700000000, 0.0, -0.5, 0.5), (1700000001, 1.0, 0.5, 1.5),
+                                        (1700000002, 2.0, 1.5, 2.5)])
+    write(writer, 3, 6)
+    seq, ticks = reader.read_since(3)
+    assert seq == 6
+    assert numbers(ticks) == [3, 4, 5]
+    assert reader.read_since(6) == (6, [])
+
+
+def test_a_reader_more_than_capacity_behind_gets_only_the_safe_ticks(rings):
+    writer, reader = rings
+    write(writer, 0, 10)
+    seq, ticks = reader.read_since(2)
+    assert seq == 10
+    # Ticks 0-5 are overwritten, and tick 6's slot is the one the writer fills next
+    assert numbers(ticks) == [7, 8, 9]
+    assert numbers(reader.latest(2)) == [8, 9]
+
+
+class LappingColumn:
+    """A column whose first read lets the writer add `count` ticks, as if it ran during the copy."""
+
+    def __init__(self, column, writer, count):
+        self.column = column
+        self.writer = writer
+        self.count = count
+
+    def __getitem__(self, index):
+        if self.count:
+            seq = self.writer.seq
+            write(self.writer, seq, seq + self.count)
+            self.count = 0
+        return self.column[index]
+
+
+def test_ticks_lapped_during_the_copy_are_discarded(rings):
+    writer, reader = rings
+    write(writer, 0, 3)
+    epochs = reader.epochs
+    reader.epochs = LappingColumn(epochs, writer, 2)
+    try:
+        seq, ticks = reader.read_since(0)
+    finally:
+        reader.epochs = epochs
+    assert seq == 3
+    # Tick 0 was overwritten by tick 4 and tick 1's slot is the one filled next
+    assert numbers(ticks) == [2]
+
+    seq, ticks = reader.read_since(seq)
+    assert (seq, numbers(ticks)) == (5, [3, 4])
+
+
+def test_a_writer_restart_resets_the_readers_seq(rings):
+    writer, reader = rings
+    write(writer, 0, 3)
+    # A ring recreated from scratch (e.g. /dev/shm cleared) counts from 0 again
+    seq, ticks = reader.read_since(10)
+    assert (seq, numbers(ticks)) == (3, [0, 1, 2])
+
+
+def test_reopening_the_writer_keeps_the_seq_unless_the_capacity_changes(rings, tmp_path):
+    writer, _ = rings
+    write(writer, 0, 3)
+    reopened = SharedTickRing.create("R_100", capacity=4, directory=str(tmp_path))
+    assert reopened.seq == 3
+    reopened.close()
+
+    resized = SharedTickRing.create("R_100", capacity=8, directory=str(tmp_path))
+    assert (resized.seq, resized.capacity) == (0, 8)
+    resized.close()
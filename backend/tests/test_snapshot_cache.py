@@ -0,0 +1,49 @@
+import json
+
+from utils.snapshot_cache import SnapshotCache
+
+
+class FakeClient:
+    def __init__(self):
+        self.seq = {"R_100": 1, "R_25": 1}
+        self.builds = []
+
+    def snapshot(self, symbol):
+        self.builds.append(symbol)
+        return {"symbol": symbol, "seq": self.seq[symbol], "ticks": []}
+
+    def version(self, symbol):
+        return (symbol, self.seq[symbol]) if symbol in self.seq else None
+
+
+def test_a_snapshot_is_built_once_per_version():
+    client = FakeClient()
+    cache = SnapshotCache(client.snapshot, client.version)
+    first = cache.get("R_100")
+    assert cache.get("R_100") is first
+    assert cache.get("R_25") is not first
+
+    client.seq["R_100"] += 1
+    second = cache.get("R_100")
+    assert json.loads(second.body)["seq"] == 2
+    assert client.builds == ["R_100", "R_25", "R_100"]
+    assert cache.stats() == {"hits": 1, "builds": 3, "symbols": 2}
+
+
+def test_the_message_wraps_the_same_snapshot_as_the_body():
+    cache = SnapshotCache(FakeClient().snapshot, FakeClient().version)
+    snapshot = cache.get("R_100")
+    message = json.loads(snapshot.message)
+    assert message["type"] == "tick_update"
+    assert message["data"] == json.loads(snapshot.body) == snapshot.data
+    assert message["timestamp"] == snapshot.built_at
+
+
+def test_nothing_is_cached_without_a_version():
+    client = FakeClient()
+    client.seq["R_50"] = 1
+    cache = SnapshotCache(client.snapshot, lambda symbol: None)
+    cache.get("R_50")
+    cache.get("R_50")
+    assert client.builds == ["R_50", "R_50"]
+    assert cache.stats()["symbols"] == 0
@@ -0,0 +1,374 @@
+import json
+import threading
+import time
+
+from utils.deriv_decoder import TickRecord
+from utils.sse_broadcaster import SSEBroadcaster
+from utils.tick_subscriptions import TickSubscription
+from utils.tick_trace import TickTracer
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def add_tick(subscription, n):
+    subscription.add_tick(TickRecord.from_tick({"symbol": subscription.symbol, "epoch": 1700000000 + n,
+                                                "quote": 1000.0 + n, "pip_size": 2}))
+
+
+def delta_message(subscription):
+    return {"type": "tick_delta", "data": subscription.delta(), "timestamp": 0.0}
+
+
+def snapshot_message(subscription):
+    return {"type": "tick_update", "data": dict(subscription.snapshot(10), max_ticks=10), "timestamp": 0.0}
+
+
+def connect(broadcaster, count):
+    """Streams that are registered: the first next() registers and, with nothing queued, times out on a keepalive."""
+    streams = [broadcaster.stream() for _ in range(count)]
+    for stream in streams:
+        assert next(stream) == KEEPALIVE
+    return streams
+
+
+def drain(stream):
+    """Frames sent until the stream goes idle; resuming past the last one closes its traces."""
+    frames = []
+    for frame in stream:
+        if frame == KEEPALIVE:
+            return frames
+        frames.append(frame)
+
+
+def parse(frame):
+    """(event id, message) of one SSE frame."""
+    event_id = message = None
+    for line in frame.decode().strip().split("\n"):
+        if line.startswith("id: "):
+            event_id = line[4:]
+        elif line.startswith("data: "):
+            message = json.loads(line[6:])
+    return event_id, message
+
+
+def counts(tracer):
+    return {stage: tracer.histograms[stage].count for stage in ("sse_wait", "coalesced", "total")}
+
+
+def test_merged_deltas_close_each_trace_once():
+    tracer = TickTracer()
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    streams = connect(broadcaster, 3)
+    subscription = TickSubscription("R_100")
+    for n in range(3):
+        add_tick(subscription, n)
+        broadcaster.publish(delta_message(subscription), tracer.start())
+
+    for stream in streams:
+        # All three deltas were merged into one frame per client
+        assert len(drain(stream)) == 1
+    assert counts(tracer) == {"sse_wait": 3, "coalesced": 0, "total": 3}
+    broadcaster.close()
+
+
+def test_replaced_updates_close_their_traces_as_coalesced():
+    tracer = TickTracer()
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    streams = connect(broadcaster, 2)
+    subscription = TickSubscription("R_100")
+    for n in range(2):
+        add_tick(subscription, n)
+        broadcaster.publish(delta_message(subscription), tracer.start())
+    broadcaster.publish(snapshot_message(subscription), tracer.start())
+
+    for stream in streams:
+        assert b'"tick_update"' in drain(stream)[0]
+    assert counts(tracer) == {"sse_wait": 1, "coalesced": 2, "total": 3}
+    broadcaster.close()
+
+
+def test_traces_are_closed_without_clients_or_when_a_client_leaves():
+    tracer = TickTracer()
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    subscription = TickSubscription("R_100")
+    add_tick(subscription, 0)
+    broadcaster.publish(delta_message(subscription), tracer.start())
+    assert counts(tracer) == {"sse_wait": 0, "coalesced": 0, "total": 1}
+
+    stream, = connect(broadcaster, 1)
+    add_tick(subscription, 1)
+    broadcaster.publish(delta_message(subscription), tracer.start())
+    stream.close()
+    assert counts(tracer) == {"sse_wait": 0, "coalesced": 0, "total": 2}
+    assert len(broadcaster) == 0
+
+
+def test_full_queue_drops_only_non_tick_messages():
+    broadcaster = SSEBroadcaster(queue_size=2, max_fps=50, keepalive=0.05)
+    stream, = connect(broadcaster, 1)
+    subscriptions = [TickSubscription(f"R_{n}") for n in range(4)]
+    for subscription in subscriptions:
+        add_tick(subscription, 0)
+        broadcaster.publish(snapshot_message(subscription))
+    for n in range(3):
+        broadcaster.publish({"type": "test", "data": {"n": n}})
+
+    frames = drain(stream)
+    for subscription in subscriptions:
+        assert sum(f'"symbol":"{subscription.symbol}"'.encode() in frame.replace(b" ", b"") for frame in frames) == 1
+    assert [n for n in range(3) if f'"n":{n}'.encode() in b"".join(frames).replace(b" ", b"")] == [1, 2]
+    assert broadcaster.stats()["clients"][0]["dropped"] == 1
+    broadcaster.close()
+
+
+def test_every_client_gets_every_update_in_order():
+    broadcaster = SSEBroadcaster(max_fps=0, keepalive=0.05)
+    streams = connect(broadcaster, 3)
+    for n in range(5):
+        assert broadcaster.publish({"type": "test", "data": {"n": n}}) == 3
+
+    for stream in streams:
+        assert [parse(frame)[1]["data"]["n"] for frame in drain(stream)] == list(range(5))
+    assert broadcaster.stats()["published"] == 5
+    broadcaster.close()
+
+
+def test_a_stalled_client_does_not_hold_up_the_others():
+    broadcaster = SSEBroadcaster(queue_size=10, max_fps=0, keepalive=0.05)
+    stalled, = connect(broadcaster, 1)
+    received = []
+
+    def reader():
+        for frame in broadcaster.stream():
+            if frame != KEEPALIVE:
+                received.append(parse(frame)[1]["data"]["n"])
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    while len(broadcaster) < 2:
+        time.sleep(0.01)
+    for n in range(100):
+        broadcaster.publish({"type": "test", "data": {"n": n}})
+        deadline = time.monotonic() + 2
+        while len(received) <= n and time.monotonic() < deadline:
+            time.sleep(0.001)
+    assert received == list(range(100))
+
+    # The stalled client kept only its newest queue_size messages
+    assert [parse(frame)[1]["data"]["n"] for frame in drain(stalled)] == list(range(90, 100))
+    stalled.close()
+    broadcaster.close()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert len(broadcaster) == 0
+
+
+def test_initial_messages_are_sent_first():
+    broadcaster = SSEBroadcaster(max_fps=0, keepalive=0.05)
+    stream = broadcaster.stream(lambda: [{"type": "connected"}, b'{"type":"tick_update","data":{}}'])
+    assert [parse(next(stream))[1]["type"] for _ in range(2)] == ["connected", "tick_update"]
+    stream.close()
+
+
+def test_deltas_merge_into_one_frame_with_contiguous_ticks():
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    stream, = connect(broadcaster, 1)
+    subscription = TickSubscription("R_100")
+    for n in range(4):
+        add_tick(subscription, n)
+        broadcaster.publish(delta_message(subscription))
+
+    frames = drain(stream)
+    assert len(frames) == 1
+    message = parse(frames[0])[1]
+    assert message["type"] == "tick_delta"
+    assert message["data"]["seq"] == 4
+    assert [t["epoch"] for t in message["data"]["ticks"]] == [1700000000 + n for n in range(4)]
+    assert broadcaster.stats()["clients"][0]["coalesced"] == 3
+    broadcaster.close()
+
+
+def test_deltas_merged_into_a_snapshot_keep_its_max_ticks():
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    stream, = connect(broadcaster, 1)
+    subscription = TickSubscription("R_100")
+    for n in range(10):
+        add_tick(subscription, n)
+    broadcaster.publish(snapshot_message(subscription))
+    for n in range(10, 13):
+        add_tick(subscription, n)
+        broadcaster.publish(delta_message(subscription))
+
+    message = parse(drain(stream)[0])[1]
+    assert message["type"] == "tick_update"
+    assert message["data"]["seq"] == 13
+    assert [t["epoch"] for t in message["data"]["ticks"]] == [1700000000 + n for n in range(3, 13)]
+    broadcaster.close()
+
+
+def test_a_delta_that_does_not_follow_on_replaces_what_was_pending():
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    stream, = connect(broadcaster, 1)
+    subscription = TickSubscription("R_100")
+    add_tick(subscription, 0)
+    broadcaster.publish(delta_message(subscription))
+    add_tick(subscription, 1)
+    add_tick(subscription, 2)
+    broadcaster.publish(delta_message(subscription))
+
+    # Not merged across the missing seq; the client sees the gap and resyncs
+    message = parse(drain(stream)[0])[1]
+    assert message["data"]["seq"] == 3
+    assert message["data"]["tick"]["epoch"] == 1700000002
+    assert "ticks" not in message["data"]
+    broadcaster.close()
+
+
+def test_updates_are_sent_in_the_order_of_their_oldest_message():
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    stream, = connect(broadcaster, 1)
+    first, second = TickSubscription("R_10"), TickSubscription("R_25")
+    add_tick(first, 0)
+    broadcaster.publish(delta_message(first))
+    broadcaster.publish({"type": "test", "data": {}})
+    add_tick(second, 0)
+    broadcaster.publish(delta_message(second))
+    add_tick(first, 1)
+    broadcaster.publish(delta_message(first))
+
+    messages = [parse(frame)[1] for frame in drain(stream)]
+    assert [(m["type"], m["data"].get("symbol")) for m in messages] == [
+        ("tick_delta", "R_10"), ("test", None), ("tick_delta", "R_25")]
+    assert messages[0]["data"]["seq"] == 2
+    broadcaster.close()
+
+
+def test_slow_flushes_lower_the_frame_rate_and_fast_ones_restore_it():
+    broadcaster = SSEBroadcaster(max_fps=4, min_fps=0.5)
+    client, _, _ = broadcaster.register()
+    for _ in range(5):
+        client.adapt(1.0, broadcaster.max_fps, broadcaster.min_fps)
+    assert client.fps == 0.5
+    assert client.slowdowns == 3
+
+    for _ in range(20):
+        client.adapt(0.0, broadcaster.max_fps, broadcaster.min_fps)
+    assert client.fps == 4
+    broadcaster.unregister(client)
+
+
+def test_a_resumed_stream_gets_only_the_updates_it_missed():
+    broadcaster = SSEBroadcaster(max_fps=0, keepalive=0.05)
+    stream, = connect(broadcaster, 1)
+    for n in range(3):
+        broadcaster.publish({"type": "test", "data": {"n": n}})
+    last_id = parse(drain(stream)[-1])[0]
+    stream.close()
+    for n in range(3, 6):
+        broadcaster.publish({"type": "test", "data": {"n": n}})
+
+    resumed = broadcaster.stream(lambda: [{"type": "snapshot"}], last_event_id=last_id)
+    frames = drain(resumed)
+    assert [parse(frame)[1]["data"]["n"] for frame in frames] == [3, 4, 5]
+    assert parse(frames[-1])[0] == broadcaster.stats()["last_event_id"]
+    assert broadcaster.metrics["resumed"] == 1
+    broadcaster.close()
+
+
+def test_resuming_at_the_latest_id_sends_nothing():
+    broadcaster = SSEBroadcaster(max_fps=0, keepalive=0.05)
+    broadcaster.publish({"type": "test", "data": {}})
+    stream = broadcaster.stream(lambda: [{"type": "snapshot"}],
+                                last_event_id=broadcaster.stats()["last_event_id"])
+    assert next(stream) == KEEPALIVE
+    stream.close()
+
+
+def test_ids_that_cannot_be_resumed_from_get_fresh_snapshots():
+    broadcaster = SSEBroadcaster(max_fps=0, keepalive=0.05, replay_size=2)
+    for n in range(5):
+        broadcaster.publish({"type": "test", "data": {"n": n}})
+    instance = broadcaster.instance
+    # Another process or run, replayed past the buffer, from the future, malformed
+    for last_event_id in ("0abc-3", f"{instance}-1", f"{instance}-9", f"{instance}-x", "garbage"):
+        stream = broadcaster.stream(lambda: [{"type": "snapshot"}], last_event_id=last_event_id)
+        event_id, message = parse(next(stream))
+        assert message == {"type": "snapshot"}
+        # The snapshot covers everything published so far
+        assert event_id == f"{instance}-5"
+        assert next(stream) == KEEPALIVE
+        stream.close()
+    assert broadcaster.metrics["resume_snapshots"] == 5
+    assert broadcaster.metrics["resumed"] == 0
+
+    # The oldest update still kept can be resumed from
+    stream = broadcaster.stream(lambda: [{"type": "snapshot"}], last_event_id=f"{instance}-3")
+    assert [parse(frame)[1]["data"]["n"] for frame in drain(stream)] == [3, 4]
+    broadcaster.close()
+
+
+def test_frame_ids_are_watermarks_when_merging_reorders_updates():
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    stream, = connect(broadcaster, 1)
+    first, second = TickSubscription("R_10"), TickSubscription("R_25")
+    add_tick(first, 0)
+    broadcaster.publish(delta_message(first))
+    broadcaster.publish({"type": "test", "data": {}})
+    add_tick(second, 0)
+    broadcaster.publish(delta_message(second))
+    add_tick(first, 1)
+    broadcaster.publish(delta_message(first))
+
+    # The first frame also holds update 4, but update 2 and 3 are not sent yet
+    ids = [parse(frame)[0].rpartition("-")[2] for frame in drain(stream)]
+    assert ids == ["1", "2", "4"]
+    broadcaster.close()
+
+
+def test_replayed_ticks_are_merged_like_live_ones():
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    subscription = TickSubscription("R_100")
+    add_tick(subscription, 0)
+    broadcaster.publish(delta_message(subscription))
+    last_id = broadcaster.stats()["last_event_id"]
+    for n in range(1, 4):
+        add_tick(subscription, n)
+        broadcaster.publish(delta_message(subscription))
+
+    frames = drain(broadcaster.stream(last_event_id=last_id))
+    assert len(frames) == 1
+    message = parse(frames[0])[1]
+    assert message["data"]["seq"] == 4
+    assert [t["epoch"] for t in message["data"]["ticks"]] == [1700000001, 1700000002, 1700000003]
+    broadcaster.close()
+
+
+def test_every_client_is_sent_the_same_encoded_bytes():
+    broadcaster = SSEBroadcaster(max_fps=0, keepalive=0.05)
+    streams = connect(broadcaster, 3)
+    subscription = TickSubscription("R_100")
+    add_tick(subscription, 0)
+    broadcaster.publish(snapshot_message(subscription))
+
+    frames = [drain(stream) for stream in streams]
+    assert frames[0] == frames[1] == frames[2]
+    assert parse(frames[0][0])[1] == snapshot_message(subscription)
+    broadcaster.close()
+
+
+def test_a_merged_update_encodes_to_its_message():
+    broadcaster = SSEBroadcaster(max_fps=50, keepalive=0.05)
+    client, _, _ = broadcaster.register()
+    subscription = TickSubscription("R_100")
+    for n in range(10):
+        add_tick(subscription, n)
+    broadcaster.publish(snapshot_message(subscription))
+    for n in range(10, 12):
+        add_tick(subscription, n)
+        broadcaster.publish(delta_message(subscription))
+
+    update, = client.take()
+    assert update.merged
+    assert json.loads(update.body()) == update.as_message()
+    assert update.as_message()["data"]["seq"] == 12
+    broadcaster.unregister(client)
@@ -0,0 +1,60 @@
+from utils.tick_buffer import BACKFILLED, TickRingBuffer
+
+
+def filled(capacity, epochs):
+    buffer = TickRingBuffer(capacity, "R_100")
+    for epoch in epochs:
+        buffer.append(epoch, float(epoch))
+    return buffer
+
+
+def epochs(buffer):
+    return [tick[0] for tick in buffer.last(len(buffer))]
+
+
+def test_append_wraps_and_counts_every_tick():
+    buffer = filled(3, range(100, 105))
+    assert buffer.count == 5
+    assert len(buffer) == 3
+    assert epochs(buffer) == [102, 103, 104]
+    assert buffer.last_epoch() == 104
+    # Bid and ask default to the quote
+    assert buffer.last(1)[0] == (104, 104.0, 104.0, 104.0)
+
+
+def test_merge_inserts_in_epoch_order_and_advances_count_by_what_it_inserted():
+    buffer = filled(10, [100, 101, 105])
+    inserted = buffer.merge([(102, 2.0, 1.9, 2.1), (103, 3.0, 2.9, 3.1), (101, 9.9, 9.9, 9.9)])
+
+    assert inserted == 2
+    assert buffer.count == 5
+    assert epochs(buffer) == [100, 101, 102, 103, 105]
+    # Known epochs keep their original quote
+    assert buffer.last(5)[1] == (101, 101.0, 101.0, 101.0)
+    flags = [row[4] for row in buffer.last(5).rows()]
+    assert flags == [0, 0, BACKFILLED, BACKFILLED, 0]
+
+
+def test_merge_of_known_epochs_changes_nothing():
+    buffer = filled(5, [100, 101])
+    assert buffer.merge([(100, 1.0, 1.0, 1.0)]) == 0
+    assert buffer.count == 2
+
+
+def test_merge_into_a_full_buffer_keeps_the_newest_window():
+    buffer = filled(4, [100, 101, 104, 105])
+    assert buffer.merge([(102, 2.0, 2.0, 2.0), (103, 3.0, 3.0, 3.0)]) == 2
+    assert epochs(buffer) == [102, 103, 104, 105]
+    assert buffer.count == 6
+
+
+def test_merge_of_ticks_older_than_a_full_window_is_not_counted():
+    buffer = filled(3, [110, 111, 112])
+    assert buffer.merge([(100, 1.0, 1.0, 1.0), (101, 1.0, 1.0, 1.0)]) == 0
+    assert buffer.count == 3
+    assert epochs(buffer) == [110, 111, 112]
+
+    # Only the tick that lands inside the window counts
+    assert buffer.merge([(100, 1.0, 1.0, 1.0), (111, 1.0, 1.0, 1.0), (113, 1.0, 1.0, 1.0)]) == 1
+    assert buffer.count == 4
+    assert epochs(buffer) == [111, 112, 113]
@@ -0,0 +1,122 @@
+import asyncio
+
+from utils.deriv_decoder import TickRecord
+from utils.native_deriv_client import NativeDerivClient
+from utils.remote_deriv_client import RemoteDerivClient
+from utils.tick_bus import BusServer
+from utils.tick_subscriptions import TickSubscriptionManager
+
+
+class FakeIngest:
+    """The ingest process's side of the bus: real tick buffers, published the way NativeDerivClient does."""
+
+    get_buffered_ticks = NativeDerivClient.get_buffered_ticks
+
+    def __init__(self, path):
+        self.path = path
+        self.subscriptions = TickSubscriptionManager()
+        self.subscriptions.add("R_100")
+        self.bus = None
+
+    async def start(self):
+        self.bus = BusServer(self.path, {"status": self.get_status, "buffered_ticks": self.get_buffered_ticks})
+        await self.bus.start()
+
+    def get_status(self):
+        return {"current_symbol": "R_100", "is_connected": True, "max_ticks_display": 100,
+                "subscriptions": [{"symbol": symbol} for symbol in self.subscriptions.symbols()]}
+
+    def add_tick(self, n):
+        subscription = self.subscriptions.get("R_100")
+        tick = TickRecord.from_tick({"symbol": "R_100", "epoch": 1700000000 + n, "quote": 1000.0 + n})
+        subscription.add_tick(tick)
+        self.bus.publish("tick", {"symbol": "R_100", "seq": subscription.seq, "epoch": tick.epoch,
+                                  "quote": tick.quote, "bid": tick.bid, "ask": tick.ask, "pip_size": None})
+
+    @property
+    def seq(self):
+        return self.subscriptions.get("R_100").seq
+
+    def epochs(self):
+        return [row[0] for row in self.get_buffered_ticks("R_100")["ticks"]]
+
+
+def mirrored_epochs(remote):
+    return [row[0] for row in remote.subscriptions.get("R_100").ticks.last(1000).rows()]
+
+
+async def wait_for(condition, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_remote_client_mirrors_ticks_and_snapshots_and_resyncs_after_a_reconnect(tmp_path):
+    async def main():
+        ingest = FakeIngest(str(tmp_path / "bus.sock"))
+        await ingest.start()
+        for n in range(3):
+            ingest.add_tick(n)
+
+        remote = RemoteDerivClient(ingest.path)
+        updates = []
+        remote.set_frontend_callback(lambda data, trace, update_type: updates.append((update_type, data)))
+        assert await remote.connect(1)
+        # Connecting seeds the mirror with a full copy
+        await wait_for(lambda: "R_100" in remote.subscriptions and remote.subscriptions.get("R_100").seq == 3)
+        assert remote.is_connected
+        assert remote.current_symbol == "R_100"
+        assert mirrored_epochs(remote) == ingest.epochs()
+
+        # A tick event is applied to the mirror and sent on as a delta
+        ingest.add_tick(3)
+        await wait_for(lambda: updates)
+        update_type, data = updates.pop()
+        assert (update_type, data["seq"], data["tick"]["epoch"]) == ("tick_delta", 4, 1700000003)
+        assert mirrored_epochs(remote) == ingest.epochs()
+
+        # After a backfill the whole buffer is copied again and sent as a snapshot
+        ingest.subscriptions.get("R_100").merge_backfill([(1700000000 - 1, 999.0, 0.0, 0.0)])
+        ingest.bus.publish("backfill", {"symbol": "R_100"})
+        await wait_for(lambda: updates)
+        update_type, data = updates.pop()
+        assert (update_type, data["seq"]) == ("tick_update", ingest.seq)
+        assert [tick["epoch"] for tick in data["ticks"]] == ingest.epochs()
+
+        # Ticks published while the bus is down are picked up by the resync on reconnect
+        await ingest.bus.close()
+        await wait_for(lambda: not remote.bus.is_connected)
+        for n in range(4, 6):
+            ingest.add_tick(n)
+        await ingest.start()
+        await wait_for(lambda: remote.subscriptions.get("R_100").seq == ingest.seq)
+        assert mirrored_epochs(remote) == ingest.epochs()
+        assert remote.bus.metrics["reconnects"] == 1
+
+        await remote.close()
+        await ingest.bus.close()
+
+    asyncio.run(main())
+
+
+def test_a_skipped_tick_reloads_the_mirror(tmp_path):
+    async def main():
+        ingest = FakeIngest(str(tmp_path / "bus.sock"))
+        await ingest.start()
+        ingest.add_tick(0)
+        remote = RemoteDerivClient(ingest.path)
+        assert await remote.connect(1)
+        await wait_for(lambda: "R_100" in remote.subscriptions and remote.subscriptions.get("R_100").seq == 1)
+
+        # The event for tick 1 is lost; tick 2's seq shows the gap
+        ingest.subscriptions.get("R_100").add_tick(
+            TickRecord.from_tick({"symbol": "R_100", "epoch": 1700000001, "quote": 1001.0}))
+        ingest.add_tick(2)
+        await wait_for(lambda: remote.subscriptions.get("R_100").seq == 3)
+        assert mirrored_epochs(remote) == ingest.epochs() == [1700000000, 1700000001, 1700000002]
+
+        await remote.close()
+        await ingest.bus.close()
+
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.deriv_decoder import TickRecord
+from utils.tick_buffer import BACKFILLED
+from utils.tick_subscriptions import TickSubscription, TickSubscriptionManager
+
+
+def tick(epoch, symbol="R_100"):
+    return TickRecord.from_tick({"symbol": symbol, "epoch": epoch, "quote": float(epoch)})
+
+
+def test_gap_is_reported_once_ticks_are_several_intervals_apart():
+    subscription = TickSubscription("R_100")
+    assert [subscription.add_tick(tick(epoch)) for epoch in (100, 102, 104, 112)] == [None, None, None, (105, 111)]
+    assert subscription.tick_interval == 2
+    assert subscription.gaps_detected == 1
+    # 3 intervals apart is still on time
+    assert subscription.add_tick(tick(118)) is None
+
+
+def test_duplicate_or_late_ticks_are_not_gaps():
+    subscription = TickSubscription("R_100")
+    for epoch in (100, 101, 102):
+        subscription.add_tick(tick(epoch))
+    assert subscription.add_tick(tick(102)) is None
+    assert subscription.add_tick(tick(90)) is None
+    assert subscription.gaps_detected == 0
+
+
+def test_each_delta_follows_on_from_the_previous_seq():
+    subscription = TickSubscription("R_100", max_ticks=5)
+    for epoch in (100, 101, 102):
+        subscription.add_tick(tick(epoch))
+    snapshot = subscription.snapshot(2)
+    assert snapshot["seq"] == 3
+    assert [t["epoch"] for t in snapshot["ticks"]] == [101, 102]
+
+    seqs = []
+    for epoch in range(103, 110):
+        subscription.add_tick(tick(epoch))
+        delta = subscription.delta()
+        assert delta["tick"]["epoch"] == epoch
+        seqs.append(delta["seq"])
+    # seq keeps counting after the buffer wraps
+    assert seqs == list(range(4, 11))
+
+
+def test_backfill_advances_seq_so_clients_resync():
+    subscription = TickSubscription("R_100")
+    for epoch in (100, 101, 105):
+        subscription.add_tick(tick(epoch))
+    assert subscription.merge_backfill([(102, 102.0, 0.0, 0.0), (103, 103.0, 0.0, 0.0)]) == 2
+    snapshot = subscription.snapshot(10)
+    assert snapshot["seq"] == 5
+    assert [t["epoch"] for t in snapshot["ticks"]] == [100, 101, 102, 103, 105]
+
+
+class FakeHistory:
+    """ticks_history over a stream with a tick every second: up to `count` newest ticks with start <= epoch <= end."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def request(self, request):
+        self.requests.append(request)
+        times = list(range(request["start"], request["end"] + 1))[-request["count"]:]
+        return {"msg_type": "history", "history": {"times": times, "prices": [float(t) for t in times]}}
+
+
+def test_backfill_fetches_the_gap_in_batches_and_merges_it():
+    pytest.importorskip("websockets")
+    from utils.native_deriv_client import NativeDerivClient
+
+    async def main():
+        history = FakeHistory()
+        stored = []
+        updates = []
+        client = NativeDerivClient.__new__(NativeDerivClient)
+        client.max_ticks = 1000
+        client.backfill_batch_size = 2
+        client._backfill_ranges = {}
+        client._backfill_tasks = {}
+        client._event_listeners = []
+        client.subscriptions = TickSubscriptionManager()
+        client.pool = SimpleNamespace(connection_for=lambda symbol: history, control=history)
+        client.tick_store = SimpleNamespace(add_many=lambda symbol, ticks: stored.extend(ticks))
+        client._trigger_frontend_update = lambda symbol=None, trace=None, delta=False: updates.append((symbol, delta))
+
+        subscription = client.subscriptions.add("R_100")
+        for epoch in range(100, 105):
+            assert subscription.add_tick(tick(epoch)) is None
+        gap = subscription.add_tick(tick(110))
+        assert gap == (105, 109)
+        seq = subscription.seq
+
+        client._schedule_backfill("R_100", *gap)
+        # A second gap reported before the task runs widens the pending range
+        client._schedule_backfill("R_100", 106, 107)
+        await client._backfill_tasks["R_100"]
+
+        assert [(r["start"], r["end"], r["count"]) for r in history.requests] == [(105, 109, 2), (105, 107, 2),
+                                                                                   (105, 105, 2)]
+        view = subscription.latest(100)
+        assert [t[0] for t in view] == list(range(100, 111))
+        assert [row[4] for row in view.rows()] == [0] * 5 + [BACKFILLED] * 5 + [0]
+        # seq moves past the inserted ticks, so delta clients reload the snapshot sent below
+        assert subscription.seq == seq + 5
+        assert subscription.backfilled_ticks == 5
+        assert sorted(t[0] for t in stored) == list(range(105, 110))
+        assert updates == [("R_100", False)]
+
+    asyncio.run(main())
@@ -0,0 +1,441 @@
+import asyncio
+import itertools
+import random
+import time
+import zlib
+import websockets
+import logging
+from typing import Optional, List, Dict, Any, Callable, Awaitable
+from utils.deriv_decoder import JSONDecoder, TickRecord, get_decoder, peek_msg_type
+from utils.ingest_queue import IngestQueue
+from utils.outbound_scheduler import OutboundScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class DerivAPIError(Exception):
+    """Error returned by the Deriv API in reply to a request."""
+
+    def __init__(self, error: Dict[str, Any], msg_type: Optional[str] = None):
+        self.code = error.get("code")
+        self.message = error.get("message", str(error))
+        self.msg_type = msg_type
+        super().__init__(f"{self.code}: {self.message}" if self.code else self.message)
+
+
+class DerivConnection:
+    """One supervised WebSocket to Deriv.
+
+    Owns the socket, its reader task and the table of requests awaiting a
+    reply by req_id. When the socket drops it reconnects with jittered
+    exponential backoff and calls `on_ready` (authorization, resubscribing)
+    before serving callers again.
+
+    Frames are routed by a peek at msg_type: tick frames go to `on_tick`
+    as a TickRecord, everything else to `on_message` as a dict. The reader
+    only decodes; callbacks run in a separate processor task fed through a
+    bounded IngestQueue, so a slow consumer cannot stall the socket.
+    Outbound requests are paced and prioritized by an OutboundScheduler.
+    """
+
+    def __init__(self, url: str, name: str,
+                 on_message: Callable[[Dict[str, Any], "DerivConnection"], Awaitable[None]],
+                 on_ready: Optional[Callable[["DerivConnection"], Awaitable[None]]] = None,
+                 on_tick: Optional[Callable[[TickRecord, "DerivConnection"], Awaitable[None]]] = None,
+                 decoder: Optional[JSONDecoder] = None, queue: Optional[IngestQueue] = None):
+        self.url = url
+        self.name = name
+        self.on_message = on_message
+        self.on_ready = on_ready
+        self.on_tick = on_tick
+        self.decoder = decoder or get_decoder()
+        self.queue = queue or IngestQueue()
+        self.scheduler = OutboundScheduler(self._write)
+        self.websocket = None
+        self.is_connected = False
+
+        self.request_timeout = 5.0
+        self.reconnect_base_delay = 1.0
+        self.reconnect_max_delay = 60.0
+
+        self._req_ids = itertools.count(1)
+        self._pending_requests: Dict[int, asyncio.Future] = {}
+        self._supervisor_task: Optional[asyncio.Task] = None
+        self._processor_task: Optional[asyncio.Task] = None
+        # perf_counter time the frame currently being dispatched was read
+        self.received_at: Optional[float] = None
+        self._ready = asyncio.Event()
+        self._closing = False
+
+        self.metrics = {
+            "connects": 0,
+            "reconnects": 0,
+            "failed_attempts": 0,
+            "last_connected_at": None,
+            "last_disconnected_at": None,
+            "total_downtime": 0.0,
+            "last_error": None,
+            "messages_received": 0,
+            "bytes_received": 0,
+            "requests_sent": 0,
+            "forced_reconnects": 0
+        }
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self):
+        """Start the supervisor and processor tasks if they are not already running."""
+        self._closing = False
+        if self._processor_task is None or self._processor_task.done():
+            self._processor_task = asyncio.create_task(self._process_queue())
+        if self._supervisor_task is None or self._supervisor_task.done():
+            self._supervisor_task = asyncio.create_task(self._run())
+
+    async def wait_ready(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self):
+        """Keep the connection open, reconnecting with backoff when it drops."""
+        attempt = 0
+        while not self._closing:
+            reader = None
+            try:
+                logger.info(f"🔌 [{self.name}] Connecting to Deriv WebSocket: {self.url}")
+                self.websocket = await websockets.connect(self.url)
+                self.is_connected = True
+                logger.info(f"✅ [{self.name}] WebSocket connected successfully")
+
+                # Start message handler
+                reader = asyncio.create_task(self._handle_messages())
+
+                # Authorize and restore subscriptions before serving callers
+                if self.on_ready:
+                    await self.on_ready(self)
+                self._record_connected()
+                self._ready.set()
+                attempt = 0
+
+                await reader
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ [{self.name}] Connection error: {e}")
+                self.metrics["failed_attempts"] += 1
+                self.metrics["last_error"] = str(e)
+            finally:
+                self._ready.clear()
+                self.is_connected = False
+                if reader and not reader.done():
+                    reader.cancel()
+                if self.metrics["last_connected_at"] and not self.metrics["last_disconnected_at"]:
+                    self.metrics["last_disconnected_at"] = time.time()
+
+            if self._closing:
+                break
+
+            delay = self._backoff_delay(attempt)
+            attempt += 1
+            logger.warning(f"🔄 [{self.name}] Reconnecting in {delay:.1f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter so many clients do not reconnect in lockstep."""
+        delay = min(self.reconnect_max_delay, self.reconnect_base_delay * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _record_connected(self):
+        """Update connection metrics after a session is fully restored."""
+        metrics = self.metrics
+        now = time.time()
+        if metrics["connects"]:
+            metrics["reconnects"] += 1
+            if metrics["last_disconnected_at"]:
+                metrics["total_downtime"] += now - metrics["last_disconnected_at"]
+        metrics["connects"] += 1
+        metrics["last_connected_at"] = now
+        metrics["last_disconnected_at"] = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Reconnect counts, downtime and traffic of this connection."""
+        metrics = dict(self.metrics)
+        disconnected_at = metrics["last_disconnected_at"]
+        metrics["current_downtime"] = time.time() - disconnected_at if disconnected_at else 0.0
+        metrics["name"] = self.name
+        metrics["is_connected"] = self.is_connected
+        metrics["pending_requests"] = len(self._pending_requests)
+        metrics["ingest"] = self.queue.stats()
+        metrics["outbound"] = self.scheduler.stats()
+        return metrics
+
+    async def _handle_messages(self):
+        """Handle incoming WebSocket messages."""
+        try:
+            async for message in self.websocket:
+                self.metrics["messages_received"] += 1
+                self.metrics["bytes_received"] += len(message)
+                await self._enqueue_frame(message, time.perf_counter())
+        except websockets.exceptions.ConnectionClosed:
+            logger.warning(f"[{self.name}] WebSocket connection closed")
+            self.is_connected = False
+        except Exception as e:
+            logger.error(f"[{self.name}] Message handler error: {e}")
+            self.is_connected = False
+        finally:
+            self._fail_pending_requests(ConnectionError("WebSocket connection closed"))
+
+    async def _enqueue_frame(self, message, received_at):
+        """Decode one frame and queue it for the processor task."""
+        msg_type = peek_msg_type(message)
+
+        # Tick frames take the fast path unless a reply (e.g. to subscribe) may be among them
+        if msg_type == "tick" and self.on_tick and not self._pending_requests:
+            try:
+                tick = self.decoder.decode_tick(message)
+            except ValueError:
+                tick = None
+            if tick is not None:
+                await self.queue.put(msg_type, tick, received_at)
+                return
+
+        try:
+            msg_type, data = self.decoder.decode(message, msg_type)
+        except ValueError as e:
+            logger.error(f"Error decoding message: {e}")
+            return
+        await self.queue.put(msg_type, data, received_at)
+
+    async def _process_queue(self):
+        """Hand queued frames to the tick or message callback, in arrival order."""
+        while True:
+            msg_type, item, self.received_at = await self.queue.get()
+            try:
+                await self._dispatch(msg_type, item)
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+
+    async def _dispatch(self, msg_type, item):
+        if isinstance(item, TickRecord):
+            await self.on_tick(item, self)
+            return
+
+        try:
+            if msg_type == "tick" and self.on_tick:
+                tick = TickRecord.from_payload(item)
+                if tick is None:
+                    logger.warning("⚠️ Tick missing quote field, skipping")
+                else:
+                    await self.on_tick(tick, self)
+            else:
+                await self.on_message(item, self)
+        finally:
+            if self._pending_requests:
+                self._resolve_pending_request(item)
+
+    def _resolve_pending_request(self, data):
+        """Hand a response to the coroutine awaiting its req_id, if any."""
+        req_id = data.get("req_id")
+        if req_id is None:
+            return
+
+        future = self._pending_requests.pop(req_id, None)
+        if future is None or future.done():
+            return
+
+        if "error" in data:
+            future.set_exception(DerivAPIError(data["error"], data.get("msg_type")))
+        else:
+            future.set_result(data)
+
+    def _fail_pending_requests(self, exc: Exception):
+        """Fail every in-flight request, e.g. after the socket dropped."""
+        pending, self._pending_requests = self._pending_requests, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        if pending:
+            logger.warning(f"⚠️ [{self.name}] Failed {len(pending)} pending request(s): {exc}")
+
+    async def send(self, request, wait_ready: bool = True, priority: Optional[int] = None) -> bool:
+        """Send a request without waiting for its reply.
+
+        While the supervisor is reconnecting, waits up to request_timeout
+        for the session to come back instead of opening a socket itself.
+        The request then waits its turn in the outbound scheduler; returns
+        once it has been written.
+        """
+        if wait_ready and not self._ready.is_set():
+            if not await self.wait_ready(self.request_timeout):
+                logger.error(f"❌ [{self.name}] Not connected, request not sent")
+                return False
+
+        return await self.scheduler.submit(request, priority)
+
+    async def _write(self, request) -> bool:
+        """Write one request to the socket; only the outbound scheduler calls this."""
+        if not self.is_connected or not self.websocket:
+            logger.error(f"❌ [{self.name}] Not connected, request not sent")
+            return False
+
+        try:
+            await self.websocket.send(self.decoder.dumps(request))
+            self.metrics["requests_sent"] += 1
+            return True
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] Failed to send request: {e}")
+            return False
+
+    async def request(self, request, timeout: Optional[float] = None, wait_ready: bool = True,
+                      priority: Optional[int] = None):
+        """Send a request and wait for the response carrying its req_id.
+
+        Several requests may be in flight on the same socket; each caller
+        only receives its own reply. Raises DerivAPIError if Deriv answers
+        with an error, asyncio.TimeoutError if no reply arrives in time and
+        ConnectionError if the request could not be sent.
+        """
+        req_id = next(self._req_ids)
+        payload = dict(request, req_id=req_id)
+        future = asyncio.get_running_loop().create_future()
+        self._pending_requests[req_id] = future
+
+        try:
+            if not await self.send(payload, wait_ready, priority):
+                raise ConnectionError("Failed to send request")
+            return await asyncio.wait_for(future, timeout or self.request_timeout)
+        finally:
+            # Covers timeouts and cancellation of the awaiting caller
+            self._pending_requests.pop(req_id, None)
+
+    async def reconnect(self, reason: str):
+        """Drop the current socket so the supervisor opens a fresh one."""
+        logger.warning(f"🔄 [{self.name}] Forcing reconnect: {reason}")
+        self.metrics["forced_reconnects"] += 1
+        self.metrics["last_error"] = reason
+        if self.websocket:
+            await self.websocket.close()
+
+    async def close(self):
+        """Close the socket and stop reconnecting."""
+        self._closing = True
+        if self._supervisor_task:
+            self._supervisor_task.cancel()
+            try:
+                await self._supervisor_task
+            except asyncio.CancelledError:
+                pass
+            self._supervisor_task = None
+        if self._processor_task:
+            self._processor_task.cancel()
+            try:
+                await self._processor_task
+            except asyncio.CancelledError:
+                pass
+            self._processor_task = None
+        self.queue.clear()
+        await self.scheduler.close()
+
+        if self.websocket:
+            await self.websocket.close()
+        self.is_connected = False
+        self._fail_pending_requests(ConnectionError("Client closed"))
+
+
+class DerivConnectionPool:
+    """A control connection plus N stream connections sharing tick subscriptions.
+
+    Account, balance and proposal calls go over the control connection so
+    heavy tick traffic never delays them. Tick subscriptions are spread
+    over the stream connections by `policy`:
+
+    - "hash": stable assignment by a hash of the symbol
+    - "least_loaded": the stream connection with the fewest symbols
+
+    With zero stream connections everything shares the control socket.
+    Every connection gets its own ingest queue of `queue_size` frames with
+    the given overflow policy; see IngestQueue.
+    """
+
+    POLICIES = ("hash", "least_loaded")
+
+    def __init__(self, url: str, on_message, on_ready=None, on_tick=None, stream_connections: int = 2,
+                 policy: str = "least_loaded", decoder: Optional[JSONDecoder] = None,
+                 queue_size: int = 1000, queue_policy: str = "block"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown assignment policy: {policy}")
+        self.policy = policy
+        self.decoder = decoder or get_decoder()
+
+        def connection(name):
+            return DerivConnection(url, name, on_message, on_ready, on_tick, self.decoder,
+                                   IngestQueue(queue_size, queue_policy))
+
+        self.control = connection("control")
+        self.streams: List[DerivConnection] = [
+            connection(f"stream-{index}") for index in range(max(0, stream_connections))
+        ]
+        self._assignments: Dict[str, DerivConnection] = {}
+
+    def connections(self) -> List[DerivConnection]:
+        return [self.control] + self.streams
+
+    def start(self):
+        for connection in self.connections():
+            connection.start()
+
+    async def close(self):
+        await asyncio.gather(*(connection.close() for connection in self.connections()))
+
+    def configure(self, **attributes):
+        """Apply timeout/backoff settings to every connection."""
+        for connection in self.connections():
+            for name, value in attributes.items():
+                setattr(connection, name, value)
+
+    def assign(self, symbol: str) -> DerivConnection:
+        """Connection that carries a symbol's stream, choosing one if needed."""
+        connection = self._assignments.get(symbol)
+        if connection is not None:
+            return connection
+
+        if not self.streams:
+            connection = self.control
+        elif self.policy == "hash":
+            connection = self.streams[zlib.crc32(symbol.encode()) % len(self.streams)]
+        else:
+            loads = self.loads()
+            connection = min(self.streams, key=lambda stream: loads[stream.name])
+
+        self._assignments[symbol] = connection
+        return connection
+
+    def connection_for(self, symbol: str) -> Optional[DerivConnection]:
+        return self._assignments.get(symbol)
+
+    def release(self, symbol: str) -> Optional[DerivConnection]:
+        return self._assignments.pop(symbol, None)
+
+    def symbols_on(self, connection: DerivConnection) -> List[str]:
+        return [symbol for symbol, assigned in self._assignments.items() if assigned is connection]
+
+    def loads(self) -> Dict[str, int]:
+        """Number of symbols assigned to each connection."""
+        loads = {connection.name: 0 for connection in self.connections()}
+        for connection in self._assignments.values():
+            loads[connection.name] += 1
+        return loads
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-connection load and traffic."""
+        loads = self.loads()
+        stats = []
+        for connection in self.connections():
+            metrics = connection.get_metrics()
+            metrics["symbols"] = loads[connection.name]
+            stats.append(metrics)
+        return stats
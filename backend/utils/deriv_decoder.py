@@ -0,0 +1,164 @@
+import json
+import time
+from typing import Optional, Dict, Any, NamedTuple, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+MSG_TYPE_KEY = '"msg_type"'
+TICK_KEY = '"tick"'
+
+
+class TickRecord(NamedTuple):
+    """Compact, immutable tick built straight from a Deriv `tick` frame."""
+
+    symbol: Optional[str]
+    epoch: int
+    quote: float
+    bid: float
+    ask: float
+    pip_size: Optional[int]
+    subscription_id: Optional[str]
+    req_id: Optional[int]
+
+    @property
+    def timestamp(self) -> int:
+        return self.epoch
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access so callers written for tick dicts keep working."""
+        return getattr(self, key, default)
+
+    @classmethod
+    def from_tick(cls, tick: Dict[str, Any], subscription_id: Optional[str] = None,
+                  req_id: Optional[int] = None) -> Optional["TickRecord"]:
+        """Build a record from the frame's `tick` object, or None if it carries no quote."""
+        if not tick or "quote" not in tick:
+            return None
+        quote = tick["quote"]
+        return cls(
+            tick.get("symbol"),
+            int(tick.get("epoch") or time.time()),
+            quote,
+            tick.get("bid", quote),
+            tick.get("ask", quote),
+            tick.get("pip_size"),
+            subscription_id or tick.get("id"),
+            req_id
+        )
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any]) -> Optional["TickRecord"]:
+        """Build a record from a fully decoded frame."""
+        subscription = data.get("subscription")
+        return cls.from_tick(data.get("tick"), subscription["id"] if subscription else None, data.get("req_id"))
+
+
+def peek_msg_type(raw: Union[str, bytes]) -> Optional[str]:
+    """Read msg_type from a raw frame without parsing it.
+
+    Deriv serializes msg_type as a plain string, so a substring search is
+    enough. Returns None if the key is not found.
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    key = raw.find(MSG_TYPE_KEY)
+    if key < 0:
+        return None
+    start = raw.find('"', key + len(MSG_TYPE_KEY)) + 1
+    end = raw.find('"', start)
+    return raw[start:end] if start > 0 and end > 0 else None
+
+
+def _tick_object(raw: str) -> Optional[str]:
+    """Slice the flat `tick` object out of a raw frame, skipping echo_req and the rest."""
+    # "tick" also appears as the msg_type value, so look for the key followed by a colon
+    key = raw.find(TICK_KEY)
+    while key >= 0:
+        colon = key + len(TICK_KEY)
+        while raw[colon:colon + 1] == " ":
+            colon += 1
+        if raw[colon:colon + 1] == ":":
+            break
+        key = raw.find(TICK_KEY, colon)
+    if key < 0:
+        return None
+    start = raw.find("{", key)
+    end = raw.find("}", start)
+    if start < 0 or end < 0 or "{" in raw[start + 1:end]:
+        return None
+    return raw[start:end + 1]
+
+
+class JSONDecoder:
+    """Frame decoder backed by the standard library json module."""
+
+    name = "json"
+
+    def loads(self, raw: Union[str, bytes]) -> Any:
+        return json.loads(raw)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """UTF-8 JSON, ready to write to a socket or HTTP response."""
+        return json.dumps(obj).encode()
+
+    def decode(self, raw: Union[str, bytes], msg_type: Optional[str] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Return (msg_type, payload); msg_type comes from a cheap peek when possible."""
+        if msg_type is None:
+            msg_type = peek_msg_type(raw)
+        data = self.loads(raw)
+        if msg_type is None:
+            msg_type = data.get("msg_type")
+        return msg_type, data
+
+    def decode_tick(self, raw: Union[str, bytes]) -> Optional[TickRecord]:
+        """Fast path for tick frames: only the `tick` object is parsed.
+
+        The subscription id is taken from the tick itself and req_id is
+        not read. Returns None when the frame does not have the expected
+        shape, in which case callers should fall back to decode().
+        """
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        tick = _tick_object(raw)
+        if tick is None:
+            return None
+        return TickRecord.from_tick(self.loads(tick))
+
+
+class OrjsonDecoder(JSONDecoder):
+    """Frame decoder backed by orjson, several times faster on tick frames."""
+
+    name = "orjson"
+
+    def loads(self, raw: Union[str, bytes]) -> Any:
+        return orjson.loads(raw)
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def decode_tick(self, raw: Union[str, bytes]) -> Optional[TickRecord]:
+        # orjson parses a whole frame faster than Python can slice one out
+        data = self.loads(raw)
+        return TickRecord.from_tick(data.get("tick"), (data.get("subscription") or {}).get("id"))
+
+
+def get_decoder(name: Optional[str] = None) -> JSONDecoder:
+    """Decoder by name ("json" or "orjson"); by default orjson when installed."""
+    if name is None:
+        name = "orjson" if orjson is not None else "json"
+    if name == "orjson":
+        if orjson is None:
+            raise ValueError("orjson is not installed")
+        return OrjsonDecoder()
+    if name == "json":
+        return JSONDecoder()
+    raise ValueError(f"Unknown decoder: {name}")
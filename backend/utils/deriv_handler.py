@@ -1,5 +1,6 @@
 from deriv_api import DerivAPI  
 from utils.config import DERIV_API_TOKEN, DERIV_APP_ID  
+from utils.market_catalog import get_catalog
 import asyncio
 import time
 
@@ -7,6 +8,7 @@ class DerivHandler:
     def __init__(self):  
         self.api = DerivAPI(app_id=DERIV_APP_ID)
         self.active_symbols = []
+        self.market_catalog = get_catalog("brief")
         self.tick_subscription = None
         self.subscription_callback = None
         self.latest_ticks = []
@@ -25,36 +27,17 @@ class DerivHandler:
         return response.get("balance", {}).get("balance", 0)
     
     async def get_active_symbols(self):
-        """Get list of active symbols/markets."""
-        try:
-            # Always fetch fresh data to ensure we have the latest available markets
-            request = {
-                "active_symbols": "brief",
-                "product_type": "basic"
-            }
-            response = await self.api.send(request)
-            if "active_symbols" in response:
-                self.active_symbols = response["active_symbols"]
-                # Sort by market and then by symbol name for better organization
-                self.active_symbols.sort(key=lambda x: (x.get("market", ""), x.get("display_name", "")))
-                
-                # Add a field to indicate which symbols are likely to have tick streams
-                # Based on common patterns, most forex, indices, and commodities have tick streams
-                for symbol in self.active_symbols:
-                    market_type = symbol.get("market", "").lower()
-                    symbol_code = symbol.get("symbol", "").lower()
-                    
-                    # Forex, major indices, and commodities usually have tick streams
-                    if (market_type in ["forex", "indices", "commodities"] or 
-                        any(prefix in symbol_code for prefix in ["frx", "r_", "wld", "1hZ"])):
-                        symbol["has_tick_stream"] = True
-                    else:
-                        symbol["has_tick_stream"] = False
-            
-            return self.active_symbols
-        except Exception as e:
-            print(f"Error fetching active symbols: {e}")
-            return self.active_symbols or []
+        """Get list of active symbols/markets from the market catalog cache."""
+        self.active_symbols = await self.market_catalog.get_markets(self._fetch_active_symbols)
+        return self.active_symbols
+    
+    async def _fetch_active_symbols(self, detail):
+        request = {
+            "active_symbols": detail,
+            "product_type": "basic"
+        }
+        response = await self.api.send(request)
+        return response.get("active_symbols")
     
     async def subscribe_to_ticks(self, symbol):
         """Subscribe to tick updates for a specific symbol."""
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Deque, List
+from utils.deriv_decoder import TickRecord
+
+
+def _tick_key(tick: TickRecord) -> Optional[str]:
+    return tick.symbol or tick.subscription_id
+
+
+class IngestQueue:
+    """Bounded queue between a socket reader and the code that processes its frames.
+
+    The reader puts decoded frames and never waits on processing unless
+    the queue is full. What happens then depends on `policy`:
+
+    - "block": the reader waits for room, pushing back on the socket
+    - "drop_oldest": the oldest queued tick is discarded
+    - "coalesce": a queued tick for the same symbol is replaced by the new
+      one (latest quote wins); if there is none, the oldest tick is dropped
+
+    Only TickRecords are ever dropped or coalesced. Other messages,
+    including tick frames that answer a request, carry replies and account
+    data, so they always wait for room instead.
+    """
+
+    POLICIES = ("block", "drop_oldest", "coalesce")
+
+    def __init__(self, maxsize: int = 1000, policy: str = "block"):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        # Entries are [msg_type, item, received_at] lists so a coalesced tick can be swapped in place
+        self._entries: Deque[List[Any]] = deque()
+        self._queued_ticks: Dict[str, List[Any]] = {}
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        self.metrics = {
+            "enqueued": 0,
+            "processed": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "blocked": 0,
+            "blocked_time": 0.0,
+            "max_depth": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def full(self) -> bool:
+        return len(self._entries) >= self.maxsize
+
+    async def put(self, msg_type: Optional[str], item: Any, received_at: Optional[float] = None):
+        """Queue a frame, applying the overflow policy if the queue is full.
+
+        `received_at` is the perf_counter time the frame was read, passed
+        through untouched for latency tracing.
+        """
+        is_tick = isinstance(item, TickRecord)
+
+        if self.full() and is_tick and self.policy == "coalesce":
+            entry = self._queued_ticks.get(_tick_key(item))
+            if entry is not None:
+                entry[1] = item
+                entry[2] = received_at
+                self.metrics["coalesced"] += 1
+                return
+
+        if self.full() and is_tick and self.policy != "block":
+            self._drop_oldest_tick()
+
+        if self.full():
+            self.metrics["blocked"] += 1
+            started = time.monotonic()
+            try:
+                while self.full():
+                    self._not_full.clear()
+                    await self._not_full.wait()
+            finally:
+                self.metrics["blocked_time"] += time.monotonic() - started
+
+        entry = [msg_type, item, received_at]
+        self._entries.append(entry)
+        if is_tick and self.policy == "coalesce":
+            self._queued_ticks[_tick_key(item)] = entry
+
+        metrics = self.metrics
+        metrics["enqueued"] += 1
+        if len(self._entries) > metrics["max_depth"]:
+            metrics["max_depth"] = len(self._entries)
+        self._not_empty.set()
+
+    def _drop_oldest_tick(self):
+        for index, entry in enumerate(self._entries):
+            if isinstance(entry[1], TickRecord):
+                del self._entries[index]
+                self._forget_tick(entry)
+                self.metrics["dropped"] += 1
+                return
+
+    def _forget_tick(self, entry: List[Any]):
+        key = _tick_key(entry[1])
+        if self._queued_ticks.get(key) is entry:
+            del self._queued_ticks[key]
+
+    async def get(self):
+        """Wait for the next (msg_type, item, received_at) entry."""
+        while not self._entries:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        entry = self._entries.popleft()
+        if isinstance(entry[1], TickRecord):
+            self._forget_tick(entry)
+        self.metrics["processed"] += 1
+        self._not_full.set()
+        return entry[0], entry[1], entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self._queued_ticks.clear()
+        self._not_full.set()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["depth"] = len(self._entries)
+        stats["maxsize"] = self.maxsize
+        stats["policy"] = self.policy
+        return stats
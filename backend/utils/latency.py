@@ -0,0 +1,134 @@
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
+
+# Upper bounds (ms) of the histogram buckets reported alongside percentiles
+BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RollingHistogram:
+    """The most recent `window` latency samples, in seconds.
+
+    Old samples fall out as new ones arrive, so percentiles describe the
+    current state of the link rather than its whole history.
+    """
+
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.last: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.last = value
+
+    def percentile(self, percent: float, ordered: Optional[List[float]] = None) -> Optional[float]:
+        """Nearest-rank percentile of the current window."""
+        ordered = ordered if ordered is not None else sorted(self._samples)
+        if not ordered:
+            return None
+        rank = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def buckets(self, ordered: Optional[List[float]] = None) -> Dict[str, int]:
+        """Sample counts per bucket, keyed by upper bound in ms ("inf" for the rest)."""
+        ordered = ordered if ordered is not None else sorted(self._samples)
+        counts = {}
+        start = 0
+        for bound in BUCKETS_MS:
+            end = start
+            while end < len(ordered) and ordered[end] * 1000 <= bound:
+                end += 1
+            counts[f"le_{bound}ms"] = end - start
+            start = end
+        counts["inf"] = len(ordered) - start
+        return counts
+
+    def summary(self) -> Dict[str, Any]:
+        """p50/p95/p99, min/max and the bucket histogram, all in ms."""
+        ordered = sorted(self._samples)
+
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            "samples": len(ordered),
+            "total": self.count,
+            "last_ms": ms(self.last),
+            "min_ms": ms(ordered[0] if ordered else None),
+            "max_ms": ms(ordered[-1] if ordered else None),
+            "p50_ms": ms(self.percentile(50, ordered)),
+            "p95_ms": ms(self.percentile(95, ordered)),
+            "p99_ms": ms(self.percentile(99, ordered)),
+            "histogram": self.buckets(ordered)
+        }
+
+
+class LatencyMonitor:
+    """Ping round-trip times per connection, tick offsets and event loop lag.
+
+    The three together separate the usual causes of a stale dashboard:
+    slow round trips point at the network or Deriv, a growing tick offset
+    with normal round trips points at our processing, and loop lag shows
+    the event loop itself falling behind.
+
+    A connection is reported as spiking once `spike_count` consecutive
+    pings took longer than `spike_threshold` seconds (or timed out), which
+    the client uses to reconnect before the socket fails outright.
+    """
+
+    def __init__(self, window: int = 500, spike_threshold: float = 2.0, spike_count: int = 3):
+        self.window = window
+        self.spike_threshold = spike_threshold
+        self.spike_count = spike_count
+        self.round_trips: Dict[str, RollingHistogram] = {}
+        # Local receive time minus the tick's server epoch; epochs are whole seconds
+        self.tick_offsets = RollingHistogram(window)
+        # How late the ping loop woke up compared to when it asked to
+        self.loop_lag = RollingHistogram(window)
+        self._slow_pings: Dict[str, int] = {}
+        self.timeouts: Dict[str, int] = {}
+        self.spikes: List[Tuple[float, str]] = []
+
+    def record_ping(self, connection: str, rtt: Optional[float]) -> bool:
+        """Record one ping (None for a timeout); returns True when the spike is sustained."""
+        if rtt is None:
+            self.timeouts[connection] = self.timeouts.get(connection, 0) + 1
+        else:
+            histogram = self.round_trips.get(connection)
+            if histogram is None:
+                histogram = self.round_trips[connection] = RollingHistogram(self.window)
+            histogram.add(rtt)
+
+        if rtt is None or rtt > self.spike_threshold:
+            slow = self._slow_pings[connection] = self._slow_pings.get(connection, 0) + 1
+        else:
+            slow = self._slow_pings[connection] = 0
+
+        if slow < self.spike_count:
+            return False
+        self._slow_pings[connection] = 0
+        self.spikes.append((time.time(), connection))
+        del self.spikes[:-20]
+        return True
+
+    def record_tick(self, epoch: int, received_at: Optional[float] = None):
+        self.tick_offsets.add((received_at or time.time()) - epoch)
+
+    def record_loop_lag(self, lag: float):
+        self.loop_lag.add(max(0.0, lag))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "round_trip": {name: histogram.summary() for name, histogram in self.round_trips.items()},
+            "ping_timeouts": dict(self.timeouts),
+            "tick_offset": self.tick_offsets.summary(),
+            "loop_lag": self.loop_lag.summary(),
+            "spike_threshold_ms": self.spike_threshold * 1000,
+            "spike_count": self.spike_count,
+            "recent_spikes": [{"time": at, "connection": name} for at, name in self.spikes]
+        }
@@ -0,0 +1,282 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Mapping, Set
+
+logger = logging.getLogger(__name__)
+
+# Markets whose symbols usually stream ticks
+TICK_STREAM_MARKETS = ("forex", "indices", "commodities")
+TICK_STREAM_PREFIXES = ("frx", "r_", "wld", "1hz")
+NUMERIC_FIELDS = ("pip", "min_stake", "max_stake", "spot")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def annotate_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Sort an active_symbols list and add `has_tick_stream`, in place."""
+    markets.sort(key=lambda x: (x.get("market", ""), x.get("display_name", "")))
+    for symbol in markets:
+        market_type = symbol.get("market", "").lower()
+        symbol_code = symbol.get("symbol", "").lower()
+
+        # Forex, major indices, and commodities usually have tick streams
+        symbol["has_tick_stream"] = (market_type in TICK_STREAM_MARKETS or
+                                     any(prefix in symbol_code for prefix in TICK_STREAM_PREFIXES))
+
+        # "full" listings carry numbers as strings
+        for field in NUMERIC_FIELDS:
+            if field in symbol:
+                symbol[field] = float(symbol[field]) if symbol[field] else None
+    return markets
+
+
+def is_open(symbol: Dict[str, Any]) -> bool:
+    return bool(symbol.get("exchange_is_open", 1)) and not symbol.get("is_trading_suspended", 0)
+
+
+class MarketIndex:
+    """Lookup structures over one annotated active_symbols list.
+
+    Built once per catalog refresh. Filters resolve to sets of positions
+    in the (sorted) list, so results keep catalog order and queries never
+    scan the whole universe.
+    """
+
+    FILTERS = ("market", "submarket", "symbol_type")
+
+    def __init__(self, markets: List[Dict[str, Any]]):
+        self.markets = markets
+        self.by_symbol: Dict[str, Dict[str, Any]] = {}
+        self.by_field: Dict[str, Dict[str, Set[int]]] = {field: {} for field in self.FILTERS}
+        self.by_open: Dict[bool, Set[int]] = {True: set(), False: set()}
+        # (word, position) for every word of every display name, for prefix search
+        self._words: List[tuple] = []
+
+        for position, symbol in enumerate(markets):
+            self.by_symbol[symbol.get("symbol")] = symbol
+            for field in self.FILTERS:
+                self.by_field[field].setdefault(symbol.get(field) or "", set()).add(position)
+            self.by_open[is_open(symbol)].add(position)
+            for word in set(symbol.get("display_name", "").lower().split()):
+                self._words.append((word, position))
+        self._words.sort()
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.by_symbol.get(symbol)
+
+    def values(self, field: str) -> List[str]:
+        """Distinct values of an indexed field, for building filter menus."""
+        return sorted(value for value in self.by_field[field] if value)
+
+    def search(self, text: str) -> Set[int]:
+        """Positions whose display name has a word starting with each word of `text`."""
+        words = self._words
+        matches = None
+        for prefix in text.lower().split():
+            found = set()
+            for i in range(bisect.bisect_left(words, (prefix,)), len(words)):
+                word, position = words[i]
+                if not word.startswith(prefix):
+                    break
+                found.add(position)
+            matches = found if matches is None else matches & found
+        return matches if matches is not None else set(range(len(self.markets)))
+
+    def query(self, market: Optional[str] = None, submarket: Optional[str] = None,
+              symbol_type: Optional[str] = None, open_only: Optional[bool] = None, search: Optional[str] = None,
+              offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Filtered, paginated markets plus the total number of matches."""
+        candidates: List[Set[int]] = []
+        for field, value in (("market", market), ("submarket", submarket), ("symbol_type", symbol_type)):
+            if value is not None:
+                candidates.append(self.by_field[field].get(value, set()))
+        if open_only is not None:
+            candidates.append(self.by_open[open_only])
+        if search:
+            candidates.append(self.search(search))
+
+        if candidates:
+            candidates.sort(key=len)
+            positions = sorted(set.intersection(*candidates))
+        else:
+            positions = range(len(self.markets))
+
+        total = len(positions)
+        end = total if limit is None else offset + limit
+        return {
+            "markets": [self.markets[position] for position in positions[offset:end]],
+            "total": total,
+            "offset": offset,
+            "limit": limit
+        }
+
+    def query_args(self, args: Mapping[str, str]) -> Dict[str, Any]:
+        """Run `query` from request arguments (market, submarket, symbol_type, open, q, offset, limit).
+
+        Without `limit` every match is returned, as /api/markets always did.
+        Raises ValueError for malformed numbers.
+        """
+        limit = args.get("limit")
+        if limit is not None:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        elif args.get("offset") is not None:
+            limit = DEFAULT_PAGE_SIZE
+        open_arg = args.get("open")
+        return self.query(
+            market=args.get("market"),
+            submarket=args.get("submarket"),
+            symbol_type=args.get("symbol_type"),
+            open_only=None if open_arg is None else open_arg.lower() in ("1", "true", "yes"),
+            search=args.get("q"),
+            offset=max(0, int(args.get("offset") or 0)),
+            limit=limit
+        )
+
+
+class MarketCatalog:
+    """Cached, annotated active_symbols list with a TTL, persisted to disk.
+
+    Markets are served from memory. Once they are older than
+    `refresh_after` of the TTL they are still served while a refresh runs
+    in the background; only an empty catalog makes the caller wait. The
+    list is written to `path` after each refresh and read back on start,
+    so markets are available before the first request to Deriv.
+    """
+
+    refresh_after = 0.8
+
+    def __init__(self, detail: str = "brief", ttl: float = 3600, path: Optional[str] = None):
+        self.detail = detail
+        self.ttl = ttl
+        self.path = path or f"market_catalog_{detail}.json"
+        self.markets: List[Dict[str, Any]] = []
+        self.index = MarketIndex(self.markets)
+        self.fetched_at = 0.0
+        self._loaded = False
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "failed_refreshes": 0
+        }
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at if self.fetched_at else float("inf")
+
+    def ensure_loaded(self) -> "MarketCatalog":
+        if not self._loaded:
+            self._load()
+        return self
+
+    def _load(self):
+        """Read the catalog persisted by a previous run, if any."""
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            self.markets = cached["markets"]
+            self.index = MarketIndex(self.markets)
+            self.fetched_at = cached["fetched_at"]
+            logger.info(f"📂 Loaded {len(self.markets)} cached markets ({self.age:.0f}s old)")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable market cache {self.path}: {e}")
+
+    def _save(self, markets: List[Dict[str, Any]], fetched_at: float):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"detail": self.detail, "fetched_at": fetched_at, "markets": markets}, f)
+        os.replace(temp_path, self.path)
+
+    async def get_markets(self, fetch: Callable[[str], Awaitable[Optional[List[Dict[str, Any]]]]],
+                          force: bool = False) -> List[Dict[str, Any]]:
+        """Annotated markets, calling `fetch(detail)` for the raw list when a refresh is due."""
+        self.ensure_loaded()
+
+        if not self.markets or force:
+            self.metrics["misses"] += 1
+            await self._start_refresh(fetch)
+            return self.markets
+
+        self.metrics["hits"] += 1
+        if self.age > self.ttl * self.refresh_after:
+            self._start_refresh(fetch)
+        return self.markets
+
+    def _start_refresh(self, fetch) -> asyncio.Task:
+        """Run a single refresh at a time; concurrent callers share it."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh(fetch))
+        return self._refresh_task
+
+    async def _refresh(self, fetch):
+        try:
+            markets = await fetch(self.detail)
+        except Exception as e:
+            self.metrics["failed_refreshes"] += 1
+            logger.error(f"❌ Failed to refresh market catalog: {e}")
+            return
+        if not markets:
+            self.metrics["failed_refreshes"] += 1
+            logger.warning("⚠️ Market catalog refresh returned no markets, keeping cached list")
+            return
+
+        self.markets = annotate_markets(markets)
+        self.index = MarketIndex(self.markets)
+        self.fetched_at = time.time()
+        self.metrics["refreshes"] += 1
+        logger.info(f"✅ Market catalog refreshed: {len(self.markets)} markets")
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._save, self.markets, self.fetched_at)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist market catalog: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["detail"] = self.detail
+        stats["markets"] = len(self.markets)
+        stats["age"] = self.age if self.fetched_at else None
+        stats["ttl"] = self.ttl
+        return stats
+
+
+_catalogs: Dict[str, MarketCatalog] = {}
+
+
+def get_catalog(detail: str = "brief") -> MarketCatalog:
+    """Process-wide catalog for an active_symbols detail level ("brief" or "full")."""
+    catalog = _catalogs.get(detail)
+    if catalog is None:
+        catalog = _catalogs[detail] = MarketCatalog(detail)
+    return catalog
+
+
+def loaded_catalog() -> Optional[MarketCatalog]:
+    """The freshest catalog with markets in this process or on disk, for code without a Deriv client."""
+    catalogs = [get_catalog(detail).ensure_loaded() for detail in ("full", "brief")]
+    catalogs = [catalog for catalog in catalogs if catalog.markets]
+    return max(catalogs, key=lambda catalog: catalog.fetched_at) if catalogs else None
+
+
+def to_trading_market(symbol: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape used by the trading API: id, name, description and type."""
+    market = symbol.get("market", "")
+    return {
+        "id": symbol.get("symbol"),
+        "name": symbol.get("display_name"),
+        "description": symbol.get("submarket_display_name") or symbol.get("market_display_name") or "",
+        "type": "synthetic" if market == "synthetic_index" else market,
+        "is_open": is_open(symbol)
+    }
@@ -1,14 +1,36 @@
 import asyncio
-import json
 import time
-import websockets
 import logging
 from typing import Optional, List, Dict, Any, Callable
+from utils.deriv_connection import DerivAPIError, DerivConnectionPool
+from utils.latency import LatencyMonitor
+from utils.market_catalog import get_catalog
+from utils.shared_ticks import SharedTickWriter
+from utils.tick_store import get_tick_store
+from utils.tick_trace import TickTracer
+from utils.tick_subscriptions import TickSubscriptionManager
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
 class NativeDerivClient:
+    # Settings applied without a restart; see _on_setting_changed
+    LIVE_SETTINGS = (
+        'telegram_enabled',
+        'telegram_notification_interval',
+        'max_ticks_display',
+        'tick_tracing_enabled',
+        'market_catalog_ttl',
+        'deriv_ping_interval',
+        'deriv_latency_spike_ms',
+        'tick_store_enabled',
+        'shared_ticks_enabled'
+    )
+
+    # Contract messages forwarded to event listeners as "trade" events
+    TRADE_MESSAGES = ('buy', 'sell', 'proposal_open_contract', 'transaction')
+
     def __init__(self, app_id: str = None):
         # Import config here to avoid circular imports
         from utils.config import DERIV_APP_ID, DERIV_API_TOKEN
@@ -18,39 +40,155 @@ class NativeDerivClient:
         
 
         
-        # Get notification interval from database
         from database import db
-        self.telegram_notification_interval = int(db.get_setting('telegram_notification_interval') or 30)
-        self.websocket = None
-        self.is_connected = False
         self.account_balance = None
         self.account_currency = None
         self.account_type = None
         self.login_id = None
         self.account_details = None
         self.active_symbols = []
-        self.latest_ticks = []
+        # Shared, disk-backed active_symbols cache
+        self.market_catalog = get_catalog("brief")
         self.max_ticks = 1000
+        # Every active ticks subscription, each with its own buffer
+        self.subscriptions = TickSubscriptionManager(max_ticks=self.max_ticks)
+        # Symbol currently shown on the dashboard
         self.current_symbol = None
-        self.subscription_id = None
         self.tick_stream_available = False
         self.last_tick_time = time.time()
         
+        # Gap backfill via ticks_history, one task per symbol
+        self.backfill_batch_size = 1000
+        self._backfill_ranges: Dict[str, tuple] = {}
+        self._backfill_tasks: Dict[str, asyncio.Task] = {}
+        # Forgets for stray tick streams, one per subscription id
+        self._forget_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Timeouts applied to every pooled connection
+        self.request_timeout = 5.0
+        self.connect_timeout = 15.0
+        
+        # Ping round trips and tick offsets; sustained slow pings force a reconnect
+        self.ping_interval = 10.0
+        self.latency = LatencyMonitor()
+        self._ping_task: Optional[asyncio.Task] = None
+        
+        # Per-stage latency of each tick, from socket read to SSE delivery
+        self.tracer = TickTracer()
+        
+        # Durable tick history, written in batches off the tick path
+        self.tick_store = get_tick_store()
+        
+        # Per-symbol shared-memory rings other processes can read live ticks from
+        self.shared_ticks = SharedTickWriter()
+        
         # Callback for frontend updates
         self.frontend_callback: Optional[Callable] = None
         
+        # Receivers of (topic, data) events, e.g. the bus that feeds API worker processes
+        self._event_listeners: List[Callable[[str, Any], None]] = []
+        
         # Telegram bot for notifications
         self.telegram_bot = None
+        self.telegram_enabled = False
+        self.telegram_notification_interval = 30
         self.last_telegram_notification = 0
+        self.max_ticks_display = 100
         
         # WebSocket URL
         self.ws_url = "wss://ws.binaryws.com/websockets/v3?app_id=" + self.app_id
+        
+        # Control connection for account calls plus stream connections for ticks
+        self.pool = DerivConnectionPool(
+            self.ws_url,
+            on_message=self._process_message,
+            on_ready=self._on_connection_ready,
+            on_tick=self._handle_tick,
+            stream_connections=int(db.get_setting('deriv_stream_connections') or 2),
+            policy=db.get_setting('deriv_stream_policy') or 'least_loaded',
+            queue_size=int(db.get_setting('deriv_ingest_queue_size') or 1000),
+            queue_policy=db.get_setting('deriv_ingest_policy') or 'block'
+        )
+        
+        # Settings read on the tick path live in attributes kept current by the settings cache
+        for key in self.LIVE_SETTINGS:
+            self._on_setting_changed(key, db.get_setting(key))
+            db.subscribe(key, self._on_setting_changed)
+
+    def _on_setting_changed(self, key, value):
+        """Apply a changed setting; None means it was deleted and the default applies."""
+        if key == 'telegram_enabled':
+            self.telegram_enabled = value == 'true'
+        elif key == 'telegram_notification_interval':
+            self.telegram_notification_interval = int(value or 30)
+        elif key == 'max_ticks_display':
+            self.max_ticks_display = int(value or 100)
+        elif key == 'tick_tracing_enabled':
+            self.tracer.enabled = (value or 'true') == 'true'
+        elif key == 'market_catalog_ttl':
+            self.market_catalog.ttl = float(value or 3600)
+        elif key == 'deriv_ping_interval':
+            self.ping_interval = float(value or 10)
+        elif key == 'deriv_latency_spike_ms':
+            self.latency.spike_threshold = float(value or 2000) / 1000
+        elif key == 'tick_store_enabled':
+            self.tick_store.enabled = (value or 'true') == 'true'
+        elif key == 'shared_ticks_enabled':
+            self.shared_ticks.enabled = (value or 'true') == 'true'
+
+    @property
+    def websocket(self):
+        return self.pool.control.websocket
+
+    @property
+    def is_connected(self):
+        return self.pool.control.is_connected
 
     def set_frontend_callback(self, callback: Callable):
         """Set callback function for frontend updates."""
         self.frontend_callback = callback
         logger.info("Frontend callback set")
 
+    def add_event_listener(self, callback: Callable[[str, Any], None]):
+        """Call `callback(topic, data)` for tick, backfill, account, trade and status events."""
+        self._event_listeners.append(callback)
+
+    def _emit(self, topic, data):
+        for callback in self._event_listeners:
+            try:
+                callback(topic, data)
+            except Exception as e:
+                logger.error(f"Error in {topic} event listener: {e}")
+
+    def get_status(self):
+        """Connection, subscription and account state, as mirrored by API worker processes."""
+        return {
+            "current_symbol": self.current_symbol,
+            "subscription_id": self.subscription_id,
+            "tick_stream_available": self.tick_stream_available,
+            "last_tick_time": self.last_tick_time,
+            "total_ticks": self.subscriptions.total_ticks(),
+            "subscriptions": self.get_subscriptions(),
+            "is_connected": self.is_connected,
+            "account_balance": self.account_balance,
+            "account_currency": self.account_currency,
+            "account_type": self.account_type,
+            "login_id": self.login_id,
+            "account_details": self.account_details,
+            "app_id": self.app_id,
+            "token_configured": bool(self.token),
+            "max_ticks_display": self.max_ticks_display
+        }
+
+    def get_buffered_ticks(self, symbol):
+        """Every buffered tick of a symbol as [epoch, quote, bid, ask, flags] rows, oldest first."""
+        subscription = self.subscriptions.get(symbol)
+        if subscription is None:
+            return {"symbol": symbol, "pip_size": None, "seq": 0, "ticks": []}
+        buffer = subscription.ticks
+        return {"symbol": symbol, "pip_size": buffer.pip_size, "seq": buffer.count,
+                "ticks": buffer.last(len(buffer)).rows()}
+
     def set_telegram_bot(self, telegram_bot):
         """Set Telegram bot for notifications."""
         self.telegram_bot = telegram_bot
@@ -62,24 +200,101 @@ class NativeDerivClient:
         logger.info("Main loop set for async operations")
 
     async def connect(self):
-        """Connect to Deriv WebSocket API."""
-        try:
-            logger.info(f"🔌 Connecting to Deriv WebSocket: {self.ws_url}")
-            self.websocket = await websockets.connect(self.ws_url)
-            self.is_connected = True
-            logger.info("✅ WebSocket connected successfully")
-            
-            # Start message handler
-            asyncio.create_task(self._handle_messages())
-            
-            # Authorize connection
+        """Connect to Deriv WebSocket API.
+        
+        Starts the supervised control and stream connections, which keep
+        reconnecting for the lifetime of the client, and waits for the
+        control session to be authorized.
+        """
+        self.pool.configure(request_timeout=self.request_timeout)
+        self.pool.start()
+        if self._ping_task is None or self._ping_task.done():
+            self._ping_task = asyncio.create_task(self._ping_loop())
+        self.tick_store.start()
+        
+        if await self.pool.control.wait_ready(self.connect_timeout):
+            return True
+        logger.error(f"❌ Failed to connect within {self.connect_timeout}s, still retrying in background")
+        return False
+
+    async def _on_connection_ready(self, connection):
+        """Prepare a freshly (re)connected socket before it serves callers."""
+        if connection is self.pool.control:
             await self._authorize()
+        await self._restore_subscriptions(connection)
+
+    def get_connection_metrics(self):
+        """Reconnect counts and downtime of the control connection, plus per-connection load."""
+        metrics = self.pool.control.get_metrics()
+        metrics["pool"] = {
+            "policy": self.pool.policy,
+            "connections": self.pool.stats()
+        }
+        return metrics
+
+    def get_tick_trace_stats(self):
+        """Per-stage tick latency histograms."""
+        return self.tracer.stats()
+
+    def get_latency_stats(self):
+        """p50/p95/p99 ping round trips per connection, tick offsets and loop lag."""
+        stats = self.latency.stats()
+        stats["ping_interval"] = self.ping_interval
+        return stats
+
+    async def _ping_loop(self):
+        """Ping every ready connection each ping_interval seconds."""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.ping_interval)
+            self.latency.record_loop_lag(time.monotonic() - started - self.ping_interval)
             
-            return True
+            connections = [connection for connection in self.pool.connections() if connection.is_ready]
+            await asyncio.gather(*(self._ping(connection) for connection in connections))
+
+    async def _ping(self, connection):
+        started = time.monotonic()
+        try:
+            await connection.request({"ping": 1})
+            rtt = time.monotonic() - started
+        except asyncio.TimeoutError:
+            rtt = None
         except Exception as e:
-            logger.error(f"❌ Failed to connect: {e}")
-            self.is_connected = False
-            return False
+            # Dropped sockets are handled by the connection's supervisor
+            logger.debug(f"Ping on {connection.name} failed: {e}")
+            return
+        
+        if self.latency.record_ping(connection.name, rtt):
+            threshold_ms = self.latency.spike_threshold * 1000
+            await connection.reconnect(f"{self.latency.spike_count} pings over {threshold_ms:.0f}ms")
+
+    async def _restore_subscriptions(self, connection):
+        """Resubscribe the symbols carried by a reconnected socket; old stream ids are dead."""
+        symbols = self.pool.symbols_on(connection)
+        if not symbols:
+            return
+        
+        self.subscriptions.reset_subscription_ids(symbols)
+        logger.info(f"🔄 Restoring {len(symbols)} tick subscription(s) on {connection.name}")
+        
+        async def resubscribe(symbol):
+            try:
+                response = await connection.request({"ticks": symbol, "subscribe": 1}, wait_ready=False)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ No tick yet for {symbol} after resubscribing")
+                return
+            except Exception as e:
+                logger.error(f"❌ Failed to restore subscription for {symbol}: {e}")
+                return
+            subscription = self.subscriptions.get(symbol)
+            subscription_id = response.get("subscription", {}).get("id")
+            if subscription_id and subscription is None:
+                # Unsubscribed while the request was in flight
+                self._forget_stray(subscription_id, connection)
+            elif subscription_id:
+                self.subscriptions.bind(subscription, subscription_id)
+        
+        await asyncio.gather(*(resubscribe(symbol) for symbol in symbols))
 
     async def _authorize(self):
         """Authorize the connection."""
@@ -92,35 +307,18 @@ class NativeDerivClient:
                 "authorize": self.app_id
             }
         
-        success = await self.send_request(request)
-        if not success:
-            logger.error("❌ Failed to send authorization request")
-
-    async def _handle_messages(self):
-        """Handle incoming WebSocket messages."""
         try:
-            async for message in self.websocket:
-                try:
-                    data = json.loads(message)
-                    await self._process_message(data)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error decoding message: {e}")
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-        except websockets.exceptions.ConnectionClosed:
-            logger.warning("WebSocket connection closed")
-            self.is_connected = False
+            await self.pool.control.request(request, wait_ready=False)
+        except DerivAPIError as e:
+            logger.error(f"❌ Authorization rejected: {e}")
         except Exception as e:
-            logger.error(f"Message handler error: {e}")
-            self.is_connected = False
+            logger.error(f"❌ Failed to authorize: {e}")
 
-    async def _process_message(self, data):
+    async def _process_message(self, data, connection=None):
         """Process incoming messages."""
         msg_type = data.get("msg_type")
         
-        if msg_type == "tick":
-            await self._handle_tick(data)
-        elif msg_type == "active_symbols":
+        if msg_type == "active_symbols":
             await self._handle_active_symbols(data)
         elif msg_type == "balance":
             await self._handle_balance(data)
@@ -128,75 +326,159 @@ class NativeDerivClient:
             await self._handle_authorize(data)
         elif msg_type == "get_account_details":
             await self._handle_account_details(data)
+        elif msg_type in self.TRADE_MESSAGES:
+            self._emit("trade", data)
         elif "error" in data:
             logger.error(f"API Error: {data['error']}")
         else:
             logger.debug(f"Unhandled message type: {msg_type}")
 
-    async def _handle_tick(self, data):
-        """Handle tick data."""
-        tick_data = data.get("tick", {})
+    async def _handle_tick(self, tick, connection=None):
+        """Handle a decoded TickRecord."""
+        trace = self.tracer.start(connection.received_at if connection else None)
+        if trace:
+            trace.mark("queue")
+        
+        subscription = self.subscriptions.route(tick.symbol, tick.subscription_id)
+        if subscription is None:
+            # Stream left over from a symbol we already unsubscribed from
+            if tick.subscription_id:
+                self._forget_stray(tick.subscription_id, connection)
+            return
+        
+        # Update tick stream status
+        self.tick_stream_available = True
+        self.last_tick_time = time.time()
+        self.latency.record_tick(tick.epoch, self.last_tick_time)
+        
+        # Store subscription ID if present
+        if tick.subscription_id:
+            self.subscriptions.bind(subscription, tick.subscription_id)
+        
+        # Add to this symbol's buffer, backfilling any ticks the stream skipped
+        gap = subscription.add_tick(tick)
+        if gap:
+            self._schedule_backfill(subscription.symbol, *gap)
+        self.tick_store.add(subscription.symbol, tick.epoch, tick.quote, tick.bid, tick.ask)
+        self.shared_ticks.write(subscription.symbol, tick.epoch, tick.quote, tick.bid, tick.ask)
+        if self._event_listeners:
+            self._emit("tick", {"symbol": subscription.symbol, "seq": subscription.seq, "epoch": tick.epoch,
+                                "quote": tick.quote, "bid": tick.bid, "ask": tick.ask, "pip_size": tick.pip_size})
+        if trace:
+            trace.mark("store")
+        
+        # Send Telegram notification
+        self._send_telegram_notification(tick)
+        if trace:
+            trace.mark("telegram")
+        
+        # Trigger real-time update to frontend via callback
+        self._trigger_frontend_update(subscription.symbol, trace, delta=True)
+
+    def _forget_stray(self, subscription_id, connection=None):
+        """Forget a stream nobody is subscribed to, in the background so tick processing never waits on the scheduler."""
+        if subscription_id in self._forget_tasks:
+            return
+        logger.debug(f"Forgetting stray tick stream {subscription_id}")
+        task = asyncio.create_task((connection or self.pool.control).send({"forget": subscription_id}, wait_ready=False))
+        self._forget_tasks[subscription_id] = task
+        task.add_done_callback(lambda _: self._forget_tasks.pop(subscription_id, None))
+    
+    def _schedule_backfill(self, symbol, start, end):
+        """Queue a ticks_history backfill, widening one that is already pending."""
+        pending = self._backfill_ranges.get(symbol)
+        if pending:
+            start, end = min(pending[0], start), max(pending[1], end)
+        self._backfill_ranges[symbol] = (start, end)
+        logger.warning(f"⚠️ Tick gap on {symbol} between epochs {start} and {end}, backfilling")
         
-        if tick_data:
-            # Convert epoch to timestamp if present
-            if "epoch" in tick_data:
-                tick_data["timestamp"] = int(tick_data["epoch"])
-            elif "timestamp" not in tick_data:
-                tick_data["timestamp"] = int(time.time())
+        task = self._backfill_tasks.get(symbol)
+        if task is None or task.done():
+            self._backfill_tasks[symbol] = asyncio.create_task(self._run_backfill(symbol))
+
+    async def _run_backfill(self, symbol):
+        """Fill pending gaps for a symbol until none are left."""
+        while symbol in self._backfill_ranges:
+            start, end = self._backfill_ranges.pop(symbol)
+            try:
+                ticks = await self._fetch_tick_history(symbol, start, end)
+            except Exception as e:
+                logger.error(f"❌ Backfill failed for {symbol}: {e}")
+                continue
             
-            # Ensure required fields are present
-            if "quote" not in tick_data:
-                logger.warning("⚠️ Tick missing quote field, skipping")
+            subscription = self.subscriptions.get(symbol)
+            if subscription is None:
                 return
             
-            # Set default values for optional fields
-            if "bid" not in tick_data:
-                tick_data["bid"] = tick_data["quote"]
-            if "ask" not in tick_data:
-                tick_data["ask"] = tick_data["quote"]
-            
-            # Update tick stream status
-            self.tick_stream_available = True
-            self.last_tick_time = time.time()
-            
-            # Store subscription ID if present
-            if "subscription" in data and "id" in data["subscription"]:
-                self.subscription_id = data["subscription"]["id"]
-            
-            # Add symbol to tick data if not present
-            if "symbol" not in tick_data and self.current_symbol:
-                tick_data["symbol"] = self.current_symbol
-            
-            # Add all ticks but mark if they're from the subscribed symbol
-            tick_data["is_subscribed_symbol"] = (self.current_symbol and tick_data.get("symbol") == self.current_symbol)
-            
-            # Add to latest ticks
-            self.latest_ticks.append(tick_data)
-            if len(self.latest_ticks) > self.max_ticks:
-                self.latest_ticks = self.latest_ticks[-self.max_ticks:]
-            
-            # Log tick received (reduced for performance)
-            # Tick data received
-            
-            # Send Telegram notification
-            self._send_telegram_notification(tick_data)
-            
-            # Trigger real-time update to frontend via callback
-            self._trigger_frontend_update()
-            
+            self.tick_store.add_many(symbol, ticks)
+            added = subscription.merge_backfill(ticks)
+            if added:
+                logger.info(f"🧩 Backfilled {added} tick(s) for {symbol}")
+                self._emit("backfill", {"symbol": symbol, "added": added})
+                self._trigger_frontend_update(symbol)
 
+    async def _fetch_tick_history(self, symbol, start, end):
+        """Fetch ticks with start <= epoch <= end in newest-first batches.
+        
+        Stops once the symbol's buffer would be full, since older ticks
+        would be evicted straight away.
+        """
+        # History payloads travel on the symbol's stream connection, not the control one
+        connection = self.pool.connection_for(symbol) or self.pool.control
+        ticks = []
+        cursor = end
+        while cursor >= start and len(ticks) < self.max_ticks:
+            count = min(self.backfill_batch_size, self.max_ticks - len(ticks))
+            response = await connection.request({
+                "ticks_history": symbol,
+                "start": start,
+                "end": cursor,
+                "style": "ticks",
+                "count": count
+            })
+            history = response.get("history", {})
+            times = history.get("times", [])
+            prices = history.get("prices", [])
+            for epoch, price in zip(times, prices):
+                epoch = int(epoch)
+                if start <= epoch <= end:
+                    ticks.append((epoch, float(price), float(price), float(price)))
+            
+            if len(times) < count:
+                break
+            cursor = min(int(epoch) for epoch in times) - 1
+        return ticks
 
-    def _trigger_frontend_update(self):
-        """Trigger real-time update to frontend via callback."""
+    def _trigger_frontend_update(self, symbol=None, trace=None, delta=False):
+        """Trigger real-time update to frontend via callback.
+        
+        With `delta`, only the newest tick is sent ("tick_delta"); otherwise
+        the full latest-ticks snapshot ("tick_update"), e.g. after a
+        backfill rewrote older ticks. The callback receives the tick's
+        trace and is responsible for finishing it once the update is
+        delivered.
+        """
         try:
             # Get current ticks data
-            ticks_data = self.get_latest_ticks()
+            if delta:
+                ticks_data, update_type = self.get_tick_delta(symbol), "tick_delta"
+            else:
+                ticks_data, update_type = self.get_latest_ticks(symbol), "tick_update"
+            if ticks_data is None:
+                # The symbol was unsubscribed since the tick arrived
+                if trace:
+                    trace.finish()
+                return
+            if trace:
+                trace.mark("snapshot")
             
             # Call frontend callback if set
             if self.frontend_callback:
-                self.frontend_callback(ticks_data)
+                self.frontend_callback(ticks_data, trace, update_type)
             else:
                 logger.warning("⚠️ No frontend callback set")
+                if trace:
+                    trace.finish()
                 
         except Exception as e:
             logger.error(f"Error triggering frontend update: {e}")
@@ -207,9 +489,7 @@ class NativeDerivClient:
         """Send Telegram notification for new tick."""
         try:
             # Check if Telegram notifications are enabled
-            from database import db
-            telegram_enabled = db.get_setting('telegram_enabled')
-            if telegram_enabled != 'true':
+            if not self.telegram_enabled:
                 # Telegram notifications disabled
                 return
             
@@ -276,8 +556,7 @@ class NativeDerivClient:
     async def _handle_active_symbols(self, data):
         """Handle active symbols response."""
         if "active_symbols" in data:
-            self.active_symbols = data["active_symbols"]
-            logger.info(f"Received {len(self.active_symbols)} active symbols")
+            logger.info(f"Received {len(data['active_symbols'])} active symbols")
     
     async def _handle_balance(self, data):
         """Handle balance response."""
@@ -286,6 +565,7 @@ class NativeDerivClient:
             if "balance" in balance_data:
                 self.account_balance = balance_data["balance"]
                 logger.info(f"Account balance: {self.account_balance}")
+                self._emit("account", {"account_balance": self.account_balance})
             else:
                 logger.warning("Balance data structure unexpected")
         else:
@@ -327,56 +607,47 @@ class NativeDerivClient:
             self.account_details = auth_data
             
             logger.info(f"✅ Authorization successful. Balance: {self.account_balance} {self.account_currency}")
+            self._emit("account", {
+                "account_balance": self.account_balance,
+                "account_currency": self.account_currency,
+                "account_type": self.account_type,
+                "login_id": self.login_id,
+                "account_details": self.account_details
+            })
             return True
         else:
             logger.warning("Unexpected authorization response format")
             return False
     
-    async def send_request(self, request):
-        """Send a request to the API."""
-        if not self.is_connected or not self.websocket:
-            await self.connect()
+    async def send_request(self, request, wait_ready: bool = True, priority: Optional[int] = None):
+        """Send a request over the control connection without waiting for a reply.
         
-        try:
-            await self.websocket.send(json.dumps(request))
-            return True
-        except Exception as e:
-            logger.error(f"❌ Failed to send request: {e}")
-            return False
+        `priority` overrides the outbound scheduler's default for the call
+        type (lower goes first).
+        """
+        return await self.pool.control.send(request, wait_ready, priority)
     
-    async def get_active_symbols(self):
-        """Get active symbols."""
+    async def request(self, request, timeout: Optional[float] = None, wait_ready: bool = True,
+                      priority: Optional[int] = None):
+        """Send a request over the control connection and wait for its reply.
+        
+        See DerivConnection.request for the errors raised.
+        """
+        return await self.pool.control.request(request, timeout, wait_ready, priority)
+    
+    async def get_active_symbols(self, force_refresh: bool = False):
+        """Get active symbols, sorted and annotated, from the market catalog cache."""
+        self.active_symbols = await self.market_catalog.get_markets(self._fetch_active_symbols, force_refresh)
+        return self.active_symbols
+    
+    async def _fetch_active_symbols(self, detail):
+        """Request the raw active_symbols list from Deriv."""
         request = {
-            "active_symbols": "brief",
+            "active_symbols": detail,
             "product_type": "basic"
         }
-        
-        success = await self.send_request(request)
-        if success:
-            # Wait a bit for response and retry if needed
-            for _ in range(5):  # Try up to 5 times
-                await asyncio.sleep(1)
-                if self.active_symbols:
-                    # Sort by market and then by symbol name for better organization
-                    self.active_symbols.sort(key=lambda x: (x.get("market", ""), x.get("display_name", "")))
-                    
-                    # Add a field to indicate which symbols are likely to have tick streams
-                    for symbol in self.active_symbols:
-                        market_type = symbol.get("market", "").lower()
-                        symbol_code = symbol.get("symbol", "").lower()
-                        
-                        # Forex, major indices, and commodities usually have tick streams
-                        if (market_type in ["forex", "indices", "commodities"] or 
-                            any(prefix in symbol_code for prefix in ["frx", "r_", "wld", "1hZ"])):
-                            symbol["has_tick_stream"] = True
-                        else:
-                            symbol["has_tick_stream"] = False
-                    
-                    return self.active_symbols
-            
-            # If we still don't have symbols, return empty list
-            return []
-        return []
+        response = await self.request(request, timeout=8)
+        return response.get("active_symbols")
     
     async def get_balance(self):
         """Get account balance."""
@@ -388,15 +659,12 @@ class NativeDerivClient:
             "balance": 1
         }
         
-        success = await self.send_request(request)
-        if success:
-            # Wait for response
-            await asyncio.sleep(1)
-            # The balance will be handled in _process_message
-            return self.account_balance or 0
-        else:
-            logger.error("❌ Failed to send balance request")
-            return 0
+        try:
+            # The balance itself is stored by _handle_balance
+            await self.request(request)
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch balance: {e}")
+        return self.account_balance or 0
     
     async def get_account_details(self):
         """Get detailed account information."""
@@ -404,97 +672,137 @@ class NativeDerivClient:
             "get_account_details": 1
         }
         
-        success = await self.send_request(request)
-        if success:
-            await asyncio.sleep(1)
-            return self.account_details
-        return {}
+        try:
+            await self.request(request)
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch account details: {e}")
+            return {}
+        return self.account_details
     
 
     
+    @property
+    def subscription_id(self):
+        """Subscription ID of the symbol shown on the dashboard."""
+        subscription = self.subscriptions.get(self.current_symbol)
+        return subscription.subscription_id if subscription else None
+    
     async def subscribe_to_ticks(self, symbol):
-        """Subscribe to tick updates for a specific symbol."""
-        # Unsubscribe from any existing subscription
-        await self.unsubscribe_from_ticks()
+        """Subscribe to tick updates for a specific symbol.
         
-        # Clear previous ticks and set new symbol
-        self.latest_ticks = []
+        Other active subscriptions are left untouched; the symbol becomes
+        the one shown on the dashboard.
+        """
         self.current_symbol = symbol
-        self.tick_stream_available = False
-        self.last_tick_time = time.time()
         
-        logger.info(f"🔄 Switching to symbol: {symbol}")
+        if symbol in self.subscriptions:
+            logger.info(f"🔄 Switching to already subscribed symbol: {symbol}")
+            self._emit("status", self.get_status())
+            return {"status": "subscribed", "symbol": symbol}
+        
+        subscription = self.subscriptions.add(symbol)
+        connection = self.pool.assign(symbol)
+        logger.info(f"🔄 Subscribing to symbol: {symbol} on {connection.name}")
         
         request = {
             "ticks": symbol,
             "subscribe": 1
         }
         
-        success = await self.send_request(request)
-        if success:
-            logger.info(f"✅ Subscribed to ticks for {symbol}")
+        try:
+            # The first reply to a subscribe request is the first tick
+            response = await connection.request(request)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ No tick yet for {symbol}, keeping subscription open")
+            self._emit("status", self.get_status())
             return {"status": "subscribed", "symbol": symbol}
-        else:
-            logger.error(f"❌ Failed to subscribe to {symbol}")
-            return {"status": "error", "message": f"Failed to subscribe to {symbol}"}
+        except Exception as e:
+            logger.error(f"❌ Failed to subscribe to {symbol}: {e}")
+            if self.subscriptions.get(symbol) is subscription:
+                self.subscriptions.remove(symbol)
+                self.pool.release(symbol)
+            if self.current_symbol == symbol:
+                self.current_symbol = None
+            return {"status": "error", "message": f"Failed to subscribe to {symbol}: {e}"}
+        
+        subscription_id = response.get("subscription", {}).get("id")
+        if self.subscriptions.get(symbol) is not subscription:
+            # Unsubscribed while the request was in flight; its stream has no buffer left to feed
+            logger.info(f"🔄 {symbol} was unsubscribed before its subscription completed")
+            if subscription_id:
+                self._forget_stray(subscription_id, connection)
+            return {"status": "unsubscribed", "symbol": symbol}
+        if subscription_id:
+            self.subscriptions.bind(subscription, subscription_id)
+        
+        logger.info(f"✅ Subscribed to ticks for {symbol}")
+        self._emit("status", self.get_status())
+        return {"status": "subscribed", "symbol": symbol, "subscription_id": subscription_id}
     
-    async def unsubscribe_from_ticks(self):
-        """Unsubscribe from current tick subscription."""
-        logger.info(f"🔄 Starting unsubscribe process...")
+    async def unsubscribe_from_ticks(self, symbol=None):
+        """Unsubscribe from one symbol, by default the one on the dashboard."""
+        symbol = symbol or self.current_symbol
+        subscription = self.subscriptions.remove(symbol) if symbol else None
+        connection = (self.pool.release(symbol) if symbol else None) or self.pool.control
         
-        if self.subscription_id:
-            logger.info(f"🔄 Unsubscribing from subscription ID: {self.subscription_id}")
-            request = {
-                "forget": self.subscription_id
-            }
-            success = await self.send_request(request)
+        if subscription is None:
+            logger.warning("⚠️ No subscription found to unsubscribe")
+        elif subscription.subscription_id:
+            logger.info(f"🔄 Unsubscribing {symbol} (subscription ID: {subscription.subscription_id})")
+            success = await connection.send({"forget": subscription.subscription_id})
             if success:
-                logger.info(f"✅ Successfully unsubscribed from {self.subscription_id}")
+                logger.info(f"✅ Successfully unsubscribed from {subscription.subscription_id}")
             else:
-                logger.error(f"❌ Failed to unsubscribe from {self.subscription_id}")
-            self.subscription_id = None
+                logger.error(f"❌ Failed to unsubscribe from {subscription.subscription_id}")
         else:
-            logger.warning("⚠️ No subscription ID found to unsubscribe")
+            # The stream is forgotten as soon as its first tick shows up
+            logger.info(f"🔄 Unsubscribed {symbol} before its stream started")
         
-        # Clear current symbol and ticks
-        if self.current_symbol:
-            logger.info(f"🔄 Clearing symbol: {self.current_symbol}")
+        if symbol and symbol == self.current_symbol:
+            self.current_symbol = None
         
+        if not len(self.subscriptions):
+            self.tick_stream_available = False
+        self._emit("status", self.get_status())
+        return {"status": "unsubscribed", "symbol": symbol}
+    
+    async def unsubscribe_all(self):
+        """Drop every active tick subscription."""
+        for subscription in self.subscriptions:
+            await self.unsubscribe_from_ticks(subscription.symbol)
         self.current_symbol = None
-        self.latest_ticks = []
         self.tick_stream_available = False
-        logger.info("🧹 Cleared all ticks and reset stream status")
+        logger.info("🧹 Cleared all tick subscriptions")
         return {"status": "unsubscribed"}
     
-    def get_latest_ticks(self):
-        """Get the latest ticks."""
+    def get_subscriptions(self):
+        """Describe every active tick subscription."""
+        return [subscription.to_dict() for subscription in self.subscriptions]
+    
+    def get_latest_ticks(self, symbol=None):
+        """Get the latest ticks for a symbol, by default the one on the dashboard."""
         try:
+            symbol = symbol or self.current_symbol
+            subscription = self.subscriptions.get(symbol)
+            
             # Check if the tick stream is still active
-            if self.current_symbol and time.time() - self.last_tick_time > 10:
+            if not any(sub.is_available() for sub in self.subscriptions):
                 self.tick_stream_available = False
             
-            # Get max ticks display setting from database
-            from database import db
-            max_ticks_display = int(db.get_setting('max_ticks_display') or 100)
-            
-            # Filter ticks for current symbol only
-            if self.current_symbol:
-                filtered_ticks = [tick for tick in self.latest_ticks if tick.get('symbol') == self.current_symbol]
-                filtered_ticks = filtered_ticks[-max_ticks_display:] if filtered_ticks else []
+            if subscription:
+                ticks_data = subscription.snapshot(self.max_ticks_display,
+                                                   is_subscribed_symbol=symbol == self.current_symbol)
             else:
-                filtered_ticks = self.latest_ticks[-max_ticks_display:] if self.latest_ticks else []
+                ticks_data = {"symbol": symbol, "seq": 0, "ticks": [], "available": False,
+                              "last_update": self.last_tick_time}
             
             # Log tick count for debug (reduced)
-            if filtered_ticks:
-                logger.debug(f"🔍 {self.current_symbol}: {len(filtered_ticks)} ticks")
+            if ticks_data["ticks"]:
+                logger.debug(f"🔍 {symbol}: {len(ticks_data['ticks'])} ticks")
             
-            return {
-                "symbol": self.current_symbol,
-                "ticks": filtered_ticks,
-                "available": self.tick_stream_available,
-                "connection_status": "connected" if self.is_connected else "disconnected",
-                "last_update": self.last_tick_time
-            }
+            ticks_data["connection_status"] = "connected" if self.is_connected else "disconnected"
+            ticks_data["max_ticks"] = self.max_ticks_display
+            return ticks_data
         except Exception as e:
             logger.error(f"Error in get_latest_ticks: {e}")
             return {
@@ -505,9 +813,37 @@ class NativeDerivClient:
                 "error": str(e)
             }
     
+    def snapshot_version(self, symbol=None):
+        """A value that changes whenever get_latest_ticks(symbol) would return something else, None if unknown."""
+        symbol = symbol or self.current_symbol
+        subscription = self.subscriptions.get(symbol)
+        if subscription is None:
+            return None
+        return (symbol, subscription.ticks, subscription.seq, subscription.last_tick_time,
+                subscription.is_available(), self.is_connected, self.max_ticks_display, symbol == self.current_symbol)
+
+    def get_tick_delta(self, symbol):
+        """The newest tick of a symbol with its sequence number, see TickSubscription.delta."""
+        subscription = self.subscriptions.get(symbol)
+        if subscription is None:
+            return None
+        ticks_data = subscription.delta(is_subscribed_symbol=symbol == self.current_symbol)
+        ticks_data["connection_status"] = "connected" if self.is_connected else "disconnected"
+        return ticks_data
+    
     async def close(self):
-        """Close the WebSocket connection."""
-        if self.websocket:
-            await self.websocket.close()
-            self.is_connected = False
-            logger.info("WebSocket connection closed")
\ No newline at end of file
+        """Close every WebSocket connection and stop reconnecting."""
+        if self._ping_task:
+            self._ping_task.cancel()
+            self._ping_task = None
+        for task in self._backfill_tasks.values():
+            task.cancel()
+        self._backfill_tasks.clear()
+        for task in list(self._forget_tasks.values()):
+            task.cancel()
+        self._forget_tasks.clear()
+        
+        await self.pool.close()
+        await self.tick_store.close()
+        self.shared_ticks.close()
+        logger.info("WebSocket connection closed")
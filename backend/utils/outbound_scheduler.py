@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+from utils.latency import RollingHistogram
+
+# Lower runs first; calls not listed use DEFAULT_PRIORITY
+PRIORITIES = {
+    "authorize": 0,
+    "buy": 1,
+    "sell": 1,
+    "proposal": 1,
+    "proposal_open_contract": 1,
+    "cancel": 1,
+    "forget": 2,
+    "forget_all": 2,
+    "ping": 2,
+    "ticks": 3,
+    "ticks_history": 3,
+    "balance": 4,
+    "get_account_status": 4,
+    "get_settings": 4,
+    "active_symbols": 5,
+    "asset_index": 5,
+    "trading_times": 5
+}
+DEFAULT_PRIORITY = 4
+
+# Deriv counts calls against separate per-connection limits; everything
+# not listed here falls under "general". Keepalive pings and authorize are
+# not throttled (None): they are a handful per minute and must never queue
+# behind a burst of resubscribes.
+CALL_BUCKETS = {
+    "ping": None,
+    "authorize": None,
+    "buy": "outcome",
+    "sell": "outcome",
+    "cancel": "outcome",
+    "proposal": "pricing",
+    "proposal_open_contract": "pricing"
+}
+
+# (tokens per second, burst) per bucket, under Deriv's published per-minute limits
+# (general 180/min, pricing 60/min, outcome 25/min). A minute of general
+# calls is at most 20 + 150, leaving room for the unthrottled pings (one
+# per 10 s) and authorize, while reconnecting resubscribes 20 symbols at once.
+BUCKET_LIMITS = {
+    "general": (2.5, 20),
+    "pricing": (0.9, 5),
+    "outcome": (0.4, 5)
+}
+
+
+def call_type(request: Dict[str, Any]) -> str:
+    """The API call a request makes, e.g. "ticks" for {"ticks": "R_100", "subscribe": 1}."""
+    for key in request:
+        if key in PRIORITIES or key in CALL_BUCKETS:
+            return key
+    return next(iter(request), "unknown")
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def delay(self) -> float:
+        """Seconds until the next token is available."""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class OutboundScheduler:
+    """Orders and paces the requests written to one Deriv socket.
+
+    Callers submit requests instead of writing them. A flusher task writes
+    them in priority order, so trading calls overtake catalog refreshes,
+    and draws from a token bucket per call category so bursts stay under
+    Deriv's rate limits. Each flush writes every request that currently
+    has a token back to back, up to `batch_size`.
+    """
+
+    def __init__(self, write: Callable[[Dict[str, Any]], Awaitable[bool]], batch_size: int = 20,
+                 limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self._write = write
+        self.batch_size = batch_size
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in (limits or BUCKET_LIMITS).items()}
+        self._heap: List[list] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self.wait_times: Dict[str, RollingHistogram] = {}
+        self.metrics = {
+            "submitted": 0,
+            "sent": 0,
+            "failed": 0,
+            "throttled": 0,
+            "batches": 0,
+            "max_depth": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def submit(self, request: Dict[str, Any], priority: Optional[int] = None) -> bool:
+        """Queue a request and wait until it is written; returns False if writing failed."""
+        kind = call_type(request)
+        if priority is None:
+            priority = PRIORITIES.get(kind, DEFAULT_PRIORITY)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, [priority, next(self._seq), kind, request, future, time.monotonic()])
+
+        metrics = self.metrics
+        metrics["submitted"] += 1
+        if len(self._heap) > metrics["max_depth"]:
+            metrics["max_depth"] = len(self._heap)
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        self._wakeup.set()
+        return await future
+
+    def _take_batch(self) -> Tuple[List[list], Optional[float]]:
+        """Pop the requests that may be written now; otherwise how long to wait."""
+        batch = []
+        remaining = []
+        blocked = set()
+        delay = None
+        for entry in sorted(self._heap):
+            kind, future = entry[2], entry[4]
+            if future.done():
+                continue
+            bucket_name = CALL_BUCKETS.get(kind, "general")
+            # Once a bucket runs dry, lower-priority calls in it must not jump ahead
+            if len(batch) < self.batch_size and bucket_name not in blocked:
+                bucket = self.buckets.get(bucket_name) if bucket_name else None
+                if bucket is None or bucket.take():
+                    batch.append(entry)
+                    continue
+                blocked.add(bucket_name)
+                bucket_delay = bucket.delay()
+                delay = bucket_delay if delay is None else min(delay, bucket_delay)
+            remaining.append(entry)
+
+        self._heap = remaining
+        heapq.heapify(self._heap)
+        return batch, delay
+
+    async def _flush_loop(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            batch, delay = self._take_batch()
+            if batch:
+                self.metrics["batches"] += 1
+            for _, _, kind, request, future, queued_at in batch:
+                self._record_wait(kind, time.monotonic() - queued_at)
+                sent = await self._write(request)
+                self.metrics["sent" if sent else "failed"] += 1
+                if not future.done():
+                    future.set_result(sent)
+
+            if delay is not None and not batch:
+                self.metrics["throttled"] += 1
+                # A new submission may use a bucket that still has tokens
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _record_wait(self, kind: str, wait: float):
+        histogram = self.wait_times.get(kind)
+        if histogram is None:
+            histogram = self.wait_times[kind] = RollingHistogram(200)
+        histogram.add(wait)
+
+    async def close(self):
+        """Stop the flusher; requests still queued report as not sent."""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        for entry in self._heap:
+            if not entry[4].done():
+                entry[4].set_result(False)
+        self._heap = []
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["depth"] = len(self._heap)
+        stats["tokens"] = {name: round(bucket.tokens, 2) for name, bucket in self.buckets.items()}
+        stats["wait_times"] = {kind: histogram.summary() for kind, histogram in self.wait_times.items()}
+        return stats
@@ -0,0 +1,255 @@
+import asyncio
+import time
+import logging
+from typing import Optional, Dict, Any, Callable
+from database import db
+from async_db import adb
+from utils.deriv_decoder import TickRecord
+from utils.market_catalog import get_catalog
+from utils.tick_bus import BusClient, DEFAULT_PATH
+from utils.tick_subscriptions import TickSubscriptionManager
+
+logger = logging.getLogger(__name__)
+
+
+class _RemoteStats:
+    """`stats()` of an object that lives in the ingest process."""
+
+    def __init__(self, client: "RemoteDerivClient", call: str):
+        self.client = client
+        self.call = call
+
+    def stats(self):
+        return self.client._call_sync(self.call)
+
+
+class RemoteDerivClient:
+    """Stand-in for NativeDerivClient inside an API worker process.
+
+    The Deriv connection lives in the ingest process. This client mirrors
+    its state from the local bus: tick events go into per-symbol buffers
+    (seeded with a full copy on connect and after backfills), and status
+    and account events update the attributes the API reads. Commands such
+    as subscribing, and the debug statistics, are forwarded as bus calls.
+    """
+
+    def __init__(self, bus_path: str = DEFAULT_PATH, max_ticks: int = 1000):
+        self.bus = BusClient(bus_path, on_event=self._on_event, on_connect=self._resync)
+        self.subscriptions = TickSubscriptionManager(max_ticks=max_ticks)
+        self.market_catalog = get_catalog("brief")
+        self.frontend_callback: Optional[Callable] = None
+        self.main_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.telegram_bot = None
+        self.shared_ticks = _RemoteStats(self, "shared_ticks_stats")
+        self._status: Dict[str, Any] = {}
+        self.current_symbol = None
+        self.tick_stream_available = False
+        self.last_tick_time = time.time()
+        self.max_ticks_display = 100
+        self.account_balance = None
+        self.account_currency = None
+        self.account_type = None
+        self.login_id = None
+        self.account_details = None
+        self.app_id = None
+        self.token = None
+        self._reloading_settings = False
+        # Symbols whose buffer is being reloaded, with the tick events that arrived meanwhile
+        self._reloading_ticks: Dict[str, list] = {}
+        # Settings changed here are reloaded by the ingest process and the other workers
+        db.subscribe('*', self._on_setting_changed)
+
+    @property
+    def is_connected(self):
+        return self.bus.is_connected and self._status.get("is_connected", False)
+
+    @property
+    def subscription_id(self):
+        return self._status.get("subscription_id")
+
+    def set_frontend_callback(self, callback: Callable):
+        self.frontend_callback = callback
+
+    def set_main_loop(self, main_loop):
+        self.main_loop = main_loop
+
+    async def connect(self, timeout: float = 15.0):
+        self.bus.start()
+        return await self.bus.wait_connected(timeout)
+
+    async def _resync(self):
+        """Replace mirrored state with a fresh copy after (re)connecting."""
+        self._apply_status(await self.bus.call("status"))
+        for symbol in self.subscriptions.symbols():
+            await self._reload_ticks(symbol)
+
+    def _on_event(self, topic, data):
+        if topic == "tick":
+            self._on_tick(data)
+        elif topic == "status":
+            self._apply_status(data)
+        elif topic == "account":
+            for key, value in data.items():
+                setattr(self, key, value)
+        elif topic == "backfill":
+            asyncio.create_task(self._reload_ticks(data["symbol"], notify=True))
+        elif topic == "settings":
+            asyncio.create_task(self._reload_settings())
+
+    def _on_tick(self, data):
+        symbol = data["symbol"]
+        subscription = self.subscriptions.get(symbol)
+        if subscription is None:
+            return
+        pending = self._reloading_ticks.get(symbol)
+        if pending is not None:
+            pending.append(data)
+            return
+        
+        # Keep the mirror's seq equal to the ingest process's, so deltas match /api/ticks on any worker
+        seq = data.get("seq")
+        if seq is not None and seq != subscription.seq + 1:
+            if seq > subscription.seq:
+                asyncio.create_task(self._reload_ticks(symbol, notify=True))
+            return
+        subscription.add_tick(TickRecord.from_tick(data))
+        self.tick_stream_available = True
+        self.last_tick_time = time.time()
+        if self.frontend_callback:
+            self.frontend_callback(self.get_tick_delta(symbol), None, "tick_delta")
+
+    def _apply_status(self, status):
+        self._status = status
+        for key in ("current_symbol", "tick_stream_available", "last_tick_time", "max_ticks_display",
+                    "account_balance", "account_currency", "account_type", "login_id", "account_details",
+                    "app_id"):
+            setattr(self, key, status.get(key))
+        self.token = "configured" if status.get("token_configured") else None
+
+        symbols = {subscription["symbol"] for subscription in status.get("subscriptions", [])}
+        for symbol in self.subscriptions.symbols():
+            if symbol not in symbols:
+                self.subscriptions.remove(symbol)
+        for symbol in symbols:
+            if symbol not in self.subscriptions:
+                self.subscriptions.add(symbol)
+                asyncio.create_task(self._reload_ticks(symbol))
+
+    async def _reload_ticks(self, symbol, notify=False):
+        """Copy a symbol's whole buffer from the ingest process.
+        
+        Tick events that arrive while the copy is in flight are held back
+        and applied on top of it. With `notify`, clients get the new
+        snapshot.
+        """
+        if symbol in self._reloading_ticks:
+            return
+        self._reloading_ticks[symbol] = []
+        try:
+            snapshot = await self.bus.call("buffered_ticks", symbol=symbol)
+        except Exception as e:
+            logger.error(f"❌ Could not load ticks for {symbol}: {e}")
+            self._reloading_ticks.pop(symbol, None)
+            return
+        held = self._reloading_ticks.pop(symbol, [])
+        subscription = self.subscriptions.get(symbol)
+        if subscription is None:
+            return
+        buffer = subscription.ticks
+        buffer.clear()
+        buffer.count = snapshot.get("seq", 0) - len(snapshot["ticks"])
+        buffer.pip_size = snapshot.get("pip_size")
+        for epoch, quote, bid, ask, flags in snapshot["ticks"]:
+            buffer.append(epoch, quote, bid, ask, flags)
+        for data in held:
+            if data.get("seq", 0) == subscription.seq + 1:
+                subscription.add_tick(TickRecord.from_tick(data))
+        if notify and self.frontend_callback:
+            self.frontend_callback(self.get_latest_ticks(symbol), None, "tick_update")
+
+    def _on_setting_changed(self, key, value):
+        if self._reloading_settings or not self.main_loop:
+            return
+        asyncio.run_coroutine_threadsafe(self.bus.call("reload_settings"), self.main_loop)
+
+    async def _reload_settings(self):
+        """Pick up settings another process changed."""
+        self._reloading_settings = True
+        try:
+            await adb.reload_settings()
+        finally:
+            self._reloading_settings = False
+
+    def _call_sync(self, name, timeout: float = 5.0, **args):
+        """Make a bus call from a Flask thread and wait for the result."""
+        future = asyncio.run_coroutine_threadsafe(self.bus.call(name, timeout, **args), self.main_loop)
+        return future.result(timeout)
+
+    # Commands run by the ingest process
+
+    async def get_balance(self):
+        return await self.bus.call("get_balance")
+
+    async def get_active_symbols(self, force_refresh: bool = False):
+        return await self.market_catalog.get_markets(self._fetch_active_symbols, force_refresh)
+
+    async def _fetch_active_symbols(self, detail):
+        return await self.bus.call("get_active_symbols", timeout=15.0)
+
+    async def subscribe_to_ticks(self, symbol):
+        return await self.bus.call("subscribe_to_ticks", timeout=15.0, symbol=symbol)
+
+    async def unsubscribe_from_ticks(self, symbol=None):
+        return await self.bus.call("unsubscribe_from_ticks", symbol=symbol)
+
+    async def unsubscribe_all(self):
+        return await self.bus.call("unsubscribe_all")
+
+    def get_connection_metrics(self):
+        return self._call_sync("connection_metrics")
+
+    def get_latency_stats(self):
+        return self._call_sync("latency_stats")
+
+    def get_tick_trace_stats(self):
+        return self._call_sync("tick_trace_stats")
+
+    # Served from the mirrored state
+
+    def get_subscriptions(self):
+        return self._status.get("subscriptions", [])
+
+    def get_latest_ticks(self, symbol=None):
+        """Same shape as NativeDerivClient.get_latest_ticks."""
+        symbol = symbol or self.current_symbol
+        subscription = self.subscriptions.get(symbol)
+        if subscription:
+            ticks_data = subscription.snapshot(self.max_ticks_display or 100,
+                                               is_subscribed_symbol=symbol == self.current_symbol)
+        else:
+            ticks_data = {"symbol": symbol, "seq": 0, "ticks": [], "available": False,
+                          "last_update": self.last_tick_time}
+        ticks_data["connection_status"] = "connected" if self.is_connected else "disconnected"
+        ticks_data["max_ticks"] = self.max_ticks_display or 100
+        return ticks_data
+
+    def snapshot_version(self, symbol=None):
+        """Same as NativeDerivClient.snapshot_version."""
+        symbol = symbol or self.current_symbol
+        subscription = self.subscriptions.get(symbol)
+        if subscription is None:
+            return None
+        return (symbol, subscription.ticks, subscription.seq, subscription.last_tick_time,
+                subscription.is_available(), self.is_connected, self.max_ticks_display or 100, symbol == self.current_symbol)
+
+    def get_tick_delta(self, symbol):
+        """Same shape as NativeDerivClient.get_tick_delta."""
+        subscription = self.subscriptions.get(symbol)
+        if subscription is None:
+            return None
+        ticks_data = subscription.delta(is_subscribed_symbol=symbol == self.current_symbol)
+        ticks_data["connection_status"] = "connected" if self.is_connected else "disconnected"
+        return ticks_data
+
+    async def close(self):
+        await self.bus.close()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Shared-memory live tick rings, one per symbol, readable from any process.
+
+The ingest loop writes each tick into a memory-mapped file under
+/dev/shm (or the temp directory where there is none). Other processes
+map the same file read-only and follow it by sequence number, so the
+Flask server, strategies and analytics can run in their own processes
+without asking the Deriv client for ticks.
+
+File layout, native byte order:
+
+    header: magic (8s) | capacity (uint64) | seq (uint64)
+    columns: epochs (int64 x capacity) | quotes | bids | asks (float64 x capacity)
+
+Tick number n (counting from 0) lives in slot n % capacity; `seq` is the
+number of ticks written so far. The writer fills the slot first and
+publishes it by bumping `seq` last. A reader that copies slots checks
+`seq` again afterwards and discards anything the writer may have lapped
+in the meantime.
+
+Usage: python -m utils.shared_ticks watch R_100
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; readers fall back to memoryviews
+    np = None
+
+MAGIC = b"TKRING1\0"
+HEADER = struct.Struct("=8sQQ")
+SEQ_OFFSET = 16
+COLUMNS = ("epochs", "quotes", "bids", "asks")
+COLUMN_FORMATS = ("q", "d", "d", "d")
+
+
+def default_directory() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "deriv_ticks")
+
+
+def ring_path(symbol: str, directory: Optional[str] = None) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", symbol)
+    return os.path.join(directory or default_directory(), f"{safe}.ring")
+
+
+def ring_size(capacity: int) -> int:
+    return HEADER.size + capacity * 8 * len(COLUMNS)
+
+
+class SharedTickRing:
+    """One symbol's ring, mapped for writing (`create`) or reading (`attach`)."""
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.writable = writable
+        self._file = open(path, "r+b" if writable else "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, self.capacity, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC or len(self._map) != ring_size(self.capacity):
+            self.close()
+            raise ValueError(f"{path} is not a shared tick ring")
+
+        self._view = memoryview(self._map)
+        self._seq = self._view[SEQ_OFFSET:SEQ_OFFSET + 8].cast("Q")
+        offset = HEADER.size
+        for name, fmt in zip(COLUMNS, COLUMN_FORMATS):
+            setattr(self, name, self._view[offset:offset + self.capacity * 8].cast(fmt))
+            offset += self.capacity * 8
+
+    @classmethod
+    def create(cls, symbol: str, capacity: int = 4096, directory: Optional[str] = None) -> "SharedTickRing":
+        """Open the writer side, keeping an existing ring of the same capacity (and its seq)."""
+        path = ring_path(symbol, directory)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            ring = cls(path, writable=True)
+            if ring.capacity == capacity:
+                return ring
+            ring.close()
+        except (FileNotFoundError, ValueError):
+            pass
+
+        # Build the file beside the ring and swap it in; attached readers keep the old mapping
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.truncate(ring_size(capacity))
+            f.write(HEADER.pack(MAGIC, capacity, 0))
+        os.replace(temp_path, path)
+        return cls(path, writable=True)
+
+    @classmethod
+    def attach(cls, symbol: str, directory: Optional[str] = None) -> "SharedTickRing":
+        """Map an existing ring read-only."""
+        return cls(ring_path(symbol, directory))
+
+    @property
+    def seq(self) -> int:
+        """Number of ticks written so far."""
+        return self._seq[0]
+
+    def write(self, epoch: int, quote: float, bid: float, ask: float):
+        seq = self._seq[0]
+        slot = seq % self.capacity
+        self.epochs[slot] = epoch
+        self.quotes[slot] = quote
+        self.bids[slot] = bid
+        self.asks[slot] = ask
+        self._seq[0] = seq + 1
+
+    def slots(self, start_seq: int, end_seq: int) -> List[Tuple[int, int]]:
+        """Slot ranges [lo, hi) holding ticks start_seq..end_seq-1, oldest first (at most two)."""
+        start_seq = max(start_seq, end_seq - self.capacity, 0)
+        if start_seq >= end_seq:
+            return []
+        lo, hi = start_seq % self.capacity, end_seq % self.capacity or self.capacity
+        if lo < hi:
+            return [(lo, hi)]
+        return [(lo, self.capacity), (0, hi)]
+
+    def read_since(self, last_seq: int) -> Tuple[int, List[Tuple[int, float, float, float]]]:
+        """Copy the ticks published after `last_seq`; returns (seq, [(epoch, quote, bid, ask), ...]).
+
+        Ticks that have already been overwritten are skipped. If the
+        writer restarted with a fresh ring, reading starts over.
+        """
+        seq = self._seq[0]
+        if last_seq > seq:
+            last_seq = 0
+        ticks = []
+        for lo, hi in self.slots(last_seq, seq):
+            ticks.extend(zip(self.epochs[lo:hi], self.quotes[lo:hi], self.bids[lo:hi], self.asks[lo:hi]))
+
+        # Slots the writer lapped while we were copying may be torn, and so may
+        # the one it is filling next
+        lapped = self._seq[0] + 1 - self.capacity - max(last_seq, seq - self.capacity)
+        if lapped > 0:
+            del ticks[:lapped]
+        return seq, ticks
+
+    def latest(self, count: int) -> List[Tuple[int, float, float, float]]:
+        seq = self._seq[0]
+        return self.read_since(max(0, seq - count))[1]
+
+    def columns(self) -> Dict[str, Any]:
+        """The raw slot columns without copying: NumPy arrays when installed, else memoryviews.
+
+        Use `slots(start_seq, seq)` to find which positions hold which ticks.
+        """
+        if np is None:
+            return {name: getattr(self, name) for name in COLUMNS}
+        return {name: np.frombuffer(getattr(self, name), dtype=np.int64 if fmt == "q" else np.float64)
+                for name, fmt in zip(COLUMNS, COLUMN_FORMATS)}
+
+    def wait(self, last_seq: int, timeout: Optional[float] = None, interval: float = 0.001,
+             max_interval: float = 0.02) -> int:
+        """Block until seq moves past `last_seq` or `timeout` expires; returns the current seq.
+
+        Polls the shared counter, backing off from `interval` to
+        `max_interval` while nothing arrives.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            seq = self._seq[0]
+            if seq != last_seq:
+                return seq
+            if deadline is not None and time.monotonic() >= deadline:
+                return seq
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+
+    def close(self):
+        view = getattr(self, "_view", None)
+        if view is not None:
+            for name in COLUMNS + ("_seq",):
+                getattr(self, name).release()
+            view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class SharedTickWriter:
+    """Writer side for every symbol the ingest loop receives."""
+
+    def __init__(self, capacity: int = 4096, directory: Optional[str] = None):
+        self.capacity = capacity
+        self.directory = directory
+        self.enabled = True
+        self.rings: Dict[str, SharedTickRing] = {}
+
+    def write(self, symbol: str, epoch: int, quote: float, bid: float, ask: float):
+        if not self.enabled:
+            return
+        ring = self.rings.get(symbol)
+        if ring is None:
+            ring = self.rings[symbol] = SharedTickRing.create(symbol, self.capacity, self.directory)
+        ring.write(epoch, quote, bid, ask)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory or default_directory(),
+            "rings": {symbol: ring.seq for symbol, ring in self.rings.items()}
+        }
+
+    def close(self):
+        """Unmap the rings; the files stay so readers can finish and the seq survives a restart."""
+        for ring in self.rings.values():
+            ring.close()
+        self.rings.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directory", help="ring directory (default: /dev/shm/deriv_ticks)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    watch = commands.add_parser("watch", help="print ticks as the ingest process writes them")
+    watch.add_argument("symbol")
+    commands.add_parser("list", help="list rings and their sequence numbers")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        directory = args.directory or default_directory()
+        for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+            if name.endswith(".ring"):
+                ring = SharedTickRing(os.path.join(directory, name))
+                print(f"{name[:-5]}: seq {ring.seq}, capacity {ring.capacity}")
+                ring.close()
+        return
+
+    ring = SharedTickRing.attach(args.symbol, args.directory)
+    seq = ring.seq
+    print(f"📡 Watching {args.symbol} from seq {seq}")
+    try:
+        while True:
+            ring.wait(seq)
+            seq, ticks = ring.read_since(seq)
+            for epoch, quote, bid, ask in ticks:
+                print(f"{epoch} {quote} (bid {bid}, ask {ask})")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import time
+from typing import Optional, Dict, Any, Callable, Hashable, NamedTuple
+from utils.deriv_decoder import get_decoder
+
+
+class EncodedSnapshot(NamedTuple):
+    """A symbol's latest-ticks snapshot, with its JSON encoded once."""
+    version: Hashable
+    data: Dict[str, Any]
+    body: bytes  # the snapshot, as served by /api/ticks
+    message: bytes  # a "tick_update" SSE message carrying it
+    built_at: float
+
+
+class SnapshotCache:
+    """Latest-ticks snapshots per symbol, encoded once per version.
+
+    `build(symbol)` returns the snapshot dict and `version(symbol)` a
+    cheap value that changes whenever that dict would (None when it
+    cannot tell, and then nothing is cached). Until it changes, every
+    /api/ticks poll and every SSE client connecting shares the same bytes.
+
+    Flask threads may build the same version twice at worst; the last
+    one stored wins and both are identical.
+    """
+
+    def __init__(self, build: Callable[[Optional[str]], Dict[str, Any]],
+                 version: Callable[[Optional[str]], Optional[Hashable]]):
+        self.build = build
+        self.version = version
+        self.decoder = get_decoder()
+        self._snapshots: Dict[Optional[str], EncodedSnapshot] = {}
+        self.metrics = {"hits": 0, "builds": 0}
+
+    def get(self, symbol: Optional[str]) -> EncodedSnapshot:
+        version = self.version(symbol)
+        snapshot = self._snapshots.get(symbol)
+        if version is not None and snapshot is not None and snapshot.version == version:
+            self.metrics["hits"] += 1
+            return snapshot
+
+        data = self.build(symbol)
+        built_at = time.time()
+        body = self.decoder.dumps_bytes(data)
+        message = (b'{"type":"tick_update","data":' + body +
+                   b',"timestamp":' + self.decoder.dumps_bytes(built_at) + b'}')
+        snapshot = EncodedSnapshot(version, data, body, message, built_at)
+        if version is not None:
+            self._snapshots[symbol] = snapshot
+        self.metrics["builds"] += 1
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["symbols"] = len(self._snapshots)
+        return stats
@@ -0,0 +1,434 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple, Union
+from utils.deriv_decoder import get_decoder
+from utils.tick_trace import TickTrace
+
+logger = logging.getLogger(__name__)
+_decoder = get_decoder()
+
+# Message types that describe a symbol's tick list and can be merged per symbol
+TICK_TYPES = ("tick_update", "tick_delta")
+
+
+class _Tick:
+    """One tick of a broadcast message, encoded once however many merged updates include it."""
+
+    __slots__ = ("data", "_body")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._body: Optional[bytes] = None
+
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = _decoder.dumps_bytes(self.data)
+        return self._body
+
+
+class _Update:
+    """One broadcast message, shared by every client queue it was put on.
+
+    `id` is the event id of the newest message it holds and `first_id`
+    that of the oldest one merged into it.
+
+    The message is encoded once, by the first client to send it, and the
+    bytes are reused by every other client. Updates merged for a single
+    client keep their ticks as shared `_Tick`s, so only the few fields
+    around them are encoded per client.
+
+    A tick trace is closed by one client only, the `owner` it was
+    published to. Merged updates, which belong to a single client, keep
+    the traces of everything merged into them in `traces`.
+    """
+
+    __slots__ = ("message", "trace", "owner", "traces", "key", "id", "first_id", "merged", "_ticks", "_body")
+
+    def __init__(self, message: Dict[str, Any], trace: Optional[TickTrace] = None, id: int = 0,
+                 first_id: Optional[int] = None):
+        self.message = message
+        self.trace = trace
+        self.owner: Optional["SSEClient"] = None
+        self.traces: List[TickTrace] = []
+        self.id = id
+        self.first_id = id if first_id is None else first_id
+        # Merged updates hold their ticks in _ticks rather than in message["data"]
+        self.merged = False
+        self._ticks: Optional[List[_Tick]] = None
+        self._body: Optional[bytes] = None
+        data = message.get("data")
+        self.key = None
+        if message.get("type") in TICK_TYPES and isinstance(data, dict) and data.get("symbol"):
+            self.key = data["symbol"]
+
+    def take_traces(self, client: "SSEClient") -> List[TickTrace]:
+        """The traces `client` has to close for this update; each is handed out once. Call under the client lock."""
+        if self.merged:
+            traces, self.traces = self.traces, []
+        elif self.trace is not None and self.owner is client:
+            traces, self.trace = [self.trace], None
+        else:
+            traces = []
+        return traces
+
+    def ticks(self) -> List[_Tick]:
+        """The ticks of a tick update: a snapshot's list, or a delta's one new tick."""
+        if self._ticks is None:
+            data = self.message["data"]
+            if "ticks" in data:
+                ticks = data["ticks"]
+            else:
+                ticks = [data["tick"]] if data.get("tick") else []
+            self._ticks = [_Tick(tick) for tick in ticks]
+        return self._ticks
+
+    def body(self) -> bytes:
+        """The message as JSON, encoded on first use."""
+        if self._body is None:
+            if self.merged:
+                data = _decoder.dumps_bytes(self.message["data"])
+                ticks = b",".join(tick.body() for tick in self._ticks)
+                self._body = (b'{"type":' + _decoder.dumps_bytes(self.message["type"]) +
+                              b',"data":' + data[:-1] + b',"ticks":[' + ticks + b']}' +
+                              b',"timestamp":' + _decoder.dumps_bytes(self.message.get("timestamp")) + b'}')
+            else:
+                self._body = _decoder.dumps_bytes(self.message)
+        return self._body
+
+    def as_message(self) -> Dict[str, Any]:
+        """The message as a dict, with a merged update's ticks put back into its data."""
+        if not self.merged:
+            return self.message
+        data = dict(self.message["data"], ticks=[tick.data for tick in self._ticks])
+        return dict(self.message, data=data)
+
+    def merge(self, newer: "_Update") -> "_Update":
+        """One update with the state of this one followed by `newer`, for the same symbol.
+
+        A snapshot replaces whatever was pending. A delta is appended to a
+        pending snapshot (trimmed to its max_ticks) or delta, as long as
+        the seqs follow on; otherwise the client is left to spot the gap.
+        Neither message is modified, since other clients share them.
+        """
+        old, new = self.message, newer.message
+        if new["type"] == "tick_update":
+            return newer
+        old_data, new_data = old["data"], new["data"]
+        new_ticks = newer.ticks()
+        if old_data.get("seq") is None or new_data["seq"] - len(new_ticks) != old_data["seq"]:
+            return newer
+
+        data = {key: value for key, value in old_data.items() if key not in ("tick", "ticks")}
+        data.update((key, value) for key, value in new_data.items() if key not in ("tick", "ticks"))
+        ticks = self.ticks() + new_ticks
+        max_ticks = old_data.get("max_ticks")
+        if old["type"] == "tick_update" and max_ticks:
+            ticks = ticks[-max_ticks:]
+        merged = _Update({"type": old["type"], "data": data, "timestamp": new.get("timestamp")}, None,
+                         newer.id, self.first_id)
+        merged.merged = True
+        merged._ticks = ticks
+        return merged
+
+
+class SSEClient:
+    """A connected SSE stream: its pending updates and the event that wakes its thread.
+
+    Tick updates are kept per symbol and merged as they arrive, so what
+    is pending is always the latest state, however long the client
+    waits between flushes. Other messages are queued as they are, up to
+    `queue_size` of them.
+    """
+
+    def __init__(self, client_id: int, queue_size: int, fps: float):
+        self.id = client_id
+        self.queue_size = queue_size
+        self.pending: Dict[Any, _Update] = {}
+        self.unkeyed = 0
+        self.fps = fps
+        self.connected_at = time.time()
+        self.sent = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.slowdowns = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def put(self, update: _Update):
+        """Add an update without blocking.
+
+        Beyond `queue_size` other messages the oldest one is lost. Tick
+        updates never are: merging already keeps them to one per symbol,
+        and dropping one would lose the symbol's state until its next gap.
+        """
+        with self._lock:
+            if self.closed:
+                for trace in update.take_traces(self):
+                    trace.finish()
+                return
+            existing = self.pending.get(update.key) if update.key is not None else None
+            if existing is not None:
+                merged = existing.merge(update)
+                if merged is update:
+                    # Replaced outright: the ticks traced so far are never sent by this client
+                    for trace in existing.take_traces(self):
+                        trace.finish("coalesced")
+                else:
+                    merged.traces = existing.take_traces(self) + update.take_traces(self)
+                self.pending[update.key] = merged
+                self.coalesced += 1
+            elif update.key is not None:
+                self.pending[update.key] = update
+            else:
+                if self.unkeyed >= self.queue_size:
+                    oldest = next(key for key, pending in self.pending.items() if pending.key is None)
+                    for trace in self.pending.pop(oldest).take_traces(self):
+                        trace.finish()
+                    self.dropped += 1
+                else:
+                    self.unkeyed += 1
+                self.pending[object()] = update
+        self._wakeup.set()
+
+    def take_traces(self, update: _Update) -> List[TickTrace]:
+        """The traces to close now that `update` was sent."""
+        with self._lock:
+            return update.take_traces(self)
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for something to be pending."""
+        return self._wakeup.wait(timeout)
+
+    def take(self) -> List[_Update]:
+        """Take everything pending, ordered by the oldest message each update holds."""
+        self._wakeup.clear()
+        with self._lock:
+            updates = list(self.pending.values())
+            self.pending = {}
+            self.unkeyed = 0
+        updates.sort(key=lambda update: update.first_id)
+        return updates
+
+    def adapt(self, write_time: float, max_fps: float, min_fps: float):
+        """Adjust the flush rate to how long the last flush took to write.
+
+        A flush that blocks for more than half the frame interval means
+        the client or its network cannot keep up, so the rate halves.
+        Fast flushes let it climb back towards `max_fps`.
+        """
+        interval = 1 / self.fps
+        if write_time > interval / 2 and self.fps > min_fps:
+            self.fps = max(min_fps, self.fps / 2)
+            self.slowdowns += 1
+        elif write_time < interval / 10:
+            self.fps = min(max_fps, self.fps * 1.25)
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    def discard(self):
+        """Drop whatever is still pending, closing the traces this client owned."""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            self.unkeyed = 0
+            for update in pending.values():
+                for trace in update.take_traces(self):
+                    trace.finish()
+
+
+class SSEBroadcaster:
+    """Fans messages out to every connected SSE client.
+
+    Each client has its own queue, so a slow browser falls behind without
+    holding up the publisher or the other clients; beyond `queue_size`
+    non-tick messages it drops its own oldest ones. Client threads sleep on an event
+    until something is queued, and send a keepalive comment after
+    `keepalive` idle seconds, which is also how a vanished client is
+    noticed and removed.
+
+    Each client is flushed at most `max_fps` times a second (0 for no
+    limit); tick updates arriving in between are merged per symbol. A
+    client whose flushes block on a slow connection is flushed less
+    often, down to `min_fps`.
+
+    Events carry ids of the form "<instance>-<n>", and the last
+    `replay_size` published updates are kept. A browser reconnecting with
+    Last-Event-ID gets only the updates it missed; if they are no longer
+    all kept, or the id is from another process or an earlier run, it
+    gets fresh snapshots instead. The id on each frame is a watermark:
+    every update up to it has been sent, even when merging reordered
+    them, so resuming never skips one (it may repeat ticks the client
+    then ignores by seq).
+    """
+
+    def __init__(self, queue_size: int = 256, keepalive: float = 15.0, max_fps: float = 4.0,
+                 min_fps: float = 0.5, replay_size: int = 1000):
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.instance = f"{os.getpid():x}{int(time.time()):x}"
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Replaced, never mutated, so publish can iterate without the lock
+        self._clients: Tuple[SSEClient, ...] = ()
+        self._last_id = 0
+        self._replay: deque = deque(maxlen=replay_size)
+        self.metrics = {
+            "published": 0,
+            "connects": 0,
+            "disconnects": 0,
+            "resumed": 0,
+            "resume_snapshots": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def register(self, last_event_id: Optional[str] = None) -> Tuple[SSEClient, bool, int]:
+        """Add a client; returns (client, resumed, id of the last update it has).
+
+        When `last_event_id` can be resumed from, the missed updates are
+        already pending on the client. Registering and reading the replay
+        buffer happen under the publish lock, so an update is either
+        replayed or delivered live, never both or neither.
+        """
+        client = SSEClient(next(self._ids), self.queue_size, self.max_fps)
+        with self._lock:
+            missed = self._missed_since(last_event_id) if last_event_id else None
+            for update in missed or ():
+                client.put(update)
+            self._clients = self._clients + (client,)
+            # A fresh snapshot covers everything published so far
+            last_id = int(last_event_id.rpartition("-")[2]) if missed is not None else self._last_id
+        self.metrics["connects"] += 1
+        if last_event_id:
+            self.metrics["resumed" if missed is not None else "resume_snapshots"] += 1
+        return client, missed is not None, last_id
+
+    def _missed_since(self, last_event_id: str) -> Optional[List[_Update]]:
+        """Updates published after `last_event_id`, or None if they are not all still kept."""
+        instance, _, number = last_event_id.rpartition("-")
+        if instance != self.instance or not number.isdigit():
+            return None
+        last_id = int(number)
+        if last_id > self._last_id:
+            return None
+        oldest = self._replay[0].id if self._replay else self._last_id + 1
+        if last_id < oldest - 1:
+            return None
+        return [update for update in self._replay if update.id > last_id]
+
+    def unregister(self, client: SSEClient):
+        with self._lock:
+            self._clients = tuple(c for c in self._clients if c is not client)
+        client.close()
+        client.discard()
+        self.metrics["disconnects"] += 1
+
+    def publish(self, message: Dict[str, Any], trace: Optional[TickTrace] = None) -> int:
+        """Queue `message` for every client; returns how many clients it was queued for.
+
+        `trace` is closed by the longest-connected client, when it sends
+        the update or when a newer one replaces it; with no clients it is
+        closed here.
+        """
+        with self._lock:
+            self._last_id += 1
+            update = _Update(message, trace, self._last_id)
+            self._replay.append(update)
+            clients = self._clients
+            update.owner = clients[0] if clients else None
+        self.metrics["published"] += 1
+        if not clients:
+            if trace:
+                update.trace = None
+                trace.finish()
+            return 0
+        for client in clients:
+            client.put(update)
+        return len(clients)
+
+    def _encode(self, update: _Update) -> bytes:
+        return update.body()
+
+    def _frame(self, body: bytes, event_id: int) -> bytes:
+        return f"id: {self.instance}-{event_id}\ndata: ".encode() + body + b"\n\n"
+
+    def stream(self, initial_messages: Optional[Callable[[], List[Union[Dict[str, Any], bytes]]]] = None,
+               last_event_id: Optional[str] = None) -> Iterator[bytes]:
+        """Server-Sent Events for one client, until it disconnects or the broadcaster closes.
+
+        A client resuming from `last_event_id` gets the updates it missed.
+        Otherwise `initial_messages()` is sent first; it is called once the
+        client is registered, so a snapshot it returns cannot miss an
+        update published meanwhile. Its messages may be already encoded.
+        """
+        client, resumed, last_id = self.register(last_event_id)
+        logger.info(f"📡 Client {client.id} {'resumed' if resumed else 'connected to'} SSE stream "
+                    f"({len(self._clients)} connected)")
+        try:
+            if not resumed:
+                for message in initial_messages() if initial_messages else ():
+                    body = message if isinstance(message, bytes) else _decoder.dumps_bytes(message)
+                    yield self._frame(body, last_id)
+            last_flush = 0.0
+            while not client.closed:
+                if not client.wait(self.keepalive):
+                    yield b": keepalive\n\n"
+                    continue
+                if self.max_fps > 0:
+                    # Let updates merge until the client's next frame is due; the limit may have changed
+                    client.fps = min(client.fps, self.max_fps) or self.max_fps
+                    delay = last_flush + 1 / client.fps - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                last_flush = time.monotonic()
+                client.flushes += 1
+
+                write_time = 0.0
+                updates = client.take()
+                for index, update in enumerate(updates):
+                    # Everything before the next update's oldest message has now been sent
+                    if index + 1 < len(updates):
+                        watermark = max(last_id, updates[index + 1].first_id - 1)
+                    else:
+                        watermark = max(last_id, max(u.id for u in updates))
+                    last_id = watermark
+                    frame = self._frame(self._encode(update), watermark)
+                    started = time.monotonic()
+                    yield frame
+                    write_time += time.monotonic() - started
+                    client.sent += 1
+                    for trace in client.take_traces(update):
+                        trace.finish("sse_wait")
+                if self.max_fps > 0:
+                    client.adapt(write_time, self.max_fps, self.min_fps)
+        finally:
+            self.unregister(client)
+            logger.info(f"📡 Client {client.id} disconnected from SSE stream")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["last_event_id"] = f"{self.instance}-{self._last_id}"
+        stats["replay_buffer"] = len(self._replay)
+        now = time.time()
+        stats["clients"] = [
+            {"id": c.id, "queued": len(c.pending), "sent": c.sent, "flushes": c.flushes, "coalesced": c.coalesced,
+             "dropped": c.dropped, "fps": round(c.fps, 2), "slowdowns": c.slowdowns,
+             "connected_for": round(now - c.connected_at, 1)}
+            for c in self._clients
+        ]
+        return stats
+
+    def close(self):
+        """Wake every client thread so its stream ends."""
+        for client in self._clients:
+            client.close()
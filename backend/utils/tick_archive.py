@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Columnar tick archive: one file per symbol per UTC day.
+
+Each file holds a header and two fixed-width columns, all in native byte
+order:
+
+    b"TKCOL1\\0\\0" | count (uint64) | epochs (int64 x count) | quotes (float64 x count)
+
+Epochs are sorted and unique, so readers memory-map a file and find a
+time range with a binary search over the epoch column, without parsing
+or copying anything. Files are rewritten whole (merge, then atomic
+replace), so a reader never sees a half-written day.
+
+Usage:
+    python -m utils.tick_archive archive [--db ticks.db] [--symbol R_100]
+    python -m utils.tick_archive info R_100
+    python -m utils.tick_archive export R_100 --start 2025-01-01 --end 2025-02-01 --out r100.npz
+"""
+
+import argparse
+import array
+import bisect
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+from typing import Optional, List, Tuple, Iterator
+
+try:
+    import numpy as np
+except ImportError:  # listed in requirements.txt; without it exports fall back to array.array
+    np = None
+
+MAGIC = b"TKCOL1\0\0"
+HEADER = struct.Struct("=8sQ")
+DAY_SECONDS = 86400
+
+
+def day_of(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d")
+
+
+def day_start(day: str) -> int:
+    return int(datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+class DayColumns:
+    """A memory-mapped day file; `epochs` and `quotes` are zero-copy views.
+
+    Close it (or use it as a context manager) once the views are no
+    longer needed; slices taken from the views must be released first.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self._view = None
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= HEADER.size:
+            self.epochs = memoryview(b"").cast("q")
+            self.quotes = memoryview(b"").cast("d")
+            return
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or size != HEADER.size + count * 16:
+            self.close()
+            raise ValueError(f"{path} is not a valid tick archive file")
+        self._view = memoryview(self._map)
+        middle = HEADER.size + count * 8
+        self.epochs = self._view[HEADER.size:middle].cast("q")
+        self.quotes = self._view[middle:].cast("d")
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def __enter__(self) -> "DayColumns":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Positions [lo, hi) of the ticks with start <= epoch <= end."""
+        lo = 0 if start is None else bisect.bisect_left(self.epochs, start)
+        hi = len(self.epochs) if end is None else bisect.bisect_right(self.epochs, end)
+        return lo, max(lo, hi)
+
+    def close(self):
+        for view in (getattr(self, "epochs", None), getattr(self, "quotes", None), self._view):
+            if view is not None:
+                view.release()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class TickArchive:
+    """Per-symbol, per-day columnar tick files under `root`."""
+
+    def __init__(self, root: str = "tick_archive"):
+        self.root = root
+
+    def path(self, symbol: str, day: str) -> str:
+        return os.path.join(self.root, symbol, f"{day}.cols")
+
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def days(self, symbol: str) -> List[str]:
+        directory = os.path.join(self.root, symbol)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".cols"))
+
+    def open_day(self, symbol: str, day: str) -> DayColumns:
+        return DayColumns(self.path(symbol, day))
+
+    def write_day(self, symbol: str, day: str, epochs, quotes) -> int:
+        """Merge ticks into a day file; returns the number of ticks it holds afterwards.
+
+        `epochs` and `quotes` are parallel sequences for that UTC day. An
+        epoch already in the file keeps its stored quote.
+        """
+        merged = {}
+        path = self.path(symbol, day)
+        for epoch, quote in zip(epochs, quotes):
+            merged.setdefault(int(epoch), float(quote))
+        if os.path.exists(path):
+            with DayColumns(path) as existing:
+                for epoch, quote in zip(existing.epochs, existing.quotes):
+                    merged[epoch] = quote
+
+        ordered = sorted(merged)
+        out_epochs = array.array("q", ordered)
+        out_quotes = array.array("d", (merged[epoch] for epoch in ordered))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(out_epochs)))
+            out_epochs.tofile(f)
+            out_quotes.tofile(f)
+        os.replace(temp_path, path)
+        return len(out_epochs)
+
+    def iter_ranges(self, symbol: str, start: Optional[int] = None,
+                    end: Optional[int] = None) -> Iterator[Tuple[DayColumns, int, int]]:
+        """(columns, lo, hi) for every day file overlapping the range; each day is closed after its step."""
+        first = day_of(start) if start is not None else None
+        last = day_of(end) if end is not None else None
+        for day in self.days(symbol):
+            if (first and day < first) or (last and day > last):
+                continue
+            with self.open_day(symbol, day) as columns:
+                lo, hi = columns.range(start, end)
+                if hi > lo:
+                    yield columns, lo, hi
+
+    def count(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        return sum(hi - lo for _, lo, hi in self.iter_ranges(symbol, start, end))
+
+    def export(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None):
+        """(epochs, quotes) for start <= epoch <= end, as NumPy arrays.
+
+        Columns are copied straight from the mapped files; no per-tick
+        Python objects are created. On an install without numpy,
+        array.array is returned instead.
+        """
+        if np is not None:
+            epochs, quotes = [], []
+            for columns, lo, hi in self.iter_ranges(symbol, start, end):
+                epochs.append(np.array(columns.epochs[lo:hi], dtype=np.int64))
+                quotes.append(np.array(columns.quotes[lo:hi], dtype=np.float64))
+            if not epochs:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+            return np.concatenate(epochs), np.concatenate(quotes)
+
+        epochs, quotes = array.array("q"), array.array("d")
+        for columns, lo, hi in self.iter_ranges(symbol, start, end):
+            with columns.epochs[lo:hi] as part, part.cast("B") as raw:
+                epochs.frombytes(raw)
+            with columns.quotes[lo:hi] as part, part.cast("B") as raw:
+                quotes.frombytes(raw)
+        return epochs, quotes
+
+    def archive_from_store(self, store, symbol: Optional[str] = None, since: Optional[int] = None) -> int:
+        """Copy ticks from a TickStore into day files; returns the number of ticks read."""
+        total = 0
+        for info in store.symbols():
+            if symbol and info["symbol"] != symbol:
+                continue
+            first = max(info["first_epoch"], since or 0)
+            day = day_start(day_of(first))
+            while day <= info["last_epoch"]:
+                with store.pool.connection() as conn:
+                    rows = conn.execute('''
+                        SELECT epoch, quote FROM ticks
+                        WHERE symbol = ? AND epoch >= ? AND epoch < ?
+                        ORDER BY epoch
+                    ''', (info["symbol"], max(day, first), day + DAY_SECONDS)).fetchall()
+                if rows:
+                    epochs, quotes = zip(*rows)
+                    self.write_day(info["symbol"], day_of(day), epochs, quotes)
+                    total += len(rows)
+                day += DAY_SECONDS
+        return total
+
+
+def parse_time(value: Optional[str]) -> Optional[int]:
+    """An epoch, or an ISO date/time (UTC unless it has an offset)."""
+    if value is None:
+        return None
+    if value.lstrip("-").isdigit():
+        return int(value)
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default="tick_archive", help="archive directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive = commands.add_parser("archive", help="copy ticks from the tick store into day files")
+    archive.add_argument("--db", default="ticks.db")
+    archive.add_argument("--symbol")
+    archive.add_argument("--since", help="epoch or ISO date")
+
+    info = commands.add_parser("info", help="list archived days for a symbol, or all symbols")
+    info.add_argument("symbol", nargs="?")
+
+    export = commands.add_parser("export", help="export a time range to .npz (needs numpy) or .bin columns")
+    export.add_argument("symbol")
+    export.add_argument("--start", help="epoch or ISO date")
+    export.add_argument("--end", help="epoch or ISO date")
+    export.add_argument("--out", required=True)
+
+    args = parser.parse_args(argv)
+    tick_archive = TickArchive(args.root)
+
+    if args.command == "archive":
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from utils.tick_store import TickStore
+        count = tick_archive.archive_from_store(TickStore(args.db), args.symbol, parse_time(args.since))
+        print(f"✅ Archived {count} ticks into {args.root}")
+
+    elif args.command == "info":
+        if not args.symbol:
+            for symbol in tick_archive.symbols():
+                print(f"{symbol}: {len(tick_archive.days(symbol))} day(s)")
+            return
+        for day in tick_archive.days(args.symbol):
+            with tick_archive.open_day(args.symbol, day) as columns:
+                if len(columns):
+                    print(f"{day}: {len(columns)} ticks, epochs {columns.epochs[0]}..{columns.epochs[-1]}")
+
+    elif args.command == "export":
+        epochs, quotes = tick_archive.export(args.symbol, parse_time(args.start), parse_time(args.end))
+        if args.out.endswith(".npz"):
+            if np is None:
+                parser.error("numpy is required for .npz exports; use a .bin file instead")
+            np.savez(args.out, epochs=epochs, quotes=quotes)
+        else:
+            # Same layout as a day file, readable with DayColumns
+            with open(args.out, "wb") as f:
+                f.write(HEADER.pack(MAGIC, len(epochs)))
+                f.write(memoryview(epochs).cast("B"))
+                f.write(memoryview(quotes).cast("B"))
+        print(f"✅ Exported {len(epochs)} ticks to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+from array import array
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
+
+# Per-tick flag bits
+BACKFILLED = 1
+
+
+class TickRingBuffer:
+    """Fixed-capacity tick storage backed by preallocated arrays.
+
+    Appending is O(1) and never reallocates: once full, the oldest tick is
+    overwritten in place. Memory use is `capacity * 33` bytes regardless
+    of how many ticks have been seen.
+    """
+
+    def __init__(self, capacity: int = 1000, symbol: Optional[str] = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.symbol = symbol
+        self.pip_size = None
+        self.epochs = array("q", bytes(8 * capacity))
+        self.quotes = array("d", bytes(8 * capacity))
+        self.bids = array("d", bytes(8 * capacity))
+        self.asks = array("d", bytes(8 * capacity))
+        self.flags = array("B", bytes(capacity))
+        # Total number of ticks ever appended; the next write goes to count % capacity
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in self._columns())
+
+    def _columns(self):
+        return (self.epochs, self.quotes, self.bids, self.asks, self.flags)
+
+    def append(self, epoch: int, quote: float, bid: Optional[float] = None, ask: Optional[float] = None,
+               flags: int = 0):
+        """Store a tick; bid and ask default to the quote."""
+        index = self.count % self.capacity
+        self.epochs[index] = epoch
+        self.quotes[index] = quote
+        self.bids[index] = quote if bid is None else bid
+        self.asks[index] = quote if ask is None else ask
+        self.flags[index] = flags
+        self.count += 1
+
+    def merge(self, ticks: Iterable[Tuple[int, float, float, float]], flags: int = BACKFILLED) -> int:
+        """Insert (epoch, quote, bid, ask) ticks in epoch order, skipping known epochs.
+        
+        Used for backfilling gaps, so it rewrites the window in place and is
+        O(capacity) rather than O(1). Returns the number of ticks inserted;
+        ticks older than a full buffer's window are not, and `count` only
+        grows by the ticks that were.
+        """
+        size = len(self)
+        start = self.count - size
+        current = []
+        known = set()
+        for position in range(start, self.count):
+            slot = position % self.capacity
+            current.append((self.epochs[slot], self.quotes[slot], self.bids[slot], self.asks[slot], self.flags[slot],
+                            False))
+            known.add(self.epochs[slot])
+        
+        added = [(epoch, quote, bid, ask, flags, True) for epoch, quote, bid, ask in ticks if epoch not in known]
+        merged = sorted(current + added, key=lambda tick: tick[0])[-self.capacity:]
+        inserted = sum(1 for tick in merged if tick[5])
+        if not inserted:
+            return 0
+        
+        self.count += inserted
+        first = self.count - len(merged)
+        for offset, (epoch, quote, bid, ask, tick_flags, _) in enumerate(merged):
+            slot = (first + offset) % self.capacity
+            self.epochs[slot] = epoch
+            self.quotes[slot] = quote
+            self.bids[slot] = bid
+            self.asks[slot] = ask
+            self.flags[slot] = tick_flags
+        return inserted
+
+    def last(self, count: int) -> "TickView":
+        """View of up to `count` most recent ticks, oldest first. Nothing is copied."""
+        count = max(0, min(count, len(self)))
+        return TickView(self, self.count - count, count)
+
+    def last_epoch(self) -> Optional[int]:
+        if not self.count:
+            return None
+        return self.epochs[(self.count - 1) % self.capacity]
+
+    def clear(self):
+        self.count = 0
+
+
+class TickView:
+    """Read-only window over a TickRingBuffer.
+
+    The view indexes straight into the buffer's arrays. Ticks that the
+    buffer overwrites after the view was taken raise IndexError on access.
+    """
+
+    __slots__ = ("buffer", "start", "length")
+
+    def __init__(self, buffer: TickRingBuffer, start: int, length: int):
+        self.buffer = buffer
+        self.start = start
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _slot(self, i: int) -> int:
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("tick view index out of range")
+        position = self.start + i
+        if position < self.buffer.count - self.buffer.capacity:
+            raise IndexError("tick was overwritten by newer data")
+        return position % self.buffer.capacity
+
+    def __getitem__(self, i: int) -> Tuple[int, float, float, float]:
+        """Return the (epoch, quote, bid, ask) tuple at position i."""
+        slot = self._slot(i)
+        buffer = self.buffer
+        return buffer.epochs[slot], buffer.quotes[slot], buffer.bids[slot], buffer.asks[slot]
+
+    def __iter__(self) -> Iterator[Tuple[int, float, float, float]]:
+        for i in range(self.length):
+            yield self[i]
+
+    def segments(self, column: str) -> List[memoryview]:
+        """Zero-copy memoryviews of one column, split where the ring wraps."""
+        buffer = self.buffer
+        values = memoryview(getattr(buffer, column))
+        if not self.length:
+            return []
+        first = self._slot(0)
+        end = first + self.length
+        if end <= buffer.capacity:
+            return [values[first:end]]
+        return [values[first:], values[:end - buffer.capacity]]
+
+    def rows(self) -> List[List[Any]]:
+        """[epoch, quote, bid, ask, flags] per tick, oldest first, e.g. to ship a buffer to another process."""
+        columns = self.buffer._columns()
+        return [[column[self._slot(i)] for column in columns] for i in range(self.length)]
+
+    def to_dicts(self, **extra: Any) -> List[Dict[str, Any]]:
+        """Materialize the ticks as API dicts, adding `extra` to each one."""
+        symbol = self.buffer.symbol
+        pip_size = self.buffer.pip_size
+        flags = self.buffer.flags
+        ticks = []
+        for i in range(self.length):
+            slot = self._slot(i)
+            epoch, quote, bid, ask = self[i]
+            tick = {
+                "symbol": symbol,
+                "epoch": epoch,
+                "timestamp": epoch,
+                "quote": quote,
+                "bid": bid,
+                "ask": ask,
+                "pip_size": pip_size,
+                "backfilled": bool(flags[slot] & BACKFILLED)
+            }
+            if extra:
+                tick.update(extra)
+            ticks.append(tick)
+        return ticks
@@ -0,0 +1,293 @@
+import asyncio
+import inspect
+import itertools
+import logging
+import os
+import tempfile
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Iterable, Set
+from utils.deriv_decoder import get_decoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "deriv_bot_bus.sock")
+# Replies such as the full market catalog are far larger than asyncio's 64 KiB line default
+LINE_LIMIT = 2 ** 24
+
+
+class _Subscriber:
+    """One connected process on the server side: its topics and a bounded outbox."""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int):
+        self.writer = writer
+        self.task = asyncio.current_task()
+        self.topics: Optional[Set[str]] = None
+        self.outbox: deque = deque(maxlen=queue_size)
+        self.wakeup = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def push(self, frame: bytes):
+        if len(self.outbox) == self.outbox.maxlen:
+            self.dropped += 1
+        self.outbox.append(frame)
+        self.wakeup.set()
+
+    async def flush_loop(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            if not self.outbox:
+                continue
+            frames = list(self.outbox)
+            self.outbox.clear()
+            try:
+                self.writer.write(b"".join(frames))
+                await self.writer.drain()
+            except ConnectionError:
+                return
+            self.sent += len(frames)
+
+
+class BusServer:
+    """Local pub/sub hub on a Unix socket, run by the ingest process.
+
+    Messages are newline-delimited JSON. `publish(topic, data)` encodes a
+    message once and queues the same bytes for every subscriber of the
+    topic; a subscriber that falls `queue_size` messages behind loses the
+    oldest ones instead of slowing the publisher down. Subscribers can
+    also call the functions in `handlers` and get a reply.
+
+    Client to server:
+        {"subscribe": ["tick", "status"]}           (omit to receive everything)
+        {"id": 1, "call": "get_balance", "args": {}}
+    Server to client:
+        {"topic": "tick", "data": {...}}
+        {"topic": "reply", "id": 1, "result": ...} or {"topic": "reply", "id": 1, "error": "..."}
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, handlers: Optional[Dict[str, Callable]] = None,
+                 queue_size: int = 10000):
+        self.path = path
+        self.handlers = handlers or {}
+        self.queue_size = queue_size
+        self.decoder = get_decoder()
+        self._subscribers: Set[_Subscriber] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.metrics = {
+            "published": 0,
+            "calls": 0,
+            "failed_calls": 0,
+            "connections": 0
+        }
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, self.path, limit=LINE_LIMIT)
+        logger.info(f"📡 Bus listening on {self.path}")
+
+    def publish(self, topic: str, data: Any):
+        """Queue a message for every subscriber of `topic`; never blocks."""
+        self.metrics["published"] += 1
+        if not self._subscribers:
+            return
+        frame = None
+        for subscriber in self._subscribers:
+            if subscriber.topics is None or topic in subscriber.topics:
+                if frame is None:
+                    frame = (self.decoder.dumps({"topic": topic, "data": data}) + "\n").encode()
+                subscriber.push(frame)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscriber = _Subscriber(writer, self.queue_size)
+        self._subscribers.add(subscriber)
+        self.metrics["connections"] += 1
+        flusher = asyncio.create_task(subscriber.flush_loop())
+        try:
+            async for line in reader:
+                message = self.decoder.loads(line)
+                if "subscribe" in message:
+                    topics = message["subscribe"]
+                    subscriber.topics = set(topics) if topics is not None else None
+                elif "call" in message:
+                    asyncio.create_task(self._call(subscriber, message))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"❌ Bus subscriber failed: {e}")
+        finally:
+            self._subscribers.discard(subscriber)
+            flusher.cancel()
+            writer.close()
+
+    async def _call(self, subscriber: _Subscriber, message: Dict[str, Any]):
+        self.metrics["calls"] += 1
+        reply = {"topic": "reply", "id": message.get("id")}
+        handler = self.handlers.get(message["call"])
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown call: {message['call']}")
+            result = handler(**(message.get("args") or {}))
+            if inspect.isawaitable(result):
+                result = await result
+            reply["result"] = result
+        except Exception as e:
+            self.metrics["failed_calls"] += 1
+            reply["error"] = str(e)
+        subscriber.push((self.decoder.dumps(reply) + "\n").encode())
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["subscribers"] = [
+            {"topics": sorted(s.topics) if s.topics is not None else None, "queued": len(s.outbox),
+             "sent": s.sent, "dropped": s.dropped}
+            for s in self._subscribers
+        ]
+        return stats
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # Closing the sockets ends each _serve at EOF; let them finish rather than be cancelled at loop shutdown
+        subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.writer.close()
+        tasks = [subscriber.task for subscriber in subscribers if subscriber.task]
+        if tasks:
+            await asyncio.wait(tasks, timeout=1.0)
+        self._subscribers.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class BusClient:
+    """Subscriber side of the bus, used by API worker processes.
+
+    Keeps reconnecting while started. Each message is handed to
+    `on_event(topic, data)` on the event loop; `on_connect()` runs after
+    every (re)connection so the caller can resynchronise its state.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, on_event: Optional[Callable[[str, Any], Any]] = None,
+                 topics: Optional[Iterable[str]] = None, on_connect: Optional[Callable[[], Any]] = None):
+        self.path = path
+        self.on_event = on_event
+        self.topics = list(topics) if topics is not None else None
+        self.on_connect = on_connect
+        self.decoder = get_decoder()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {
+            "received": 0,
+            "reconnects": 0,
+            "calls": 0
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self):
+        delay = 0.5
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                continue
+
+            delay = 0.5
+            logger.info(f"📡 Connected to bus {self.path}")
+            try:
+                self._writer.write((self.decoder.dumps({"subscribe": self.topics}) + "\n").encode())
+                self._connected.set()
+                if self.on_connect:
+                    asyncio.create_task(self._resync())
+                async for line in reader:
+                    self._dispatch(self.decoder.loads(line))
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            except Exception as e:
+                logger.error(f"❌ Bus connection failed: {e}")
+            finally:
+                self._connected.clear()
+                self._writer.close()
+                self._writer = None
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError("Bus connection lost"))
+                self._pending.clear()
+            self.metrics["reconnects"] += 1
+            logger.warning("⚠️ Bus connection lost, reconnecting")
+
+    async def _resync(self):
+        try:
+            result = self.on_connect()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"❌ Bus resync failed: {e}")
+
+    def _dispatch(self, message: Dict[str, Any]):
+        self.metrics["received"] += 1
+        topic = message.get("topic")
+        if topic == "reply":
+            future = self._pending.pop(message.get("id"), None)
+            if future and not future.done():
+                if "error" in message:
+                    future.set_exception(RuntimeError(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+            return
+        if self.on_event:
+            try:
+                self.on_event(topic, message.get("data"))
+            except Exception as e:
+                logger.error(f"❌ Error handling bus event {topic}: {e}")
+
+    async def call(self, name: str, timeout: float = 10.0, **args) -> Any:
+        """Call a handler in the ingest process and return its result."""
+        if not await self.wait_connected(timeout):
+            raise ConnectionError("Bus not connected")
+        self.metrics["calls"] += 1
+        call_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        self._writer.write((self.decoder.dumps({"id": call_id, "call": name, "args": args}) + "\n").encode())
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(call_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["connected"] = self.is_connected
+        stats["pending_calls"] = len(self._pending)
+        return stats
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
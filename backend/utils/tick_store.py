@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+from async_db import adb
+from db_connection import get_pool
+from utils.latency import RollingHistogram
+
+logger = logging.getLogger(__name__)
+
+# (symbol, epoch, quote, bid, ask)
+TickRow = Tuple[str, int, float, float, float]
+
+
+class TickStore:
+    """Durable tick history in SQLite, keyed by (symbol, epoch).
+
+    `add` only appends to an in-memory buffer, so the tick path never
+    waits for disk. A flusher task writes the buffer with one
+    executemany per batch, every `flush_interval` seconds or as soon as
+    `batch_size` ticks are waiting, on the async database executor.
+
+    The table is clustered on its (symbol, epoch) primary key, so a
+    range query for one symbol reads consecutive pages and never
+    touches a separate index. Ticks seen twice, e.g. from a backfill,
+    are stored once. If the disk falls behind, at most `max_buffer`
+    ticks are held and the oldest are dropped.
+    """
+
+    def __init__(self, db_path: str = "ticks.db", batch_size: int = 500, flush_interval: float = 1.0,
+                 max_buffer: int = 50000):
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.enabled = True
+        self._buffer: deque = deque(maxlen=max_buffer)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.flush_times = RollingHistogram(200)
+        self.metrics = {
+            "buffered": 0,
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+            "failed_batches": 0,
+            "max_batch": 0
+        }
+        self.init_table()
+
+    def init_table(self):
+        with self.pool.transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS ticks (
+                    symbol TEXT NOT NULL,
+                    epoch INTEGER NOT NULL,
+                    quote REAL NOT NULL,
+                    bid REAL,
+                    ask REAL,
+                    PRIMARY KEY (symbol, epoch)
+                ) WITHOUT ROWID
+            ''')
+
+    def add(self, symbol: str, epoch: int, quote: float, bid: Optional[float] = None, ask: Optional[float] = None):
+        """Buffer one tick for the next flush."""
+        if not self.enabled:
+            return
+        buffer = self._buffer
+        if len(buffer) == self.max_buffer:
+            self.metrics["dropped"] += 1
+        buffer.append((symbol, epoch, quote, bid, ask))
+        self.metrics["buffered"] += 1
+        if len(buffer) >= self.batch_size and self._wakeup:
+            self._wakeup.set()
+
+    def add_many(self, symbol: str, ticks: Iterable[tuple]):
+        """Buffer (epoch, quote, bid, ask) tuples, e.g. a ticks_history backfill."""
+        for epoch, quote, bid, ask in ticks:
+            self.add(symbol, epoch, quote, bid, ask)
+
+    def start(self):
+        if self._flusher is None or self._flusher.done():
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush(adb.run)
+
+    async def flush(self, run=None):
+        """Write everything buffered so far; `run` executes the blocking write (default: inline)."""
+        if not self._buffer:
+            return
+        rows = list(self._buffer)
+        self._buffer.clear()
+
+        started = time.perf_counter()
+        try:
+            if run:
+                await run(self._write, rows)
+            else:
+                self._write(rows)
+        except Exception as e:
+            self.metrics["failed_batches"] += 1
+            logger.error(f"❌ Failed to store {len(rows)} ticks: {e}")
+            # Retry them with the next flush, ahead of anything newer
+            retry = deque(rows, maxlen=self.max_buffer)
+            retry.extend(self._buffer)
+            self.metrics["dropped"] += len(rows) + len(self._buffer) - len(retry)
+            self._buffer = retry
+            return
+        self.flush_times.add(time.perf_counter() - started)
+
+        metrics = self.metrics
+        metrics["written"] += len(rows)
+        metrics["batches"] += 1
+        if len(rows) > metrics["max_batch"]:
+            metrics["max_batch"] = len(rows)
+
+    def _write(self, rows: List[TickRow]):
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO ticks (symbol, epoch, quote, bid, ask) VALUES (?, ?, ?, ?, ?)', rows)
+
+    def get_ticks(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None,
+                  limit: Optional[int] = None, newest_first: bool = False) -> List[Dict[str, Any]]:
+        """Stored ticks for a symbol with start <= epoch <= end.
+
+        Ticks still waiting in the buffer are not included.
+        """
+        order = "DESC" if newest_first else "ASC"
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                SELECT epoch, quote, bid, ask FROM ticks
+                WHERE symbol = ? AND epoch BETWEEN ? AND ?
+                ORDER BY epoch {order} LIMIT ?
+            ''', (symbol, start if start is not None else 0, end if end is not None else 2 ** 62,
+                  limit if limit is not None else -1)).fetchall()
+        return [{"symbol": symbol, "epoch": epoch, "quote": quote, "bid": bid, "ask": ask}
+                for epoch, quote, bid, ask in rows]
+
+    def symbols(self) -> List[Dict[str, Any]]:
+        """Stored symbols with their tick count and epoch range."""
+        with self.pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT symbol, COUNT(*), MIN(epoch), MAX(epoch) FROM ticks GROUP BY symbol
+            ''').fetchall()
+        return [{"symbol": symbol, "count": count, "first_epoch": first, "last_epoch": last}
+                for symbol, count, first, last in rows]
+
+    async def close(self):
+        """Stop the flusher and write whatever is still buffered."""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats["enabled"] = self.enabled
+        stats["pending"] = len(self._buffer)
+        stats["flush_time"] = self.flush_times.summary()
+        return stats
+
+
+_store: Optional[TickStore] = None
+
+
+def get_tick_store() -> TickStore:
+    """The process-wide tick store."""
+    global _store
+    if _store is None:
+        _store = TickStore()
+    return _store
@@ -0,0 +1,182 @@
+import time
+from typing import Optional, Dict, List, Any, Tuple
+from utils.deriv_decoder import TickRecord
+from utils.tick_buffer import TickRingBuffer, TickView
+
+
+class TickSubscription:
+    """State of a single `ticks` subscription: its id and its own tick buffer."""
+
+    # A gap is reported when ticks are this many expected intervals apart
+    gap_factor = 3
+
+    def __init__(self, symbol: str, max_ticks: int = 1000):
+        self.symbol = symbol
+        self.subscription_id: Optional[str] = None
+        self.ticks = TickRingBuffer(max_ticks, symbol)
+        self.subscribed_at = time.time()
+        self.last_tick_time = self.subscribed_at
+        self.tick_count = 0
+        # Smallest spacing seen between consecutive epochs, used for gap detection
+        self.tick_interval: Optional[int] = None
+        self.gaps_detected = 0
+        self.backfilled_ticks = 0
+
+    def add_tick(self, tick: TickRecord) -> Optional[Tuple[int, int]]:
+        """Store a tick, overwriting the oldest one once the buffer is full.
+        
+        Returns the (start, end) epoch range missing before this tick if
+        the stream skipped ticks, otherwise None.
+        """
+        gap = self._detect_gap(tick.epoch)
+        self.ticks.append(tick.epoch, tick.quote, tick.bid, tick.ask)
+        if tick.pip_size is not None:
+            self.ticks.pip_size = tick.pip_size
+        self.tick_count += 1
+        self.last_tick_time = time.time()
+        return gap
+
+    def _detect_gap(self, epoch: int) -> Optional[Tuple[int, int]]:
+        last_epoch = self.ticks.last_epoch()
+        if last_epoch is None or epoch <= last_epoch:
+            return None
+        
+        delta = epoch - last_epoch
+        if self.tick_interval is None or delta < self.tick_interval:
+            self.tick_interval = delta
+            return None
+        if delta <= self.tick_interval * self.gap_factor:
+            return None
+        
+        self.gaps_detected += 1
+        return last_epoch + 1, epoch - 1
+
+    def merge_backfill(self, ticks: List[Tuple[int, float, float, float]]) -> int:
+        """Merge ticks fetched from ticks_history into the buffer, in epoch order."""
+        added = self.ticks.merge(ticks)
+        self.backfilled_ticks += added
+        return added
+
+    @property
+    def seq(self) -> int:
+        """Number of ticks the buffer has taken in; updates carry it so clients can spot missed ones."""
+        return self.ticks.count
+
+    def latest(self, count: int) -> TickView:
+        """View of up to `count` of the most recent ticks, oldest first."""
+        return self.ticks.last(count)
+
+    def snapshot(self, count: int, **extra: Any) -> Dict[str, Any]:
+        """The `count` most recent ticks as a full frontend update."""
+        return {
+            "symbol": self.symbol,
+            "seq": self.seq,
+            "ticks": self.latest(count).to_dicts(**extra),
+            "available": self.is_available(),
+            "last_update": self.last_tick_time
+        }
+
+    def delta(self, **extra: Any) -> Dict[str, Any]:
+        """Only the newest tick, for a client holding the snapshot at `seq - 1`."""
+        ticks = self.latest(1).to_dicts(**extra)
+        return {
+            "symbol": self.symbol,
+            "seq": self.seq,
+            "tick": ticks[0] if ticks else None,
+            "available": self.is_available(),
+            "last_update": self.last_tick_time
+        }
+
+    def is_available(self, timeout: float = 10) -> bool:
+        """Whether a tick was received for this symbol within `timeout` seconds."""
+        return self.tick_count > 0 and time.time() - self.last_tick_time <= timeout
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "subscription_id": self.subscription_id,
+            "subscribed_at": self.subscribed_at,
+            "last_tick_time": self.last_tick_time,
+            "tick_count": self.tick_count,
+            "buffered_ticks": len(self.ticks),
+            "buffer_bytes": self.ticks.nbytes,
+            "tick_interval": self.tick_interval,
+            "gaps_detected": self.gaps_detected,
+            "backfilled_ticks": self.backfilled_ticks,
+            "available": self.is_available()
+        }
+
+
+class TickSubscriptionManager:
+    """Tracks many concurrent `ticks` subscriptions on a single connection.
+
+    Each symbol owns its own bounded buffer, so adding or removing one
+    symbol never touches the ticks stored for the others.
+    """
+
+    def __init__(self, max_ticks: int = 1000):
+        self.max_ticks = max_ticks
+        self._by_symbol: Dict[str, TickSubscription] = {}
+        self._by_subscription_id: Dict[str, TickSubscription] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._by_symbol
+
+    def __len__(self) -> int:
+        return len(self._by_symbol)
+
+    def __iter__(self):
+        return iter(list(self._by_symbol.values()))
+
+    def symbols(self) -> List[str]:
+        return list(self._by_symbol)
+
+    def get(self, symbol: Optional[str]) -> Optional[TickSubscription]:
+        if symbol is None:
+            return None
+        return self._by_symbol.get(symbol)
+
+    def add(self, symbol: str) -> TickSubscription:
+        """Register a symbol, returning the existing subscription if present."""
+        subscription = self._by_symbol.get(symbol)
+        if subscription is None:
+            subscription = TickSubscription(symbol, self.max_ticks)
+            self._by_symbol[symbol] = subscription
+        return subscription
+
+    def remove(self, symbol: str) -> Optional[TickSubscription]:
+        subscription = self._by_symbol.pop(symbol, None)
+        if subscription and subscription.subscription_id:
+            self._by_subscription_id.pop(subscription.subscription_id, None)
+        return subscription
+
+    def bind(self, subscription: TickSubscription, subscription_id: str):
+        """Attach the id Deriv assigned to a subscription's stream."""
+        if subscription.subscription_id == subscription_id:
+            return
+        if subscription.subscription_id:
+            self._by_subscription_id.pop(subscription.subscription_id, None)
+        subscription.subscription_id = subscription_id
+        self._by_subscription_id[subscription_id] = subscription
+
+    def route(self, symbol: Optional[str], subscription_id: Optional[str] = None) -> Optional[TickSubscription]:
+        """Find the subscription a tick belongs to, by symbol or stream id."""
+        subscription = self._by_symbol.get(symbol) if symbol else None
+        if subscription is None and subscription_id:
+            subscription = self._by_subscription_id.get(subscription_id)
+        return subscription
+
+    def reset_subscription_ids(self, symbols: Optional[List[str]] = None):
+        """Forget stream ids, e.g. after the connection they belonged to dropped."""
+        for symbol in self.symbols() if symbols is None else symbols:
+            subscription = self._by_symbol.get(symbol)
+            if subscription and subscription.subscription_id:
+                self._by_subscription_id.pop(subscription.subscription_id, None)
+                subscription.subscription_id = None
+
+    def total_ticks(self) -> int:
+        return sum(len(subscription.ticks) for subscription in self._by_symbol.values())
+
+    def clear(self):
+        self._by_symbol.clear()
+        self._by_subscription_id.clear()
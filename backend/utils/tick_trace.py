@@ -0,0 +1,64 @@
+import time
+from typing import Optional, Dict, Any
+from utils.latency import RollingHistogram
+
+
+class TickTrace:
+    """Timestamps of one tick as it moves through the pipeline.
+
+    Each `mark` records the time spent since the previous stage, so a
+    trace costs one perf_counter call and one deque append per stage.
+    """
+
+    __slots__ = ("tracer", "started", "last")
+
+    def __init__(self, tracer: "TickTracer", started: float):
+        self.tracer = tracer
+        self.started = started
+        self.last = started
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.tracer.histograms[stage].add(now - self.last)
+        self.last = now
+
+    def finish(self, stage: Optional[str] = None):
+        """Close the trace, optionally timing one last stage, and record the total."""
+        if stage:
+            self.mark(stage)
+        self.tracer.histograms["total"].add(self.last - self.started)
+
+
+class TickTracer:
+    """Per-stage latency histograms for ticks, from socket read to SSE delivery.
+
+    Stages, in order:
+
+    - queue: waiting in the connection's ingest queue
+    - store: routing and writing to the symbol's ring buffer
+    - telegram: the Telegram notification check
+    - snapshot: building the latest-ticks payload for the frontend
+    - broadcast: handing the payload to the SSE broadcaster
+    - sse_wait: waiting for an SSE client to pick the update up
+    - coalesced: waiting until a newer snapshot replaced the update in an
+      SSE client's queue, for ticks that client never sent
+    - total: socket read until the last stage the tick reached
+    """
+
+    STAGES = ("queue", "store", "telegram", "snapshot", "broadcast", "sse_wait", "coalesced", "total")
+
+    def __init__(self, window: int = 1000, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[str, RollingHistogram] = {stage: RollingHistogram(window) for stage in self.STAGES}
+
+    def start(self, received_at: Optional[float] = None) -> Optional[TickTrace]:
+        """Begin a trace at the perf_counter time the frame was read, if tracing is on."""
+        if not self.enabled:
+            return None
+        return TickTrace(self, received_at or time.perf_counter())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "stages": {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+        }
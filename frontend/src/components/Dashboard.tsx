@@ -8,6 +8,7 @@ import { Alert } from './Alert';
 import { Footer } from './Footer';
 import { ApiService } from '../services/api';
 import { sseService } from '../services/sse';
+import { tickStream } from '../services/tickStream';
 import { Market, Tick } from '../types/api';
 import { TrendingUp, TrendingDown, BarChart3, Activity, DollarSign } from 'lucide-react';
 
@@ -213,7 +214,9 @@ export const Dashboard: React.FC<DashboardProps> = ({ onStreamingChange, onBalan
           // SSE connected
         });
         
-        sseService.on('tick_update', (data) => {
+        tickStream.start((data) => {
+          // Other symbols may be streaming too; only show the selected one
+          if (data.symbol && data.symbol !== selectedMarket) return;
           if (data.ticks && data.ticks.length > 0) {
             setTicks(data.ticks);
             setIsStreaming(data.available);
@@ -250,7 +253,7 @@ export const Dashboard: React.FC<DashboardProps> = ({ onStreamingChange, onBalan
         
         // Clear SSE event listeners
         sseService.off('connected');
-        sseService.off('tick_update');
+        tickStream.stop();
       } else {
         showToast(response.message || 'Erro ao cancelar inscrição', 'error');
       }
@@ -302,7 +305,8 @@ export const Dashboard: React.FC<DashboardProps> = ({ onStreamingChange, onBalan
           // SSE connected
         });
         
-        sseService.on('tick_update', (data) => {
+        tickStream.start((data) => {
+          if (data.symbol && data.symbol !== status.current_symbol) return;
           if (data.ticks && data.ticks.length > 0) {
             setTicks(data.ticks);
             setIsStreaming(data.available);
@@ -1,6 +1,7 @@
 import axios from 'axios';
 import { 
   MarketsResponse, 
+  MarketQuery,
   TicksResponse, 
   Stats, 
   SubscribeResponse, 
@@ -22,9 +23,9 @@ export class ApiService {
     return response.data;
   }
 
-  // Get available markets
-  static async getMarkets(): Promise<MarketsResponse> {
-    const response = await api.get<MarketsResponse>('/markets');
+  // Get available markets, optionally filtered and paginated on the server
+  static async getMarkets(query: MarketQuery = {}): Promise<MarketsResponse> {
+    const response = await api.get<MarketsResponse>('/markets', { params: query });
     return response.data;
   }
 
@@ -40,9 +41,9 @@ export class ApiService {
     return response.data;
   }
 
-  // Get latest ticks
-  static async getTicks(): Promise<TicksResponse> {
-    const response = await api.get<TicksResponse>('/ticks');
+  // Get latest ticks, by default for the subscribed symbol
+  static async getTicks(symbol?: string): Promise<TicksResponse> {
+    const response = await api.get<TicksResponse>('/ticks', { params: symbol ? { symbol } : {} });
     return response.data;
   }
 
@@ -1,20 +1,31 @@
 export class SSEService {
   private eventSource: EventSource | null = null;
   private listeners: Map<string, (data: any) => void> = new Map();
+  // Id of the last event received, so a reconnect only gets what was missed
+  private lastEventId: string | null = null;
 
-  connect(url: string = '/api/ticks/stream') {
+  connect(url: string = '/api/ticks/stream', resume: boolean = false) {
     if (this.eventSource) {
       this.disconnect();
     }
+    if (!resume) {
+      this.lastEventId = null;
+    }
 
-    // Connecting to SSE
-    this.eventSource = new EventSource(url);
+    // Connecting to SSE; a new EventSource does not send Last-Event-ID itself
+    const streamUrl = this.lastEventId
+      ? `${url}?last_event_id=${encodeURIComponent(this.lastEventId)}`
+      : url;
+    this.eventSource = new EventSource(streamUrl);
 
     this.eventSource.onopen = () => {
       // SSE connection opened successfully
     };
 
     this.eventSource.onmessage = (event) => {
+      if (event.lastEventId) {
+        this.lastEventId = event.lastEventId;
+      }
       try {
         const data = JSON.parse(event.data);
         
@@ -51,7 +62,7 @@ export class SSEService {
   reconnect() {
             // Reconnecting SSE...
     setTimeout(() => {
-      this.connect();
+      this.connect(undefined, true);
     }, 1000);
   }
 
@@ -0,0 +1,93 @@
+import { sseService } from './sse';
+import { ApiService } from './api';
+import { Tick } from '../types/api';
+
+export interface TickSnapshot {
+  symbol: string;
+  seq: number;
+  ticks: Tick[];
+  available: boolean;
+  max_ticks?: number;
+  last_update?: number;
+}
+
+// One new tick, or several when the server merged deltas between frames
+interface TickDelta {
+  symbol: string;
+  seq: number;
+  tick?: Tick | null;
+  ticks?: Tick[];
+  available: boolean;
+  last_update?: number;
+}
+
+// Rebuilds each symbol's tick list from the SSE stream: a full snapshot
+// ("tick_update") followed by one delta per tick ("tick_delta"). Deltas
+// carry the symbol's sequence number; when one is skipped the snapshot is
+// reloaded from /api/ticks.
+export class TickStream {
+  private snapshots: Map<string, TickSnapshot> = new Map();
+  private reloading: Set<string> = new Set();
+  private callback: ((data: TickSnapshot) => void) | null = null;
+
+  start(callback: (data: TickSnapshot) => void) {
+    this.callback = callback;
+    this.snapshots.clear();
+    sseService.on('tick_update', (data: TickSnapshot) => this.applySnapshot(data));
+    sseService.on('tick_delta', (data: TickDelta) => this.applyDelta(data));
+  }
+
+  stop() {
+    sseService.off('tick_update');
+    sseService.off('tick_delta');
+    this.callback = null;
+    this.snapshots.clear();
+  }
+
+  private applySnapshot(data: TickSnapshot) {
+    // Snapshots always win: after a backend restart seqs start over
+    if (!data.symbol) return;
+    this.snapshots.set(data.symbol, data);
+    this.callback?.(data);
+  }
+
+  private applyDelta(data: TickDelta) {
+    const current = this.snapshots.get(data.symbol);
+    const added = data.ticks ?? (data.tick ? [data.tick] : []);
+    // The delta's ticks have seqs data.seq - added.length + 1 .. data.seq
+    const firstSeq = data.seq - added.length + 1;
+    if (!current || firstSeq > current.seq + 1) {
+      this.reload(data.symbol);
+      return;
+    }
+    // Already part of the snapshot
+    if (data.seq <= current.seq) return;
+
+    const ticks = current.ticks.concat(added.slice(current.seq + 1 - firstSeq));
+    const maxTicks = current.max_ticks || ticks.length;
+    const next: TickSnapshot = {
+      ...current,
+      seq: data.seq,
+      ticks: ticks.length > maxTicks ? ticks.slice(ticks.length - maxTicks) : ticks,
+      available: data.available,
+      last_update: data.last_update
+    };
+    this.snapshots.set(data.symbol, next);
+    this.callback?.(next);
+  }
+
+  private async reload(symbol: string) {
+    if (this.reloading.has(symbol)) return;
+    this.reloading.add(symbol);
+    try {
+      const snapshot = await ApiService.getTicks(symbol);
+      this.applySnapshot(snapshot as TickSnapshot);
+    } catch (error) {
+      console.error(`Error reloading ticks for ${symbol}:`, error);
+    } finally {
+      this.reloading.delete(symbol);
+    }
+  }
+}
+
+export const tickStream = new TickStream();
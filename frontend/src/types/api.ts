@@ -29,6 +29,8 @@ export interface Tick {
   quote: number;
   bid: number;
   ask: number;
+  epoch?: number;
+  backfilled?: boolean;
   status?: string;
   message?: string;
 }
@@ -44,11 +46,27 @@ export interface ApiResponse<T> {
 
 export interface MarketsResponse {
   markets: Market[];
+  total?: number;
+  offset?: number;
+  limit?: number | null;
+}
+
+export interface MarketQuery {
+  market?: string;
+  submarket?: string;
+  symbol_type?: string;
+  open?: boolean;
+  q?: string;
+  offset?: number;
+  limit?: number;
 }
 
 export interface TicksResponse {
   ticks: Tick[];
   available: boolean;
+  symbol?: string;
+  seq?: number;
+  max_ticks?: number;
 }
 
 export interface SubscribeResponse {
@@ -4,7 +4,8 @@ export interface Market {
   id: string;
   name: string;
   description: string;
-  type: 'forex' | 'synthetic';
+  type: 'forex' | 'synthetic' | string;
+  is_open?: boolean;
 }
 
 export interface Strategy {